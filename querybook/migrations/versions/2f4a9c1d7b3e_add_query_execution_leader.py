@@ -0,0 +1,43 @@
+"""add query execution leader
+
+Revision ID: 2f4a9c1d7b3e
+Revises: c00f08f16065
+Create Date: 2026-10-18 06:02:41.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "2f4a9c1d7b3e"
+down_revision = "c00f08f16065"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "query_execution", sa.Column("leader_id", sa.Integer(), nullable=True)
+    )
+    op.create_index(
+        op.f("ix_query_execution_leader_id"),
+        "query_execution",
+        ["leader_id"],
+        unique=False,
+    )
+    op.create_foreign_key(
+        "query_execution_leader_id_fk",
+        "query_execution",
+        "query_execution",
+        ["leader_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+
+
+def downgrade():
+    op.drop_constraint(
+        "query_execution_leader_id_fk", "query_execution", type_="foreignkey"
+    )
+    op.drop_index(op.f("ix_query_execution_leader_id"), table_name="query_execution")
+    op.drop_column("query_execution", "leader_id")
@@ -0,0 +1,31 @@
+"""add statement execution result truncated
+
+Revision ID: 5b7d2e9c4a18
+Revises: 8e1f3b6a5d20
+Create Date: 2026-10-18 07:24:51.907146
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "5b7d2e9c4a18"
+down_revision = "8e1f3b6a5d20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "statement_execution",
+        sa.Column(
+            "result_truncated",
+            sa.Boolean(),
+            nullable=False,
+            server_default=sa.text("false"),
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column("statement_execution", "result_truncated")
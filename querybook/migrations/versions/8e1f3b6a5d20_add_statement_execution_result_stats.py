@@ -0,0 +1,25 @@
+"""add statement execution result stats
+
+Revision ID: 8e1f3b6a5d20
+Revises: 2f4a9c1d7b3e
+Create Date: 2026-10-18 06:41:09.337518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "8e1f3b6a5d20"
+down_revision = "2f4a9c1d7b3e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "statement_execution", sa.Column("result_stats", sa.JSON(), nullable=True)
+    )
+
+
+def downgrade():
+    op.drop_column("statement_execution", "result_stats")
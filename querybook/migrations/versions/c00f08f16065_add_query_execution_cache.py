@@ -0,0 +1,58 @@
+"""add query execution cache
+
+Revision ID: c00f08f16065
+Revises: ea497b49195e
+Create Date: 2026-10-18 05:10:12.204551
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c00f08f16065"
+down_revision = "ea497b49195e"
+branch_labels = None
+depends_on = None
+
+cache_status_enum = sa.Enum("MISS", "HIT", name="queryexecutioncachestatus")
+
+
+def upgrade():
+    # Needed for postgresql, add_column does not create the type
+    cache_status_enum.create(op.get_bind(), checkfirst=True)
+
+    op.add_column(
+        "query_execution", sa.Column("cache_key", sa.String(length=64), nullable=True)
+    )
+    op.add_column(
+        "query_execution", sa.Column("cache_status", cache_status_enum, nullable=True)
+    )
+    op.add_column(
+        "query_execution", sa.Column("cached_from_id", sa.Integer(), nullable=True)
+    )
+    op.create_index(
+        op.f("ix_query_execution_cache_key"),
+        "query_execution",
+        ["cache_key"],
+        unique=False,
+    )
+    op.create_foreign_key(
+        "query_execution_cached_from_id_fk",
+        "query_execution",
+        "query_execution",
+        ["cached_from_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+
+
+def downgrade():
+    op.drop_constraint(
+        "query_execution_cached_from_id_fk", "query_execution", type_="foreignkey"
+    )
+    op.drop_index(op.f("ix_query_execution_cache_key"), table_name="query_execution")
+    op.drop_column("query_execution", "cached_from_id")
+    op.drop_column("query_execution", "cache_status")
+    op.drop_column("query_execution", "cache_key")
+
+    cache_status_enum.drop(op.get_bind(), checkfirst=True)
@@ -68,6 +68,14 @@ def make_celery(app):
             "visibility_timeout": 180000  # 2 days + 2 hours
         },
     )
+    if QuerybookSettings.QUERY_EXECUTION_QUEUE:
+        # So queries can be run by workers that multiplex them, see
+        # prod_query_worker in scripts/runservice
+        celery.conf.task_routes = {
+            "tasks.run_query.run_query_task": {
+                "queue": QuerybookSettings.QUERY_EXECUTION_QUEUE
+            }
+        }
 
     TaskBase = celery.Task
 
@@ -1,10 +1,11 @@
 from abc import ABCMeta, abstractmethod
 from collections import deque
 from itertools import islice
-from typing import List
+from typing import BinaryIO, List
 
 from env import QuerybookSettings
-from logic.result_store import string_to_csv
+from lib.utils.utf8 import split_by_last_invalid_utf8_char
+from logic.result_store import CSVRowSplitter, rows_to_csv
 
 LINE_TERMINATOR = "\n"
 
@@ -13,6 +14,17 @@ class FileDoesNotExist(Exception):
     pass
 
 
+def is_gevent_patched() -> bool:
+    """True in the web server, where the sockets are patched by gevent
+       and reads only block the current greenlet
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("socket")
+
+
 class ChunkReader(metaclass=ABCMeta):
     def __init__(
         self,
@@ -26,14 +38,12 @@ class ChunkReader(metaclass=ABCMeta):
 
         self._num_char_read = 0
         self._eof = False
+        self._real_eof = False
         self._buffer_deque = deque([])
         self._raw_buffer = ""
 
     def read_csv(self, number_of_lines=None):
-        raw_csv_str = "\n".join(
-            [line for line in islice(self.read_line(), number_of_lines)]
-        )
-        return string_to_csv(raw_csv_str)
+        return rows_to_csv(islice(self.read_row(), number_of_lines))
 
     def read_lines(self, number_of_lines=None) -> List[str]:
         return [line for line in islice(self.read_line(), number_of_lines)]
@@ -45,6 +55,21 @@ class ChunkReader(metaclass=ABCMeta):
             elif not self._eof:
                 self._fill_buffer()
 
+    def read_row(self):  # generator
+        """Same as read_line, but the lines of quoted cells are joined
+           so that every row yielded is a full csv row
+        """
+        splitter = CSVRowSplitter()
+        for line in self.read_line():
+            row = splitter.add_line(line)
+            if row is not None:
+                yield row
+
+        # Unless we stopped because of max_read_size, in which case
+        # the row is cut off
+        if self._real_eof and splitter.incomplete_row is not None:
+            yield splitter.incomplete_row
+
     def _fill_buffer(self):
         raw = self.read()
         if len(raw):
@@ -72,6 +97,7 @@ class ChunkReader(metaclass=ABCMeta):
         # We can have real_eof which means we actually reached the end of file
         # or fake eof when we read enough data
         self._eof = True
+        self._real_eof = real_eof
         if real_eof and len(self._raw_buffer):
             self._buffer_deque.append(self._raw_buffer)
 
@@ -91,3 +117,59 @@ class ChunkReader(metaclass=ABCMeta):
             str -- The raw string from file
         """
         raise NotImplementedError()
+
+
+class StreamChunkReader(ChunkReader):
+    """Reads utf-8 text from a binary stream. If a decompressor is given,
+       each chunk is decompressed as it is read so only the beginning of
+       the stream is downloaded when reading the first few lines.
+
+       If cooperative, the reader yields to the other greenlets after each
+       chunk so that parsing a large result does not hold up the web server.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        decompressor=None,
+        read_size=QuerybookSettings.STORE_READ_SIZE,
+        max_read_size=QuerybookSettings.STORE_MAX_READ_SIZE,
+        cooperative=False,
+    ):
+        self._stream = stream
+        self._decompressor = decompressor
+        self._left_over_bytes = b""
+        self._cooperative = cooperative
+
+        super(StreamChunkReader, self).__init__(read_size, max_read_size)
+
+    def _read_bytes(self) -> bytes:
+        while True:
+            raw = self._stream.read(self._read_size)
+            if self._decompressor is None:
+                return raw
+            if not len(raw):
+                return self._decompressor.flush()
+
+            data = self._decompressor.decompress(raw)
+            # The decompressor might need more input to output anything
+            if len(data):
+                return data
+
+    def read(self):
+        if self._cooperative:
+            import gevent
+
+            gevent.sleep(0)
+
+        while True:
+            raw_bytes = self._read_bytes()
+            raw = self._left_over_bytes + raw_bytes
+            valid_raw, self._left_over_bytes = split_by_last_invalid_utf8_char(raw)
+            # An empty string means eof, so keep reading if the chunk
+            # only contained part of a multi-byte character
+            if len(valid_raw) or not len(raw_bytes):
+                return valid_raw.decode("utf-8")
+
+    def close(self):
+        self._stream.close()
@@ -1,6 +1,8 @@
 from io import BytesIO
 from os import SEEK_END
 from datetime import datetime
+from threading import Lock
+from typing import BinaryIO
 from urllib.parse import quote
 
 import requests
@@ -132,10 +134,7 @@ class GoogleDownloadClient(ChunkReader):
         self._transport = AuthorizedSession(credentials=client._credentials)
         self._stream = BytesIO()
 
-        download_url = (
-            f"https://storage.googleapis.com/storage/v1/b/"
-            f"{bucket_name}/o/{quote(blob_name, safe='')}?alt=media"
-        )
+        download_url = get_blob_download_url(bucket_name, blob_name)
 
         self._download = ChunkedDownload(download_url, read_size, self._stream)
 
@@ -155,6 +154,78 @@ class GoogleDownloadClient(ChunkReader):
         return content.decode("utf-8")
 
 
+def get_blob_metadata_url(bucket_name, blob_name):
+    return (
+        f"https://storage.googleapis.com/storage/v1/b/"
+        f"{bucket_name}/o/{quote(blob_name, safe='')}"
+    )
+
+
+def get_blob_download_url(bucket_name, blob_name):
+    return get_blob_metadata_url(bucket_name, blob_name) + "?alt=media"
+
+
+GOOGLE_STORAGE_READ_SCOPE = "https://www.googleapis.com/auth/devstorage.read_only"
+_authorized_session = None
+_authorized_session_lock = Lock()
+
+
+def get_authorized_session():
+    """The session is shared by the whole process so the connections
+       to google storage are kept alive between reads
+    """
+    global _authorized_session
+    with _authorized_session_lock:
+        if _authorized_session is None:
+            from google.auth.transport.requests import AuthorizedSession
+
+            credentials = get_google_credentials().with_scopes(
+                [GOOGLE_STORAGE_READ_SCOPE]
+            )
+            _authorized_session = AuthorizedSession(credentials=credentials)
+    return _authorized_session
+
+
+def get_blob_stream(bucket_name, blob_name, offset=0) -> BinaryIO:
+    """Stream the content of the blob with a single request, unlike
+       GoogleDownloadClient which sends a request per chunk
+
+    Arguments:
+        offset {int} -- Start reading from this byte instead of the beginning
+
+    Raises:
+        FileDoesNotExist: if the blob is not in the bucket
+
+    Returns:
+        BinaryIO -- file-like object of the raw bytes
+    """
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    response = get_authorized_session().get(
+        get_blob_download_url(bucket_name, blob_name), headers=headers, stream=True
+    )
+    if response.status_code == 404:
+        response.close()
+        raise FileDoesNotExist("{}/{} does not exist".format(bucket_name, blob_name))
+    response.raise_for_status()
+    return response.raw
+
+
+def get_blob_size(bucket_name, blob_name) -> int:
+    """Get the size of the blob in bytes
+
+    Raises:
+        FileDoesNotExist: if the blob is not in the bucket
+    """
+    response = get_authorized_session().get(
+        get_blob_metadata_url(bucket_name, blob_name), params={"fields": "size"}
+    )
+    if response.status_code == 404:
+        raise FileDoesNotExist("{}/{} does not exist".format(bucket_name, blob_name))
+    response.raise_for_status()
+    # The JSON API returns the size as a string
+    return int(response.json()["size"])
+
+
 class GoogleKeySigner(object):
     def __init__(self, bucket_name):
         from google.cloud import storage
@@ -210,6 +210,22 @@ class HiveMetastoreClient:
             lambda: self._read_client.get_table(db_name, tb_name)
         )
 
+    def get_tables(self, db_name, tb_names):
+        """
+        Queries the hive metastore for the table info of many tables at once
+
+        Args:
+            db_name: The name of the database
+            tb_names: The names of the tables
+
+        Returns:
+            List of hive_metastore.ttypes.Table object, same as get_table
+        """
+        _LOG.info("Get %d tables from db %s", len(tb_names), db_name)
+        return self._perform_read_op(
+            lambda: self._read_client.get_table_objects_by_name(db_name, tb_names)
+        )
+
     def get_partitions(self, db_name, tb_name):
         """
         Queries the hive metastore DB for table partitions
@@ -1,5 +1,12 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import BoundedSemaphore, Lock
+import time
+from typing import Union
+
 import boto3
 import botocore
+import botocore.config
 
 from env import QuerybookSettings
 from lib.utils.utf8 import split_by_last_invalid_utf8_char
@@ -7,15 +14,105 @@ from lib.utils.utf8 import split_by_last_invalid_utf8_char
 from .common import ChunkReader, FileDoesNotExist
 
 
+_s3_client = None
+_s3_client_lock = Lock()
+
+
+def get_s3_client():
+    """The client is shared by the whole process so the credentials
+       and the connections to s3 are reused, boto3 clients are thread safe
+    """
+    global _s3_client
+    with _s3_client_lock:
+        if _s3_client is None:
+            # The default session is not thread safe, so use a new one
+            _s3_client = boto3.session.Session().client(
+                "s3",
+                config=botocore.config.Config(
+                    max_pool_connections=QuerybookSettings.STORE_MAX_POOL_CONNECTIONS
+                ),
+            )
+    return _s3_client
+
+
+# Results are never overwritten, so once a key is found it is
+# remembered for a while instead of being checked on every download.
+# Missing keys are not cached since they can be uploaded at any time, and
+# the ttl is kept short since keys can still be deleted (ex. lifecycle rules)
+KEY_EXISTENCE_CACHE_TTL = 300
+KEY_EXISTENCE_CACHE_SIZE = 10000
+_existing_keys = OrderedDict()
+_existing_keys_lock = Lock()
+
+
+def object_exists(bucket_name, key) -> bool:
+    cache_key = (bucket_name, key)
+    now = time.time()
+    with _existing_keys_lock:
+        expire_at = _existing_keys.get(cache_key)
+        if expire_at is not None:
+            if expire_at > now:
+                return True
+            del _existing_keys[cache_key]
+
+    try:
+        get_s3_client().head_object(Bucket=bucket_name, Key=key)
+    except botocore.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise e
+
+    with _existing_keys_lock:
+        _existing_keys[cache_key] = now + KEY_EXISTENCE_CACHE_TTL
+        _existing_keys.move_to_end(cache_key)
+        while len(_existing_keys) > KEY_EXISTENCE_CACHE_SIZE:
+            _existing_keys.popitem(last=False)
+    return True
+
+
+def get_object_size(bucket_name, key) -> int:
+    """Get the size of the s3 object in bytes
+
+    Raises:
+        FileDoesNotExist: if the key is not in the bucket
+    """
+    try:
+        return get_s3_client().head_object(Bucket=bucket_name, Key=key)["ContentLength"]
+    except botocore.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            raise FileDoesNotExist("{}/{} does not exist".format(bucket_name, key))
+        raise e
+
+
 class MultiPartUploader(object):
-    def __init__(self, bucket_name, key):
+    """Uploads the written data to s3 as a multipart upload
+
+    Parts are uploaded by a pool of background threads so the caller can
+    keep fetching/serializing rows while previous parts are in flight.
+    At most max_pending_parts parts (queued + uploading) are kept in memory,
+    write blocks once that limit is reached.
+    """
+
+    def __init__(
+        self,
+        bucket_name,
+        key,
+        upload_concurrency=QuerybookSettings.STORE_UPLOAD_CONCURRENCY,
+        max_pending_parts=QuerybookSettings.STORE_UPLOAD_QUEUE_SIZE,
+    ):
         self._bucket_name = bucket_name
         self._key = key
-        self._s3 = boto3.client("s3")
+        self._s3 = get_s3_client()
         self._mpu = self._s3.create_multipart_upload(Bucket=bucket_name, Key=key)
-        self._parts = []
         self._part_number = 1
 
+        self._executor = ThreadPoolExecutor(max_workers=max(upload_concurrency, 1))
+        self._max_pending_parts = max(max_pending_parts, 1)
+        self._pending_parts = BoundedSemaphore(self._max_pending_parts)
+        self._part_futures = []
+        self._upload_error = None
+        self._aborted = False
+
         self.chunk = []
         self.chunk_datasize = 0
         self.is_first_upload = True
@@ -23,25 +120,80 @@ class MultiPartUploader(object):
     def _upload_part(self, body):
         if self._part_number > QuerybookSettings.STORE_MAX_UPLOAD_CHUNK_NUM:
             return
+        # Blocks until one of the pending parts is uploaded
+        self._pending_parts.acquire()
+        try:
+            if self._upload_error is not None:
+                raise self._upload_error
+            future = self._executor.submit(
+                self._upload_part_sync, self._part_number, body
+            )
+        except Exception:
+            self._pending_parts.release()
+            raise
+        future.add_done_callback(self._on_part_uploaded)
+
+        self._part_futures.append(future)
+        self._part_number += 1
 
+    def _upload_part_sync(self, part_number, body):
         part = self._s3.upload_part(
             Bucket=self._bucket_name,
             Key=self._key,
-            PartNumber=self._part_number,
+            PartNumber=part_number,
             UploadId=self._mpu["UploadId"],
             Body=body,
         )
+        return {"PartNumber": part_number, "ETag": part["ETag"].replace('"', "")}
+
+    def _on_part_uploaded(self, future):
+        if (
+            self._upload_error is None
+            and not future.cancelled()
+            and future.exception() is not None
+        ):
+            self._upload_error = future.exception()
+        self._pending_parts.release()
+
+    def _abort(self):
+        """Stop uploading the parts and abort the multipart upload,
+           so s3 deletes the parts that were already uploaded
+        """
+        if self._aborted:
+            return
+        self._aborted = True
 
-        self._parts.append(
-            {"PartNumber": self._part_number, "ETag": part["ETag"].replace('"', "")}
+        # Parts that finish uploading after the abort would be kept,
+        # so every part must be cancelled or done before aborting
+        for future in self._part_futures:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+        wait(self._part_futures)
+        for _ in range(self._max_pending_parts):
+            self._pending_parts.acquire()
+
+        self._s3.abort_multipart_upload(
+            Bucket=self._bucket_name, Key=self._key, UploadId=self._mpu["UploadId"],
         )
-        self._part_number += 1
+        # As recommended by s3, check that no part is left and abort again if so
+        try:
+            parts = self._s3.list_parts(
+                Bucket=self._bucket_name, Key=self._key, UploadId=self._mpu["UploadId"],
+            ).get("Parts")
+        except botocore.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] != "NoSuchUpload":
+                raise e
+            parts = None
+        if parts:
+            self._s3.abort_multipart_upload(
+                Bucket=self._bucket_name, Key=self._key, UploadId=self._mpu["UploadId"],
+            )
 
-    def write(self, string: str) -> bool:
+    def write(self, string: Union[str, bytes]) -> bool:
         """Write a string to upload
 
         Arguments:
-            string {str} -- the string to upload
+            string {Union[str, bytes]} -- the string or bytes to upload
 
         Returns:
             bool -- Whether or not the upload is successful
@@ -49,10 +201,16 @@ class MultiPartUploader(object):
         if self._part_number > QuerybookSettings.STORE_MAX_UPLOAD_CHUNK_NUM:
             return False
 
-        self.chunk.append(string)
-        self.chunk_datasize += len(string)
+        data = string.encode("utf-8") if isinstance(string, str) else string
+        self.chunk.append(data)
+        self.chunk_datasize += len(data)
         if self.chunk_datasize > QuerybookSettings.STORE_MIN_UPLOAD_CHUNK_SIZE:
-            self._upload_part("".join(self.chunk))
+            try:
+                self._upload_part(b"".join(self.chunk))
+            except Exception as e:
+                self._upload_error = self._upload_error or e
+                self._abort()
+                raise
             self.chunk = []
             self.chunk_datasize = 0
         return True
@@ -61,35 +219,63 @@ class MultiPartUploader(object):
         self.write(string + "\n")
 
     def complete(self):
-        if len(self.chunk) > 0:
-            self._upload_part("".join(self.chunk))
+        try:
+            if self._upload_error is not None:
+                raise self._upload_error
+            if len(self.chunk) > 0:
+                self._upload_part(b"".join(self.chunk))
+            parts = [future.result() for future in self._part_futures]
+        except Exception:
+            self._abort()
+            raise
+        self._executor.shutdown(wait=True)
+
         self._s3.complete_multipart_upload(
             Bucket=self._bucket_name,
             Key=self._key,
             UploadId=self._mpu["UploadId"],
-            MultipartUpload={"Parts": self._parts},
+            MultipartUpload={"Parts": parts},
         )
 
 
 class S3KeySigner(object):
     def __init__(self, bucket_name):
         self._bucket_name = bucket_name
-        self._s3 = boto3.client("s3")
-        self._bucket = boto3.resource("s3").Bucket(bucket_name)
+        self._s3 = get_s3_client()
 
     def generate_presigned_url(
-        self, key, method="get_object", expires_in=86400, params={}
+        self, key, method="get_object", expires_in=86400, params=None
     ):
-        params.update({"Bucket": self._bucket_name, "Key": key})
+        if not object_exists(self._bucket_name, key):
+            return None
 
-        # Check if file exists
-        objects = list(self._bucket.objects.filter(Prefix=key))
-        if len(objects) > 0 and objects[0].key == key:
-            url = self._s3.generate_presigned_url(
-                ClientMethod=method, Params=params, ExpiresIn=expires_in
-            )
-            return url
-        return None
+        params = {**(params or {}), "Bucket": self._bucket_name, "Key": key}
+        return self._s3.generate_presigned_url(
+            ClientMethod=method, Params=params, ExpiresIn=expires_in
+        )
+
+
+def get_object_body(bucket_name, key, offset=0):
+    """Get the streaming body of the s3 object
+
+    Arguments:
+        offset {int} -- Start reading from this byte instead of the beginning
+
+    Raises:
+        FileDoesNotExist: if the key is not in the bucket
+
+    Returns:
+        botocore.response.StreamingBody -- file-like object of the raw bytes
+    """
+    try:
+        params = {"Range": f"bytes={offset}-"} if offset else {}
+        response = get_s3_client().get_object(Bucket=bucket_name, Key=key, **params)
+        return response["Body"]
+    except botocore.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] == "NoSuchKey":
+            raise FileDoesNotExist("{}/{} does not exist".format(bucket_name, key))
+        else:
+            raise e
 
 
 class S3FileReader(ChunkReader):
@@ -107,17 +293,7 @@ class S3FileReader(ChunkReader):
         super(S3FileReader, self).__init__(read_size, max_read_size)
 
         # Now connect to s3 using boto3
-        try:
-            self._s3 = boto3.resource("s3")
-            self._object = self._s3.Object(self._bucket_name, key)
-            self._body = self._object.get()["Body"]
-        except botocore.exceptions.ClientError as e:
-            if e.response["Error"]["Code"] == "NoSuchKey":
-                raise FileDoesNotExist(
-                    "{}/{} does not exist".format(self._bucket_name, key)
-                )
-            else:
-                raise e
+        self._body = get_object_body(self._bucket_name, key)
 
     def read(self):
         raw = self._left_over_bytes + self._body.read(self._read_size)
@@ -21,6 +21,11 @@ class StatementExecutionStatus(Enum):
     CANCEL = 5
 
 
+class QueryExecutionCacheStatus(Enum):
+    MISS = 0  # The query was run since no recent result could be reused
+    HIT = 1  # The result of a recent execution of the same query was reused
+
+
 class QueryExecutionErrorType(Enum):
     INTERNAL = 0  # Error came from python exception caused by celery worker
     ENGINE = 1  # Error was thrown from the query engine
@@ -8,6 +8,7 @@ from env import QuerybookSettings
 from lib.engine_status_checker import ALL_ENGINE_STATUS_CHECKERS
 from lib.metastore.loaders import ALL_METASTORE_LOADERS
 from lib.query_executor.all_executors import get_flattened_executor_template
+from lib.result_store.result_cache import get_result_cache_stats
 from logic import admin as logic
 from logic import user as user_logic
 from logic import environment as environment_logic
@@ -576,6 +577,12 @@ def get_admin_audit_logs(
     )
 
 
+@register("/admin/result_cache/", methods=["GET"])
+@admin_only
+def get_result_cache_stats_admin():
+    return get_result_cache_stats()
+
+
 @register("/admin/querybook_config/", methods=["GET"])
 @admin_only
 def get_admin_config():
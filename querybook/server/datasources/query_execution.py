@@ -1,11 +1,11 @@
-from typing import Dict
+from typing import Dict, Optional
 
 from flask import (
     abort,
+    request,
     Response,
 )
 from flask_login import current_user
-import requests
 
 from app.flask_app import socketio
 from app.datasource import register, api_assert, RequestException
@@ -17,21 +17,24 @@ from app.auth.permission import (
 )
 from clients.s3_client import FileDoesNotExist
 from lib.export.all_exporters import ALL_EXPORTERS, get_exporter
-from lib.result_store import GenericReader
+from lib.query_executor.log_buffer import get_statement_execution_stream_logs
+from lib.result_store import GenericReader, project_csv_columns
+from lib.result_store.exc import UnknownResultColumns
+from lib.result_store.result_cache import cache_result, get_cached_result
 from lib.query_analysis.templating import (
     render_templated_query,
     get_templated_variables_in_string,
     QueryTemplatingError,
 )
 from lib.form import validate_form
-from const.query_execution import QueryExecutionStatus
+from const.query_execution import QueryExecutionStatus, StatementExecutionStatus
 from const.datasources import RESOURCE_NOT_FOUND_STATUS_CODE
 from logic import query_execution as logic, datadoc as datadoc_logic, user as user_logic
 from logic.datadoc_permission import user_can_read
 from logic.query_execution_permission import (
     get_default_user_environment_by_execution_id,
 )
-from tasks.run_query import run_query_task
+from tasks.run_query import complete_follower, run_query_task
 from app.auth.permission import verify_query_execution_owner
 from models.query_execution import QueryExecutionViewer
 from models.access_request import AccessRequest
@@ -39,15 +42,29 @@ from app.db import with_session
 from env import QuerybookSettings
 from lib.notify.utils import notify_user
 
+MAX_RESULT_PAGE_SIZE = 5000
+
 
 @register("/query_execution/", methods=["POST"])
-def create_query_execution(query, engine_id, data_cell_id=None, originator=None):
+def create_query_execution(
+    query, engine_id, data_cell_id=None, originator=None, cache_ttl=None
+):
+    api_assert(
+        cache_ttl is None or (isinstance(cache_ttl, int) and cache_ttl >= 0),
+        "cache_ttl must be a non negative integer",
+        400,
+    )
+
     with DBSession() as session:
         verify_query_engine_permission(engine_id, session=session)
 
         uid = current_user.id
         query_execution = logic.create_query_execution(
-            query=query, engine_id=engine_id, uid=uid, session=session
+            query=query,
+            engine_id=engine_id,
+            uid=uid,
+            cache_ttl=cache_ttl,
+            session=session,
         )
 
         data_doc = None
@@ -59,9 +76,11 @@ def create_query_execution(query, engine_id, data_cell_id=None, originator=None)
             data_doc = data_cell.doc
 
         try:
-            run_query_task.apply_async(
-                args=[query_execution.id,]
-            )
+            # Already done if the result is reused from the cache
+            if query_execution.status != QueryExecutionStatus.DONE:
+                run_query_task.apply_async(
+                    args=[query_execution.id,]
+                )
             query_execution_dict = query_execution.to_dict()
 
             if data_doc:
@@ -115,6 +134,13 @@ def cancel_query_execution(query_execution_id):
             if task is not None:
                 task.abort()
 
+        if execution is not None and execution.leader_id is not None:
+            # The task of a follower is only running when it checks its
+            # leader, so the follower is cancelled here. The leader keeps running
+            complete_follower(
+                query_execution_id, QueryExecutionStatus.CANCEL, None, session=session,
+            )
+
 
 @register("/query_execution/search/", methods=["GET"])
 def search_query_execution(
@@ -202,20 +228,53 @@ def download_statement_execution_result(statement_execution_id):
         )
 
         reader = GenericReader(statement_execution.result_path)
-        response = None
-        if reader.has_download_url:
-            # If the Reader can generate a download,
-            # we proxy download the file
-            download_url = reader.get_download_url()
-            req = requests.get(download_url, stream=True)
-
-            # 10 KB size
-            response = Response(req.iter_content(chunk_size=10 * 1024))
-        else:
-            # We read the raw file and download it for the user
-            reader.start()
-            raw = reader.read_raw()
-            response = Response(raw)
+        headers = {}
+        status = 200
+        offset = 0
+        end = None
+        try:
+            # Byte ranges let clients resume the download, they are only
+            # served if the size of the csv is known without reading it
+            raw_size = reader.get_raw_size()
+            byte_range = request.range
+            if raw_size is not None:
+                headers["Accept-Ranges"] = "bytes"
+                headers["Content-Length"] = str(raw_size)
+                # Multiple ranges are not supported, the whole result is sent
+                if (
+                    byte_range is not None
+                    and byte_range.units == "bytes"
+                    and len(byte_range.ranges) == 1
+                ):
+                    content_range = byte_range.make_content_range(raw_size)
+                    if content_range is None:
+                        reader.end()
+                        return Response(
+                            status=416,
+                            headers={"Content-Range": "bytes */{}".format(raw_size)},
+                        )
+                    offset, end = content_range.start, content_range.stop
+                    status = 206
+                    headers["Content-Range"] = content_range.to_header()
+                    headers["Content-Length"] = str(end - offset)
+
+            chunks = reader.iter_raw(offset=offset, end=end)
+        except FileDoesNotExist as e:
+            reader.end()
+            abort(RESOURCE_NOT_FOUND_STATUS_CODE, str(e))
+
+        def generate():
+            try:
+                yield from chunks
+            finally:
+                chunks.close()
+                reader.end()
+
+        # The chunks are sent as they are read so memory stays constant
+        # no matter the size of the result, and they are not buffered
+        # by the response compression since that would change the offsets
+        response = Response(generate(), status=status, headers=headers)
+        response.direct_passthrough = True
         response.headers["Content-Type"] = "text/plain"
         response.headers[
             "Content-Disposition"
@@ -230,7 +289,7 @@ def download_statement_execution_result(statement_execution_id):
     methods=["GET"],
     require_auth=True,
 )
-def get_statement_execution_result(statement_execution_id):
+def get_statement_execution_result(statement_execution_id, columns=None):
     with DBSession() as session:
         try:
             statement_execution = logic.get_statement_execution_by_id(
@@ -243,11 +302,89 @@ def get_statement_execution_result(statement_execution_id):
                 statement_execution.query_execution_id, session=session
             )
 
+            # Only the full preview is cached, it can be projected afterwards
+            result = get_cached_result(statement_execution_id)
+            if result is not None:
+                return project_csv_columns(result, columns)
+
             with GenericReader(statement_execution.result_path) as reader:
-                result = reader.read_csv(number_of_lines=2001)
-                return result
+                result = reader.read_csv(number_of_lines=2001, columns=columns)
+
+            if (
+                columns is None
+                and statement_execution.status == StatementExecutionStatus.DONE
+            ):
+                cache_result(statement_execution_id, result)
+            return result
         except FileDoesNotExist as e:
             abort(RESOURCE_NOT_FOUND_STATUS_CODE, str(e))
+        except UnknownResultColumns as e:
+            raise RequestException(str(e), 400)
+
+
+def _parse_non_negative_int(value) -> Optional[int]:
+    """Parse the request param, None if it is not a non negative integer"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        return int(value)
+    if isinstance(value, int) and value >= 0:
+        return value
+    return None
+
+
+@register(
+    "/statement_execution/<int:statement_execution_id>/result/page/",
+    methods=["GET"],
+    require_auth=True,
+)
+def get_statement_execution_result_page(statement_execution_id, offset=0, limit=1000):
+    offset = _parse_non_negative_int(offset)
+    limit = _parse_non_negative_int(limit)
+    api_assert(offset is not None, "Offset must be a non negative integer", 400)
+    api_assert(
+        limit is not None and 0 < limit <= MAX_RESULT_PAGE_SIZE,
+        f"Limit must be an integer between 1 and {MAX_RESULT_PAGE_SIZE}",
+        400,
+    )
+
+    with DBSession() as session:
+        try:
+            statement_execution = logic.get_statement_execution_by_id(
+                statement_execution_id, session=session
+            )
+            api_assert(
+                statement_execution is not None, message="Invalid statement execution"
+            )
+            verify_query_execution_permission(
+                statement_execution.query_execution_id, session=session
+            )
+
+            with GenericReader(statement_execution.result_path) as reader:
+                return reader.read_csv_page(offset, limit)
+        except FileDoesNotExist as e:
+            abort(RESOURCE_NOT_FOUND_STATUS_CODE, str(e))
+
+
+@register(
+    "/statement_execution/<int:statement_execution_id>/result/stats/",
+    methods=["GET"],
+    require_auth=True,
+)
+def get_statement_execution_result_stats(statement_execution_id):
+    with DBSession() as session:
+        statement_execution = logic.get_statement_execution_by_id(
+            statement_execution_id, session=session
+        )
+        api_assert(
+            statement_execution is not None, message="Invalid statement execution"
+        )
+        verify_query_execution_permission(
+            statement_execution.query_execution_id, session=session
+        )
+
+        # None if the result was uploaded without stats
+        return statement_execution.result_stats
 
 
 @register(
@@ -270,8 +407,9 @@ def get_statement_execution_log(statement_execution_id):
         log_path = statement_execution.log_path
         try:
             if log_path.startswith("stream"):
-                logs = logic.get_statement_execution_stream_logs(statement_execution_id)
-                return list(map(lambda log: log.log, logs))
+                return get_statement_execution_stream_logs(
+                    statement_execution_id, session=session
+                )
             else:
                 with DBSession() as session:
                     MAX_LOG_RETURN_LINES = 2000
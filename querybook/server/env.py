@@ -47,12 +47,57 @@ class QuerybookSettings(object):
     # Search
     ELASTICSEARCH_HOST = get_env_config("ELASTICSEARCH_HOST", optional=False)
     ELASTICSEARCH_CONNECTION_TYPE = get_env_config("ELASTICSEARCH_CONNECTION_TYPE")
+    ELASTICSEARCH_BULK_CHUNK_SIZE = int(get_env_config("ELASTICSEARCH_BULK_CHUNK_SIZE"))
+    ELASTICSEARCH_BULK_CONCURRENCY = int(
+        get_env_config("ELASTICSEARCH_BULK_CONCURRENCY")
+    )
+    ELASTICSEARCH_BULK_MAX_RETRIES = int(
+        get_env_config("ELASTICSEARCH_BULK_MAX_RETRIES")
+    )
+    ELASTICSEARCH_SYNC_INTERVAL = int(get_env_config("ELASTICSEARCH_SYNC_INTERVAL"))
+    ELASTICSEARCH_SYNC_BATCH_SIZE = int(get_env_config("ELASTICSEARCH_SYNC_BATCH_SIZE"))
 
     # Database
     DATABASE_CONN = get_env_config("DATABASE_CONN", optional=False)
     DATABASE_POOL_SIZE = int(get_env_config("DATABASE_POOL_SIZE"))
     DATABASE_POOL_RECYCLE = int(get_env_config("DATABASE_POOL_RECYCLE"))
 
+    # Metastore
+    METASTORE_FULL_LOAD_INTERVAL = int(get_env_config("METASTORE_FULL_LOAD_INTERVAL"))
+
+    # Query Execution
+    QUERY_EXECUTION_QUEUE = get_env_config("QUERY_EXECUTION_QUEUE")
+    QUERY_EXECUTION_UPDATE_INTERVAL = float(
+        get_env_config("QUERY_EXECUTION_UPDATE_INTERVAL")
+    )
+    QUERY_EXECUTION_UPDATE_LOG_SIZE = int(
+        get_env_config("QUERY_EXECUTION_UPDATE_LOG_SIZE")
+    )
+    QUERY_EXECUTION_POLL_STRATEGY = get_env_config("QUERY_EXECUTION_POLL_STRATEGY")
+    QUERY_EXECUTION_MIN_POLL_INTERVAL = float(
+        get_env_config("QUERY_EXECUTION_MIN_POLL_INTERVAL")
+    )
+    QUERY_EXECUTION_MAX_POLL_INTERVAL = float(
+        get_env_config("QUERY_EXECUTION_MAX_POLL_INTERVAL")
+    )
+    QUERY_EXECUTION_MAX_PARALLEL_STATEMENTS = int(
+        get_env_config("QUERY_EXECUTION_MAX_PARALLEL_STATEMENTS")
+    )
+    QUERY_EXECUTION_CACHE_MAX_TTL = int(get_env_config("QUERY_EXECUTION_CACHE_MAX_TTL"))
+    QUERY_EXECUTION_COALESCE = (
+        str(get_env_config("QUERY_EXECUTION_COALESCE")).lower() == "true"
+    )
+    QUERY_EXECUTION_LOG_BUFFER_MAX_CHUNKS = int(
+        get_env_config("QUERY_EXECUTION_LOG_BUFFER_MAX_CHUNKS")
+    )
+    QUERY_EXECUTION_LOG_BUFFER_TTL = int(
+        get_env_config("QUERY_EXECUTION_LOG_BUFFER_TTL")
+    )
+    QUERY_ENGINE_CLIENT_POOL_SIZE = int(get_env_config("QUERY_ENGINE_CLIENT_POOL_SIZE"))
+    QUERY_ENGINE_CLIENT_IDLE_TIMEOUT = float(
+        get_env_config("QUERY_ENGINE_CLIENT_IDLE_TIMEOUT")
+    )
+
     # Communications
     EMAILER_CONN = get_env_config("EMAILER_CONN")
     QUERYBOOK_SLACK_TOKEN = get_env_config("QUERYBOOK_SLACK_TOKEN")
@@ -73,16 +118,30 @@ class QuerybookSettings(object):
 
     # Result Store
     RESULT_STORE_TYPE = get_env_config("RESULT_STORE_TYPE")
+    RESULT_STORE_FORMAT = get_env_config("RESULT_STORE_FORMAT")
+    RESULT_STORE_COMPRESSION = get_env_config("RESULT_STORE_COMPRESSION")
 
     STORE_BUCKET_NAME = get_env_config("STORE_BUCKET_NAME")
     STORE_PATH_PREFIX = get_env_config("STORE_PATH_PREFIX")
     STORE_MIN_UPLOAD_CHUNK_SIZE = int(get_env_config("STORE_MIN_UPLOAD_CHUNK_SIZE"))
     STORE_MAX_UPLOAD_CHUNK_NUM = int(get_env_config("STORE_MAX_UPLOAD_CHUNK_NUM"))
+    STORE_UPLOAD_CONCURRENCY = int(get_env_config("STORE_UPLOAD_CONCURRENCY"))
+    STORE_UPLOAD_QUEUE_SIZE = int(get_env_config("STORE_UPLOAD_QUEUE_SIZE"))
+    STORE_MAX_POOL_CONNECTIONS = int(get_env_config("STORE_MAX_POOL_CONNECTIONS"))
     STORE_MAX_READ_SIZE = int(get_env_config("STORE_MAX_READ_SIZE"))
     STORE_READ_SIZE = int(get_env_config("STORE_READ_SIZE"))
 
+    RESULT_MAX_ROWS = int(get_env_config("RESULT_MAX_ROWS"))
+    RESULT_MAX_SIZE = int(get_env_config("RESULT_MAX_SIZE"))
+
     DB_MAX_UPLOAD_SIZE = int(get_env_config("DB_MAX_UPLOAD_SIZE"))
 
+    RESULT_CACHE_MAX_ENTRIES = int(get_env_config("RESULT_CACHE_MAX_ENTRIES"))
+    RESULT_CACHE_MAX_ENTRY_SIZE = int(get_env_config("RESULT_CACHE_MAX_ENTRY_SIZE"))
+
+    RESULT_STATS = str(get_env_config("RESULT_STATS")).lower() == "true"
+    RESULT_STATS_SAMPLE_SIZE = int(get_env_config("RESULT_STATS_SAMPLE_SIZE"))
+
     GOOGLE_CREDS = json.loads(get_env_config("GOOGLE_CREDS") or "null")
 
     # Logging
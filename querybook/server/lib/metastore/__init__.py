@@ -1,5 +1,6 @@
 from app.db import with_session
-
+from clients.redis_client import with_redis
+from env import QuerybookSettings
 from logic.admin import get_query_metastore_by_id
 
 
@@ -19,6 +20,21 @@ def get_metastore_loader(metastore_id: int, session=None):
     return get_metastore_loader_class_by_name(metastore_dict["loader"])(metastore_dict)
 
 
-def load_metastore(metastore_id: int):
+def get_metastore_full_load_key(metastore_id: int) -> str:
+    return f"metastore_full_load/{metastore_id}"
+
+
+@with_redis
+def load_metastore(metastore_id: int, redis_conn=None):
+    """Load the metastore. With METASTORE_FULL_LOAD_INTERVAL, the loads
+       after a full one only sync the changed tables until the interval is over
+    """
     loader = get_metastore_loader(metastore_id)
-    loader.load()
+
+    full_load_interval = QuerybookSettings.METASTORE_FULL_LOAD_INTERVAL
+    full_load_key = get_metastore_full_load_key(metastore_id)
+    incremental = full_load_interval > 0 and redis_conn.exists(full_load_key) > 0
+
+    loader.load(incremental=incremental)
+    if full_load_interval > 0 and not incremental:
+        redis_conn.set(full_load_key, 1, ex=full_load_interval)
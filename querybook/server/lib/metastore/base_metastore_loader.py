@@ -1,7 +1,8 @@
 from abc import ABCMeta, abstractmethod, abstractclassmethod
+from datetime import datetime
 import gevent
 import math
-from typing import NamedTuple, List, Dict, Tuple
+from typing import NamedTuple, List, Dict, Optional, Tuple
 import traceback
 
 from app.db import DBSession, with_session
@@ -10,7 +11,11 @@ from lib.logger import get_logger
 from lib.form import AllFormField
 from lib.utils import json
 from lib.utils.utils import with_exception
-from logic.elasticsearch import update_table_by_id, delete_es_table_by_id
+from logic.elasticsearch import (
+    update_table_by_id,
+    update_tables_by_ids,
+    delete_es_table_by_id,
+)
 from logic.metastore import (
     create_schema,
     delete_schema,
@@ -117,7 +122,14 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
             if table:
                 delete_table(table_id=table.id, session=session)
 
-    def load(self):
+    def load(self, incremental: bool = False):
+        """Sync all the schemas and tables of the metastore
+
+        Keyword Arguments:
+            incremental {bool} -- Only sync the tables that are new or updated
+                                  since they were synced, according to
+                                  get_tables_updated_at (default: {False})
+        """
         schema_tables = []
         schema_names = set(self._get_all_filtered_schema_names())
 
@@ -134,6 +146,10 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
                     session=session,
                 ).id
                 delete_table_not_in_metastore(schema_id, table_names, session=session)
+                if incremental:
+                    table_names = self._get_changed_table_names(
+                        schema_id, schema_name, table_names, session=session
+                    )
                 schema_tables += [
                     (schema_id, schema_name, table_name) for table_name in table_names
                 ]
@@ -161,63 +177,160 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
         gevent.joinall(greenlets)
 
     def _create_tables(self, schema_tables):
-        with DBSession() as session:
-            for (schema_id, schema_name, table) in schema_tables:
-                self._create_table_table(schema_id, schema_name, table, session=session)
+        # Committed and indexed a few tables at a time
+        commit_batch_size = self._get_parallelization_setting()["min_batch_size"]
+        for i in range(0, len(schema_tables), commit_batch_size):
+            tables = []
+            for (schema_id, schema_name, table_name) in schema_tables[
+                i : i + commit_batch_size
+            ]:
+                table_and_columns = self._get_table_and_columns_or_none(
+                    schema_name, table_name
+                )
+                if table_and_columns is not None:
+                    tables.append((schema_id, *table_and_columns))
+
+            with DBSession() as session:
+                table_ids = self._save_tables(tables, session=session)
+                # Index the whole batch with the bulk api
+                update_tables_by_ids(table_ids, session=session)
+
+    def _save_tables(self, tables, session=None) -> List[int]:
+        """Save the tables and commit them at once, the tables
+           that fail to be saved are logged and skipped
+
+        Arguments:
+            tables {List[Tuple[int, DataTable, List[DataColumn]]]} -- schema id,
+                table and columns of each table
+
+        Returns:
+            List[int] -- The ids of the saved tables
+        """
+        while True:
+            table_ids = []
+            failed_index = None
+            for index, (schema_id, table, columns) in enumerate(tables):
+                try:
+                    table_ids.append(
+                        self._save_table(schema_id, table, columns, session=session)
+                    )
+                except Exception:
+                    LOG.error(traceback.format_exc())
+                    failed_index = index
+                    break
+
+            if failed_index is None:
+                session.commit()
+                return table_ids
+
+            # Rolls back the whole batch, the other tables are saved again
+            session.rollback()
+            tables = tables[:failed_index] + tables[failed_index + 1 :]
 
     @with_session
-    def _create_table_table(self, schema_id, schema_name, table_name, session=None):
-        table = None
-        columns = None
+    def _create_table_table(
+        self, schema_id, schema_name, table_name, update_es=True, session=None
+    ):
+        table_and_columns = self._get_table_and_columns_or_none(schema_name, table_name)
+        if table_and_columns is None:
+            return
 
         try:
-            table, columns = self.get_table_and_columns(schema_name, table_name)
+            table_id = self._save_table(schema_id, *table_and_columns, session=session)
+            session.commit()
+            if update_es:
+                update_table_by_id(table_id, session=session)
+            return table_id
         except Exception:
+            session.rollback()
             LOG.error(traceback.format_exc())
 
+    def _get_table_and_columns_or_none(
+        self, schema_name, table_name
+    ) -> Optional[Tuple[DataTable, List[DataColumn]]]:
+        try:
+            table, columns = self.get_table_and_columns(schema_name, table_name)
+        except Exception:
+            LOG.error(traceback.format_exc())
+            return None
         if not table:
-            return
+            return None
+        return table, columns
 
-        try:
-            table_id = create_table(
-                name=table.name,
-                type=table.type,
-                owner=table.owner,
-                table_created_at=table.table_created_at,
-                table_updated_by=table.table_updated_by,
-                table_updated_at=table.table_updated_at,
-                data_size_bytes=table.data_size_bytes,
-                location=table.location,
-                column_count=len(columns),
-                schema_id=schema_id,
-                session=session,
-            ).id
-            create_table_information(
-                data_table_id=table_id,
-                latest_partitions=json.dumps((table.partitions or [])[-10:]),
-                earliest_partitions=json.dumps((table.partitions or [])[:10]),
-                hive_metastore_description=table.raw_description,
+    def _save_table(self, schema_id, table, columns, session=None) -> int:
+        """Save the table and its columns without committing them,
+           they are not indexed to elasticsearch either
+        """
+        table_id = create_table(
+            name=table.name,
+            type=table.type,
+            owner=table.owner,
+            table_created_at=table.table_created_at,
+            table_updated_by=table.table_updated_by,
+            table_updated_at=table.table_updated_at,
+            data_size_bytes=table.data_size_bytes,
+            location=table.location,
+            column_count=len(columns),
+            schema_id=schema_id,
+            commit=False,
+            session=session,
+        ).id
+        create_table_information(
+            data_table_id=table_id,
+            latest_partitions=json.dumps((table.partitions or [])[-10:]),
+            earliest_partitions=json.dumps((table.partitions or [])[:10]),
+            hive_metastore_description=table.raw_description,
+            session=session,
+        )
+        delete_column_not_in_metastore(
+            table_id, set(map(lambda c: c.name, columns)), session=session
+        )
+
+        for column in columns:
+            create_column(
+                name=column.name,
+                type=column.type,
+                comment=column.comment,
+                table_id=table_id,
+                commit=False,
                 session=session,
             )
-            delete_column_not_in_metastore(
-                table_id, set(map(lambda c: c.name, columns)), session=session
-            )
+        return table_id
 
-            for column in columns:
-                create_column(
-                    name=column.name,
-                    type=column.type,
-                    comment=column.comment,
-                    table_id=table_id,
-                    commit=False,
-                    session=session,
-                )
-            session.commit()
-            update_table_by_id(table_id, session=session)
-            return table_id
+    def _get_changed_table_names(
+        self, schema_id, schema_name, table_names, session=None
+    ) -> List[str]:
+        """Get the tables that are new, or updated in the metastore since
+           they were synced. Tables without update time are always changed.
+        """
+        try:
+            updated_at_by_name = self.get_tables_updated_at(schema_name, table_names)
         except Exception:
-            session.rollback()
             LOG.error(traceback.format_exc())
+            return table_names
+
+        synced_updated_at_by_name = {
+            table.name: table.table_updated_at
+            for table in get_table_by_schema_id(schema_id, session=session)
+        }
+        changed_table_names = []
+        for table_name in table_names:
+            updated_at = updated_at_by_name.get(table_name)
+            synced_updated_at = synced_updated_at_by_name.get(table_name)
+            if (
+                updated_at is None
+                or synced_updated_at is None
+                # Same conversion as create_table
+                or datetime.fromtimestamp(float(updated_at)) > synced_updated_at
+            ):
+                changed_table_names.append(table_name)
+
+        LOG.info(
+            "{} of {} tables changed in {}".format(
+                len(changed_table_names), len(table_names), schema_name
+            )
+        )
+        return changed_table_names
 
     @with_exception
     def _get_all_filtered_schema_names(self) -> List[str]:
@@ -279,6 +392,23 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
         """
         pass
 
+    def get_tables_updated_at(
+        self, schema_name: str, table_names: List[str]
+    ) -> Dict[str, int]:
+        """Override this to support incremental loads, get the last update
+           time of the tables without loading them. It should be the same
+           as the table_updated_at of get_table_and_columns.
+
+        Arguments:
+            schema_name {str}
+            table_names {List[str]}
+
+        Returns:
+            Dict[str, int] -- table name to its update time in UTC seconds,
+                              tables missing are always loaded
+        """
+        return {}
+
     @abstractclassmethod
     def get_metastore_params_template(self) -> AllFormField:
         """Override this to get the form field required for the metastore
@@ -349,4 +479,4 @@ def delete_column_not_in_metastore(table_id, column_names, session=None):
         if column.name not in column_names:
             delete_column(id=column.id, commit=False, session=session)
             LOG.info("deleted column %d" % column.id)
-    session.commit()
+    session.flush()
@@ -46,6 +46,20 @@ class GlueDataCatalogLoader(BaseMetastoreLoader):
     def get_all_table_names_in_schema(self, schema_name: str) -> List[str]:
         return self.glue_client.get_all_table_names(schema_name)
 
+    def get_tables_updated_at(
+        self, schema_name: str, table_names: List[str]
+    ) -> Dict[str, int]:
+        # Glue has no batch get of tables by name, listing the schema
+        # is a few paged calls instead of one call per table
+        table_names = set(table_names)
+        return {
+            glue_table.get("Name"): _get_glue_table_updated_at(glue_table)
+            for glue_table in self.glue_client.get_all_tables(schema_name).get(
+                "TableList"
+            )
+            if glue_table.get("Name") in table_names
+        }
+
     def get_table_and_columns(
         self, schema_name: str, table_name: str
     ) -> Tuple[DataTable, List[DataColumn]]:
@@ -65,9 +79,7 @@ class GlueDataCatalogLoader(BaseMetastoreLoader):
             table_created_at=int(
                 glue_table.get("CreateTime", datetime(1970, 1, 1)).timestamp()
             ),
-            table_updated_at=int(
-                glue_table.get("UpdateTime", datetime(1970, 1, 1)).timestamp()
-            ),
+            table_updated_at=_get_glue_table_updated_at(glue_table),
             location=glue_table.get("StorageDescriptor").get("Location"),
             partitions=partitions,
             raw_description=glue_table.get("Description"),
@@ -90,3 +102,7 @@ class GlueDataCatalogLoader(BaseMetastoreLoader):
     @staticmethod
     def _get_glue_data_catalog_client(catalog_id, region):
         return GlueDataCatalogClient(catalog_id, region)
+
+
+def _get_glue_table_updated_at(glue_table) -> int:
+    return int(glue_table.get("UpdateTime", datetime(1970, 1, 1)).timestamp())
@@ -10,6 +10,9 @@ from lib.metastore.base_metastore_loader import (
 )
 from lib.utils import json as ujson
 
+# Number of tables fetched at a time to get their update time
+TABLES_BATCH_SIZE = 100
+
 
 class HMSMetastoreLoader(BaseMetastoreLoader):
     def __init__(self, metastore_dict: Dict):
@@ -49,11 +52,6 @@ class HMSMetastoreLoader(BaseMetastoreLoader):
             self.hmc, schema_name, table_name
         )
 
-        last_modified_time = parameters.get("last_modified_time")
-        last_modified_time = (
-            int(last_modified_time) if last_modified_time is not None else None
-        )
-
         total_size = parameters.get("totalSize")
         total_size = int(total_size) if total_size is not None else None
 
@@ -63,7 +61,7 @@ class HMSMetastoreLoader(BaseMetastoreLoader):
             owner=description.owner,
             table_created_at=description.createTime,
             table_updated_by=parameters.get("last_modified_by"),
-            table_updated_at=last_modified_time,
+            table_updated_at=get_hive_metastore_table_updated_at(description),
             data_size_bytes=total_size,
             location=sd.location,
             partitions=partitions,
@@ -80,6 +78,19 @@ class HMSMetastoreLoader(BaseMetastoreLoader):
         )
         return table, columns
 
+    def get_tables_updated_at(
+        self, schema_name: str, table_names: List[str]
+    ) -> Dict[str, int]:
+        updated_at_by_name = {}
+        for start in range(0, len(table_names), TABLES_BATCH_SIZE):
+            for description in self.hmc.get_tables(
+                schema_name, table_names[start : start + TABLES_BATCH_SIZE]
+            ):
+                updated_at_by_name[
+                    description.tableName
+                ] = get_hive_metastore_table_updated_at(description)
+        return updated_at_by_name
+
     def _get_hmc(self, metastore_dict):
         return HiveMetastoreClient(hmss_ro_addrs=metastore_dict["metastore_params"])
 
@@ -92,6 +103,18 @@ def get_hive_metastore_table_description(hmc, db_name, table_name):
         return None
 
 
+def get_hive_metastore_table_updated_at(description):
+    """Latest of last_modified_time (set by ALTER TABLE)
+       and transient_lastDdlTime (set by any DDL)
+    """
+    parameters = description.parameters or {}
+    updated_at = parameters.get("last_modified_time")
+    ddl_time = parameters.get("transient_lastDdlTime")
+    if ddl_time is not None and (updated_at is None or int(ddl_time) > int(updated_at)):
+        updated_at = ddl_time
+    return int(updated_at) if updated_at is not None else None
+
+
 def get_hive_metastore_table_partitions(hmc, db_name, table_name):
     try:
         return hmc.get_partitions(db_name, table_name)
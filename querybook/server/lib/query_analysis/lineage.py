@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional, Set
 import sqlparse
 
 
@@ -88,6 +88,65 @@ def get_table_statement_type(query: str) -> List[str]:
     return statement_types
 
 
+def get_statement_dependencies(
+    statements: List[str], language=None
+) -> Optional[List[Set[int]]]:
+    """Find the earlier statements each statement has to wait for,
+       so the others can run at the same time. A statement depends on
+       an earlier one if either writes a table the other reads or writes.
+
+    Arguments:
+        statements {List[str]} -- The statements of the query, in order
+
+    Keyword Arguments:
+        language {str} -- The language of the query engine (default: {None})
+
+    Returns:
+        Optional[List[Set[int]]] -- The indexes of the statements each statement
+                                    depends on. None if a statement other than
+                                    SELECT and INSERT (ex. USE, SET, CREATE) might
+                                    change the session of the statements after it,
+                                    they must then run one after the other
+    """
+    # (tables written, tables read) per statement
+    table_access_per_statement = []
+    for statement in statements:
+        statement_types = get_table_statement_type(statement)
+        if not (
+            len(statement_types) == 1 and statement_types[0] in ("SELECT", "INSERT")
+        ):
+            return None
+
+        table_per_statement, lineage_per_statement = process_query(statement, language)
+        tables = set(table_per_statement[0])
+        lineage = lineage_per_statement[0]
+        if statement_types[0] == "SELECT":
+            table_access = (set(), tables)
+        elif len(lineage):
+            table_access = (
+                set(table_lineage["target"] for table_lineage in lineage),
+                set(table_lineage["source"] for table_lineage in lineage),
+            )
+        elif len(tables):
+            # Insert of values, every table found is written
+            table_access = (tables, set())
+        else:
+            # The tables are unknown
+            return None
+        table_access_per_statement.append(table_access)
+
+    dependencies = []
+    for index, (written, read) in enumerate(table_access_per_statement):
+        statement_dependencies = set()
+        for prev_index, (prev_written, prev_read) in enumerate(
+            table_access_per_statement[:index]
+        ):
+            if (prev_written & (read | written)) or (written & prev_read):
+                statement_dependencies.add(prev_index)
+        dependencies.append(statement_dependencies)
+    return dependencies
+
+
 def get_statement_placeholders(statement):
     """
     This function checks for table names that act as placeholders
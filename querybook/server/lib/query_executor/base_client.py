@@ -1,6 +1,6 @@
 from time import sleep
 from abc import ABCMeta, abstractmethod
-from typing import List, Any
+from typing import List, Any, Optional
 
 
 class ClientBaseClass(metaclass=ABCMeta):
@@ -12,6 +12,24 @@ class ClientBaseClass(metaclass=ABCMeta):
 
         pass
 
+    # The follow functions are optional overrides
+    def is_healthy(self) -> bool:
+        """Checked before reusing the client for another execution
+
+        Returns:
+            bool -- False if the connection is broken and the client
+                    should be replaced by a new one
+        """
+
+        return True
+
+    def close(self):
+        """Close the connection, called when the client is evicted
+           from the client pool
+        """
+
+        pass
+
 
 class CursorBaseClass(metaclass=ABCMeta):
     @abstractmethod
@@ -41,6 +59,13 @@ class CursorBaseClass(metaclass=ABCMeta):
     def get_columns(self) -> List[str]:
         pass
 
+    def close(self):
+        """Release the resources of the cursor on the engine, called before
+           the client is given back to the client pool
+        """
+
+        pass
+
     # The follow functions are optional overrides
     def get_n_rows(self, n: int) -> List[List[Any]]:
         """
@@ -82,6 +107,18 @@ class CursorBaseClass(metaclass=ABCMeta):
 
         return 0
 
+    @property
+    def poll_interval(self) -> Optional[float]:
+        """Some query engines wait on the server side until the
+           query state changes, so they can be polled again right away
+
+        Returns:
+            Optional[float] -- max seconds to wait before the next poll,
+                               None to let the executor decide
+        """
+
+        return None
+
     def get_logs(self) -> str:
         """Fetch the logs from the engine. Note that every time this
            function is called, it should return the logs after last
@@ -94,12 +131,22 @@ class CursorBaseClass(metaclass=ABCMeta):
         return ""
 
     # These functions are intended to use as is
-    def get_rows_iter(self, chunk_size: int = 10000):
+    def get_row_batches_iter(self, chunk_size: int = 10000):
+        """Creates a generator which yields the rows in batches
+           of at most chunk_size rows
+
+        Keyword Arguments:
+            chunk_size {int} -- max number of rows per batch (default: {10000})
+        """
         while True:
             rows = self.get_n_rows(chunk_size)
 
             if rows is None or len(rows) == 0:
                 break
+            yield rows
+
+    def get_rows_iter(self, chunk_size: int = 10000):
+        for rows in self.get_row_batches_iter(chunk_size):
             for row in rows:
                 yield row
 
@@ -1,10 +1,12 @@
 from abc import ABCMeta, abstractclassmethod
 import datetime
+from functools import reduce
 import time
-from typing import Union, List
+from typing import Dict, Union, List
 
 from app.db import DBSession
 from app.flask_app import socketio
+from env import QuerybookSettings
 
 
 from const.db import description_length
@@ -14,23 +16,56 @@ from const.query_execution import (
     QUERY_EXECUTION_NAMESPACE,
 )
 
+from clients.common import is_gevent_patched
 from lib.form import AllFormField
 from lib.logger import get_logger
+from lib.query_analysis.lineage import get_statement_dependencies
 from lib.query_executor.base_client import ClientBaseClass
+from lib.query_executor import log_buffer
+from lib.query_executor.client_pool import get_client_key, get_client_pool
+from lib.query_executor.poll_interval import BasePollInterval, get_poll_interval_class
 from lib.query_executor.utils import (
     spread_dict,
     merge_str,
     row_to_csv,
+    RowBatchCSVSerializer,
     parse_exception,
     format_if_internal_error_with_stack_trace,
 )
-from lib.result_store import GenericUploader
+from lib.result_store import GenericUploader, get_result_format
+from lib.result_store.budget import get_query_result_budget
+from lib.result_store.columnar import COLUMNAR_RESULT_FORMAT, ColumnarResultWriter
+from lib.result_store.result_stats import ResultStatsCollector
+from lib.result_store.row_index import RowOffsetIndex
 
 from logic import query_execution as qe_logic
 
 
 LOG = get_logger(__file__)
 
+# Number of columnar rows written between two yields to other greenlets
+UPLOAD_YIELD_ROWS = 10000
+
+
+def _yield_to_greenlets():
+    import gevent
+
+    gevent.sleep(0)
+
+
+# Logging variables kept for each running statement
+STATEMENT_VARIABLES = (
+    "_has_log",
+    "_log_cache",
+    "_meta_info",
+    "_percent_complete",
+    "_pending_logs",
+    "_pending_log_length",
+    "_pending_meta_info",
+    "_pending_percent_complete",
+    "_last_flush_time",
+)
+
 
 class QueryExecutorLogger(object):
     """This class is used to export data from query executor to redis/mysql/socketio
@@ -49,6 +84,11 @@ class QueryExecutorLogger(object):
         self._task_id = celery_task.request.id
 
         self.statement_execution_ids = []
+        # The statement the updates are for, see use_statement
+        self._statement_execution_id = None
+        self._running_statement_execution_ids = []
+        # Logging variables of the other running statements
+        self._statement_variables = {}
 
         self._query = query
         self._statement_ranges = statement_ranges
@@ -59,6 +99,9 @@ class QueryExecutorLogger(object):
         self._meta_info = None  # statement_urls
         self._percent_complete = 0  # percent_complete
         self._statement_progress = {}
+        self._reset_pending_update()
+        # Executions following this one, see _emit_statement_event
+        self._follower_ids = []
 
         # Connect to mysql db
         with DBSession() as session:
@@ -114,8 +157,40 @@ class QueryExecutorLogger(object):
         self._log_cache = ""  # [statement_logs]
         self._meta_info = ""  # statement_urls
         self._percent_complete = None  # percent_complete
+        self._reset_pending_update()
+
+    def _reset_pending_update(self):
+        # Statement updates are buffered and written together,
+        # see flush_statement_update
+        self._pending_logs = []
+        self._pending_log_length = 0
+        self._pending_meta_info = False
+        self._pending_percent_complete = False
+        self._last_flush_time = 0
+
+    def use_statement(self, statement_execution_id: int):
+        """When statements run in parallel, select the statement the next
+           updates are for. Each running statement has its own logs,
+           meta info and progress
+        """
+        if statement_execution_id == self._statement_execution_id:
+            return
+
+        self._save_statement_variables()
+        for name, value in self._statement_variables.pop(
+            statement_execution_id
+        ).items():
+            setattr(self, name, value)
+        self._statement_execution_id = statement_execution_id
+
+    def _save_statement_variables(self):
+        if self._statement_execution_id in self._running_statement_execution_ids:
+            self._statement_variables[self._statement_execution_id] = {
+                name: getattr(self, name) for name in STATEMENT_VARIABLES
+            }
 
     def on_statement_start(self, statement_index):
+        self._save_statement_variables()
         self.reset_logging_variables()
 
         statement_range = self._statement_ranges[statement_index]
@@ -129,83 +204,114 @@ class QueryExecutorLogger(object):
         ).to_dict()
         statement_execution_id = statement_execution["id"]
         self.statement_execution_ids.append(statement_execution_id)
+        self._statement_execution_id = statement_execution_id
+        self._running_statement_execution_ids.append(statement_execution_id)
 
-        socketio.emit(
-            "statement_start",
-            statement_execution,
-            namespace=QUERY_EXECUTION_NAMESPACE,
-            room=self._query_execution_id,
+        # Looked up once per statement rather than on every update, executions
+        # that start following mid statement get its updates from the next one
+        self._follower_ids = qe_logic.get_follower_query_execution_ids(
+            self._query_execution_id
         )
+        self._emit_statement_event("statement_start", statement_execution)
 
     def on_statement_update(
         self, log: str = "", meta_info: str = None, percent_complete=None,
     ):
-        statement_execution_id = self.statement_execution_ids[-1]
-
-        updated_meta_info = False
         if self._meta_info != meta_info:
             self._meta_info = meta_info
-            qe_logic.update_statement_execution(
-                statement_execution_id, meta_info=meta_info
-            )
-            updated_meta_info = True
+            self._pending_meta_info = True
 
-        has_log = len(log)
-        if has_log:
-            self._stream_log(statement_execution_id, log)
+        if len(log):
+            self._pending_logs.append(log)
+            self._pending_log_length += len(log)
 
-        percent_complete_change = (
-            percent_complete is not None and self._percent_complete != percent_complete
-        )
-        if percent_complete_change:
+        if percent_complete is not None and self._percent_complete != percent_complete:
             self._percent_complete = percent_complete
+            self._pending_percent_complete = True
 
-        if updated_meta_info or has_log or percent_complete_change:
-            statement_update_dict = {
-                "query_execution_id": self._query_execution_id,
-                "id": statement_execution_id,
-            }
+        flush_interval = QuerybookSettings.QUERY_EXECUTION_UPDATE_INTERVAL
+        if (
+            time.time() - self._last_flush_time >= flush_interval
+            or self._pending_log_length
+            >= QuerybookSettings.QUERY_EXECUTION_UPDATE_LOG_SIZE
+        ):
+            self.flush_statement_update()
+
+    def flush_statement_update(self):
+        """Write the buffered logs, meta info and progress of the running
+           statement in one transaction and send them in one socket event.
+           Called at most once per QUERY_EXECUTION_UPDATE_INTERVAL while
+           polling, and before the statement ends, is cancelled or fails
+        """
+        updated_meta_info = self._pending_meta_info
+        logs = self._pending_logs
+        percent_complete_change = self._pending_percent_complete
+        if not (updated_meta_info or len(logs) or percent_complete_change):
+            return
 
-            if updated_meta_info:
-                statement_update_dict["meta_info"] = meta_info
+        self._reset_pending_update()
+        self._last_flush_time = time.time()
+        statement_execution_id = self._statement_execution_id
 
-            if has_log:
-                statement_update_dict["log"] = [log]
+        if updated_meta_info or len(logs):
+            with DBSession() as session:
+                if updated_meta_info:
+                    qe_logic.update_statement_execution(
+                        statement_execution_id,
+                        meta_info=self._meta_info,
+                        commit=False,
+                        session=session,
+                    )
+                if len(logs):
+                    self._stream_log(
+                        statement_execution_id,
+                        reduce(merge_str, logs),
+                        session=session,
+                    )
+                session.commit()
 
-            if percent_complete_change:
-                statement_update_dict["percent_complete"] = percent_complete
-                self._statement_progress = {
-                    statement_execution_id: {"percent_complete": percent_complete,}
-                }
+        statement_update_dict = {
+            "query_execution_id": self._query_execution_id,
+            "id": statement_execution_id,
+        }
 
-                self.update_progress()
+        if updated_meta_info:
+            statement_update_dict["meta_info"] = self._meta_info
 
-            socketio.emit(
-                "statement_update",
-                statement_update_dict,
-                namespace=QUERY_EXECUTION_NAMESPACE,
-                room=self._query_execution_id,
-            )
+        if len(logs):
+            statement_update_dict["log"] = logs
+
+        if percent_complete_change:
+            statement_update_dict["percent_complete"] = self._percent_complete
+            self._statement_progress[statement_execution_id] = {
+                "percent_complete": self._percent_complete,
+            }
+
+            self.update_progress()
+
+        self._emit_statement_event("statement_update", statement_update_dict)
 
     def on_statement_end(self, cursor):
-        statement_execution_id = self.statement_execution_ids[-1]
+        self.flush_statement_update()
+        statement_execution_id = self._statement_execution_id
         qe_logic.update_statement_execution(
             statement_execution_id, status=StatementExecutionStatus.UPLOADING,
         )
-        socketio.emit(
+        self._emit_statement_event(
             "statement_update",
             {
                 "query_execution_id": self._query_execution_id,
                 "id": statement_execution_id,
                 "status": StatementExecutionStatus.UPLOADING,
             },
-            namespace=QUERY_EXECUTION_NAMESPACE,
-            room=self._query_execution_id,
         )
 
-        result_path, result_row_count = self._upload_query_result(
-            cursor, statement_execution_id
-        )
+        (
+            result_path,
+            result_row_count,
+            result_stats,
+            result_truncated,
+        ) = self._upload_query_result(cursor, statement_execution_id)
         upload_path, has_log = self._upload_log(statement_execution_id)
 
         statement_execution = qe_logic.update_statement_execution(
@@ -213,24 +319,23 @@ class QueryExecutorLogger(object):
             status=StatementExecutionStatus.DONE,
             completed_at=datetime.datetime.utcnow(),
             result_row_count=result_row_count,
+            result_stats=result_stats,
+            result_truncated=result_truncated,
             has_log=self._has_log,
             result_path=result_path,
             log_path=upload_path if has_log else None,
         ).to_dict()
 
-        self._statement_progress = {}
+        self._running_statement_execution_ids.remove(statement_execution_id)
+        self._statement_progress.pop(statement_execution_id, None)
         self.update_progress()
-        socketio.emit(
-            "statement_end",
-            statement_execution,
-            namespace=QUERY_EXECUTION_NAMESPACE,
-            room=self._query_execution_id,
-        )
+        self._emit_statement_event("statement_end", statement_execution)
 
     def on_cancel(self):
         utcnow = datetime.datetime.utcnow()
-        if len(self.statement_execution_ids) > 0:
-            statement_execution_id = self.statement_execution_ids[-1]
+        for statement_execution_id in list(self._running_statement_execution_ids):
+            self.use_statement(statement_execution_id)
+            self.flush_statement_update()
             upload_path, has_log = self._upload_log(statement_execution_id)
             qe_logic.update_statement_execution(
                 statement_execution_id,
@@ -263,9 +368,14 @@ class QueryExecutorLogger(object):
             else error_extracted
         )
 
+        running_statement_execution_ids = list(self._running_statement_execution_ids)
+        for statement_execution_id in running_statement_execution_ids:
+            self.use_statement(statement_execution_id)
+            self.flush_statement_update()
+
         with DBSession() as session:
-            if len(self.statement_execution_ids) > 0:
-                statement_execution_id = self.statement_execution_ids[-1]
+            for statement_execution_id in running_statement_execution_ids:
+                self.use_statement(statement_execution_id)
                 upload_path, has_log = self._upload_log(statement_execution_id)
 
                 qe_logic.update_statement_execution(
@@ -299,6 +409,25 @@ class QueryExecutorLogger(object):
                 room=self._query_execution_id,
             )
 
+    def _emit_statement_event(self, event: str, statement_execution: Dict):
+        """Send the statement event to the users of the query execution
+           and of the executions following it (see QUERY_EXECUTION_COALESCE),
+           for which the statement is shown as their own
+        """
+        socketio.emit(
+            event,
+            statement_execution,
+            namespace=QUERY_EXECUTION_NAMESPACE,
+            room=self._query_execution_id,
+        )
+        for follower_id in self._follower_ids:
+            socketio.emit(
+                event,
+                spread_dict(statement_execution, {"query_execution_id": follower_id}),
+                namespace=QUERY_EXECUTION_NAMESPACE,
+                room=follower_id,
+            )
+
     def update_progress(self):
         progress = spread_dict(
             self._statement_progress, {"total": len(self._statement_ranges),},
@@ -314,62 +443,133 @@ class QueryExecutorLogger(object):
         if (
             columns is None or len(columns) == 0
         ):  # No need to go through queries because no information
-            return None, rows_uploaded
+            return None, rows_uploaded, None, False
 
-        key = "querybook_temp/%s/result.csv" % str(statement_execution_id)
-        uploader = GenericUploader(key)
+        result_format = get_result_format()
+        key = "querybook_temp/%s/result.%s" % (
+            str(statement_execution_id),
+            result_format,
+        )
+        budget = get_query_result_budget()
+        uploader = GenericUploader(key, budget=budget)
         uploader.start()
 
-        uploader.write(row_to_csv(columns))
-        rows_uploaded += 1  # 1 row for the column
+        # In the gevent worker, other queries are polled while uploading
+        cooperative = is_gevent_patched()
+
+        # Computed from the uploaded rows, so they match the stored result
+        stats = (
+            ResultStatsCollector(columns, QuerybookSettings.RESULT_STATS_SAMPLE_SIZE)
+            if QuerybookSettings.RESULT_STATS
+            else None
+        )
 
-        for row in cursor.get_rows_iter():
-            did_upload = uploader.write(row_to_csv(row))
-            if not did_upload:
+        row_index = None
+        if result_format == COLUMNAR_RESULT_FORMAT:
+            writer = ColumnarResultWriter(uploader, columns)
+            rows_uploaded += 1  # 1 row for the column
+
+            for row in cursor.get_rows_iter():
+                if not budget.take_rows(1) or not writer.write_row(row):
+                    break
+                rows_uploaded += 1
+                if stats is not None:
+                    stats.add_row(row)
+                if cooperative and rows_uploaded % UPLOAD_YIELD_ROWS == 0:
+                    _yield_to_greenlets()
+            writer.close()
+        else:
+            # Byte offsets are recorded so pages of the result can be read
+            # without reading it from the start, except for compressed results
+            row_index = None if uploader.is_compressed else RowOffsetIndex()
+
+            def write_csv(data: str, num_rows: int) -> bool:
+                did_upload = uploader.write(data)
+                if did_upload and row_index is not None:
+                    row_index.add(data, num_rows)
+                return did_upload
+
+            write_csv(row_to_csv(columns), 1)
+            rows_uploaded += 1  # 1 row for the column
+
+            serializer = RowBatchCSVSerializer()
+            for rows in cursor.get_row_batches_iter():
+                num_rows = budget.take_rows(len(rows))
+                if num_rows < len(rows):
+                    rows = rows[:num_rows]
+
+                # Transposed once for both the serializer and the stats
+                batch_columns = list(zip(*rows))
+                did_upload = len(rows) == 0 or write_csv(
+                    serializer.serialize(rows, batch_columns), len(rows)
+                )
+                if did_upload:
+                    rows_uploaded += len(rows)
+                    if stats is not None:
+                        stats.add_rows(rows, batch_columns)
+                    if budget.exceeded:
+                        break
+                    if cooperative:
+                        _yield_to_greenlets()
+                    continue
+
+                # The batch does not fit, upload as many rows as possible
+                for row in rows:
+                    if not write_csv(row_to_csv(row), 1):
+                        break
+                    rows_uploaded += 1
+                    if stats is not None:
+                        stats.add_row(row)
                 break
-            rows_uploaded += 1
+
+        # The rest of the result would not be stored, so the engine
+        # can stop computing and sending it
+        if budget.exceeded:
+            self._cancel_truncated_cursor(cursor)
         uploader.end()
 
-        return uploader.upload_url, rows_uploaded
+        # Small results are read from the start anyway
+        if row_index is not None and len(row_index.entries) > 1:
+            try:
+                row_index.save(key)
+            except Exception as e:
+                # Pages are read from the start of the result without it
+                LOG.warning(f"Failed to upload the row index of {key}: {e}")
+
+        return (
+            uploader.upload_url,
+            rows_uploaded,
+            stats.to_dict() if stats is not None else None,
+            budget.exceeded,
+        )
 
-    def _upload_log(self, statement_execution_id: int):
-        db_read_limit = 50
-        db_read_offset = 0
+    def _cancel_truncated_cursor(self, cursor):
+        try:
+            cursor.cancel()
+        except Exception as e:
+            LOG.info("Failed to cancel the cursor of a truncated result: {}".format(e))
 
+    def _upload_log(self, statement_execution_id: int):
         try:
             self._stream_log(statement_execution_id, "", clear_cache=True)
 
-            logs = []
             has_log = False
             log_path = None
 
-            with DBSession() as session:
-                while True:
-                    log_rows = qe_logic.get_statement_execution_stream_logs(
-                        statement_execution_id,
-                        limit=db_read_limit,
-                        offset=db_read_offset,
-                        session=session,
-                    )
-
-                    logs += map(lambda log: log.log, log_rows)
-
-                    if len(log_rows) < db_read_limit:
-                        break
-                    db_read_offset += db_read_limit
-
-            if len(logs):
-                has_log = True
+            if self._has_log:
                 uri = f"querybook_temp/{statement_execution_id}/log.txt"
                 with GenericUploader(uri) as uploader:
                     log_path = uploader.upload_url
 
-                    for log in logs:
+                    for log in log_buffer.iter_buffered_statement_execution_logs(
+                        statement_execution_id
+                    ):
+                        has_log = True
                         did_upload = uploader.write(log)
                         if not did_upload:
                             break
-                qe_logic.delete_statement_execution_stream_log(
-                    statement_execution_id, session=session
+                log_buffer.delete_buffered_statement_execution_logs(
+                    statement_execution_id
                 )
             return log_path, has_log
         except Exception as e:
@@ -381,10 +581,14 @@ class QueryExecutorLogger(object):
             )
 
     def _stream_log(
-        self, statement_execution_id: int, log: str, clear_cache: bool = False
+        self,
+        statement_execution_id: int,
+        log: str,
+        clear_cache: bool = False,
+        session=None,
     ):
         """
-        Persists the log in DB that's over description_length
+        Buffers the log in redis in chunks of description_length
         for them to be read from frontend while query is running
 
         Arguments:
@@ -392,36 +596,53 @@ class QueryExecutorLogger(object):
             log {str} -- Incoming new log
 
         Keyword Arguments:
-            clear_cache {bool} -- [If true, will push all _log_cache into mysql DB] (default: {False})
+            clear_cache {bool} -- [If true, will push all _log_cache into redis] (default: {False})
+            session -- [If given, has_log is updated in it without committing] (default: {None})
         """
         merged_log = merge_str(self._log_cache, log)
-        created_log = False
+        log_chunks = []
         chunk_size = description_length
         cache_length = 0 if clear_cache else chunk_size
 
-        with DBSession() as session:
-            while len(merged_log) > cache_length:
-                size_of_chunk = min(len(merged_log), chunk_size)
+        while len(merged_log) > cache_length:
+            size_of_chunk = min(len(merged_log), chunk_size)
 
-                log_chunk = merged_log[:size_of_chunk]
-                qe_logic.create_statement_execution_stream_log(
-                    statement_execution_id, log_chunk, commit=False, session=session
-                )
-                created_log = True
-                merged_log = merged_log[size_of_chunk:]
+            log_chunks.append(merged_log[:size_of_chunk])
+            merged_log = merged_log[size_of_chunk:]
+        self._log_cache = merged_log
 
-            if not self._has_log and created_log:
-                qe_logic.update_statement_execution(
-                    statement_execution_id,
-                    has_log=True,
-                    log_path="stream://",
-                    session=session,
-                )
-                self._has_log = True
+        if not len(log_chunks):
+            return
 
-            session.commit()
+        try:
+            log_buffer.append_statement_execution_logs(
+                statement_execution_id, log_chunks
+            )
+        except Exception as e:
+            # The query keeps running, only its logs are lost
+            LOG.warning(f"Failed to buffer statement execution logs: {e}")
+            return
 
-        self._log_cache = merged_log
+        if not self._has_log:
+            qe_logic.update_statement_execution(
+                statement_execution_id,
+                has_log=True,
+                log_path="stream://",
+                commit=session is None,
+                session=session,
+            )
+            self._has_log = True
+
+
+class ParallelStatement(object):
+    """A statement running at the same time as others"""
+
+    def __init__(self, index: int, cursor, statement_execution_id: int):
+        self.index = index
+        self.cursor = cursor
+        self.statement_execution_id = statement_execution_id
+        self.completed = False
+        self.last_percent_complete = None
 
 
 class QueryExecutorBaseClass(metaclass=ABCMeta):
@@ -468,6 +689,13 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
     def LOGGER_CLASS(cls) -> QueryExecutorLogger:
         return QueryExecutorLogger
 
+    @classmethod
+    def POLL_INTERVAL_CLASS(cls) -> BasePollInterval:
+        """Decides how long to wait between polls, configured by
+           QUERY_EXECUTION_POLL_STRATEGY unless overridden
+        """
+        return get_poll_interval_class()
+
     @classmethod
     def match(cls, language: str, name: str) -> bool:
         if name != cls.EXECUTOR_NAME():
@@ -487,8 +715,10 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
         query: str,
         statement_ranges,
         client_setting,
+        language: str = None,
     ):
         self._query = query
+        self._language = language
 
         if self.SINGLE_QUERY_QUERY_ENGINE():
             self._statement_ranges = [[0, len(query)]]
@@ -508,6 +738,21 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
         self._client = None
         self._cursor = None
 
+        self._poll_interval = self.POLL_INTERVAL_CLASS()()
+        self._poll_progressed = False
+        self._last_percent_complete = None
+        # Number of times the engine was polled, logged once the query is done
+        self.poll_count = 0
+
+        # Independent statements run at the same time, each on its own
+        # cursor, when QUERY_EXECUTION_MAX_PARALLEL_STATEMENTS > 1
+        self._max_parallel_statements = (
+            QuerybookSettings.QUERY_EXECUTION_MAX_PARALLEL_STATEMENTS
+        )
+        self._statement_dependencies = None
+        self._running_statements = []  # List[ParallelStatement], in order
+        self._completed_statement_indexes = set()
+
     def __del__(self):
         del self._logger
         del self._cursor
@@ -518,14 +763,31 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
 
         self.status = QueryExecutionStatus.RUNNING
         self._current_query_index = 0
+        self._start_time = time.time()
+
+        if self._max_parallel_statements > 1 and len(self._statement_ranges) > 1:
+            # None if the statements share the session of the cursor (ex. USE)
+            self._statement_dependencies = get_statement_dependencies(
+                [
+                    self._query[statement_start:statement_end]
+                    for statement_start, statement_end in self._statement_ranges
+                ],
+                language=self._language,
+            )
+            if self.is_parallel:
+                # The statements are started by the poll right after
+                return
 
         # Connect to data client
         del self._cursor
         self._cursor = self._get_cursor()
 
-        self._start_time = time.time()
         self._run_next_statement()
 
+    @property
+    def is_parallel(self) -> bool:
+        return self._statement_dependencies is not None
+
     def poll(self):
         try:
             if self.status == QueryExecutionStatus.DELIVERED:
@@ -533,6 +795,10 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
             elif self.status != QueryExecutionStatus.RUNNING:
                 return
 
+            if self.is_parallel:
+                self._run_parallel_statements()
+                return
+
             current_statement_completed = self._is_statement_completed()
             # Completed
             if current_statement_completed:
@@ -549,11 +815,17 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
             self._handle_exception(e, stack_trace)
 
     def sleep(self):
-        # For the first 15 mins, we check every second
-        # Afterwards, check every 10 seconds
-        time_passed = time.time() - self._start_time  # unit in seconds
-        sleep_time = 1 if time_passed < 900 else 10
-        time.sleep(sleep_time)
+        sleep_time = self._poll_interval.next_interval(self._poll_progressed)
+
+        # The engine can tell when it is worth polling again
+        poll_interval_hint = (
+            self._cursor.poll_interval if self._cursor is not None else None
+        )
+        if poll_interval_hint is not None:
+            sleep_time = min(sleep_time, poll_interval_hint)
+
+        if sleep_time > 0:
+            time.sleep(sleep_time)
 
     @property
     def meta_info(self):
@@ -566,7 +838,9 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
         self.status = QueryExecutionStatus.CANCEL
         self._logger.on_cancel()
 
-        if self._current_query_index >= 0:
+        if self.is_parallel:
+            self._cancel_parallel_statements()
+        elif self._current_query_index >= 0:
             self._cursor.cancel()
 
     def _run_next_statement(self):
@@ -577,11 +851,82 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
             statement_start, statement_end = statement_range
 
             statement = self._query[statement_start:statement_end]
+            self._poll_interval.reset()
+            self._last_percent_complete = None
             self._execute(statement)
             self._current_query_index += 1
         else:
             self._on_query_completion()
 
+    def _run_parallel_statements(self):
+        """Used instead of _run_next_statement when statements run in
+           parallel. Poll the running statements, end the completed ones
+           in order, so the results are uploaded in order, and start the
+           next statements once the statements they depend on are completed
+        """
+        poll_progressed = False
+        for statement in self._running_statements:
+            if statement.completed:
+                continue
+
+            self._use_statement(statement)
+            statement.completed = self._is_statement_completed()
+            statement.last_percent_complete = self._last_percent_complete
+            poll_progressed = poll_progressed or self._poll_progressed
+            if statement.completed:
+                self._completed_statement_indexes.add(statement.index)
+        self._poll_progressed = poll_progressed
+
+        while len(self._running_statements) and self._running_statements[0].completed:
+            statement = self._running_statements[0]
+            self._use_statement(statement)
+            self._on_statement_completion()
+            self._running_statements.pop(0)
+            self._close_cursor(statement.cursor)
+            self._cursor = None
+
+        # Statements are started in order, so they are shown in order
+        while (
+            self._current_query_index < len(self._statement_ranges)
+            and len(self._running_statements) < self._max_parallel_statements
+            and self._statement_dependencies[self._current_query_index]
+            <= self._completed_statement_indexes
+        ):
+            self._start_parallel_statement()
+
+        if len(self._running_statements) == 0:
+            self._on_query_completion()
+
+    def _start_parallel_statement(self):
+        statement_index = self._current_query_index
+        self._logger.on_statement_start(statement_index)
+
+        statement = ParallelStatement(
+            statement_index,
+            self._get_cursor(),
+            self._logger.statement_execution_ids[-1],
+        )
+        self._running_statements.append(statement)
+        self._use_statement(statement)
+
+        statement_start, statement_end = self._statement_ranges[statement_index]
+        self._poll_interval.reset()
+        self._execute(self._query[statement_start:statement_end])
+        self._current_query_index += 1
+
+    def _use_statement(self, statement: "ParallelStatement"):
+        """Point the cursor and the logger to the statement, so
+           the executor methods can be used for each running statement
+        """
+        self._cursor = statement.cursor
+        self._last_percent_complete = statement.last_percent_complete
+        self._logger.use_statement(statement.statement_execution_id)
+
+    def _cancel_parallel_statements(self):
+        for statement in self._running_statements:
+            if not statement.completed:
+                statement.cursor.cancel()
+
     def _handle_exception(self, e, stack_trace: str):
         try:
             # Try our best to fetch logs again
@@ -591,6 +936,12 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
             # In case of failure just ignore
             pass
         finally:
+            if self.is_parallel:
+                try:
+                    self._cancel_parallel_statements()
+                except Exception:
+                    pass
+
             # Update logger
             error_type, error_str, error_extracted = self._parse_exception(e)
             self._logger.on_exception(
@@ -619,21 +970,54 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
 
     def _is_statement_completed(self):
         completed = self._cursor.poll()
+        self.poll_count += 1
+
+        log = self._get_logs()
+        percent_complete = self._cursor.percent_complete
+        self._poll_progressed = (
+            len(log) > 0 or percent_complete != self._last_percent_complete
+        )
+        self._last_percent_complete = percent_complete
 
         self._logger.on_statement_update(
-            log=self._get_logs(),
-            percent_complete=self._cursor.percent_complete,
-            meta_info=self.meta_info,
+            log=log, percent_complete=percent_complete, meta_info=self.meta_info,
         )
 
         return completed
 
     def _get_cursor(self):
         if self._client is None:
-            self._client = self._get_client(self._client_setting)
+            self._client = get_client_pool().acquire(
+                get_client_key(self._client_setting),
+                lambda: self._get_client(self._client_setting),
+            )
 
         return self._client.cursor()
 
+    def release_client(self):
+        """Give the client back to the client pool once the execution
+           is over, so the next execution can reuse its connection
+        """
+        cursors = [statement.cursor for statement in self._running_statements]
+        if self._cursor is not None and self._cursor not in cursors:
+            cursors.append(self._cursor)
+        for cursor in cursors:
+            self._close_cursor(cursor)
+        self._running_statements = []
+        self._cursor = None
+
+        if self._client is not None:
+            get_client_pool().release(
+                get_client_key(self._client_setting), self._client
+            )
+            self._client = None
+
+    def _close_cursor(self, cursor):
+        try:
+            cursor.close()
+        except Exception as e:
+            LOG.info("Failed to close query engine cursor: {}".format(e))
+
     def _get_logs(self):
         return self._cursor.get_logs()
 
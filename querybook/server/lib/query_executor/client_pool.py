@@ -0,0 +1,129 @@
+from collections import deque
+import hashlib
+import json
+from threading import Lock
+import time
+from typing import Callable, Dict, List
+
+from env import QuerybookSettings
+from lib.logger import get_logger
+from lib.query_executor.base_client import ClientBaseClass
+
+LOG = get_logger(__file__)
+
+
+def get_client_key(client_setting: Dict) -> str:
+    """Clients are shared by executions with the same client settings,
+       which include the engine params and the proxy user. So clients
+       made before an engine is updated are not reused
+    """
+    return hashlib.sha256(
+        json.dumps(client_setting, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class ClientPool(object):
+    """Keeps the engine clients of the worker process open between query
+       executions, so the next query with the same engine and user does not
+       have to connect again. A client is only used by one execution at a time
+    """
+
+    def __init__(self, max_size: int, idle_timeout: float):
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        # (key, client, released at), least recently released first
+        self._idle_clients = deque()
+        self._lock = Lock()
+
+    def acquire(
+        self, key: str, create_client: Callable[[], ClientBaseClass]
+    ) -> ClientBaseClass:
+        """Get an idle client of the key that is still healthy,
+           or a new client if there is none
+
+        Arguments:
+            key {str} -- from get_client_key
+            create_client {Callable[[], ClientBaseClass]} -- makes a new client
+
+        Returns:
+            ClientBaseClass -- must be given back with release
+        """
+        while True:
+            client = self._pop_idle_client(key)
+            if client is None:
+                return create_client()
+            if client.is_healthy():
+                return client
+            self._close_clients([client])
+
+    def release(self, key: str, client: ClientBaseClass):
+        """Keep the client for the next executions, the least recently
+           used clients are closed once there are more than max_size
+        """
+        if self._max_size <= 0:
+            self._close_clients([client])
+            return
+
+        with self._lock:
+            self._idle_clients.append((key, client, time.time()))
+            evicted_clients = self._evict_clients()
+        self._close_clients(evicted_clients)
+
+    def clear(self):
+        with self._lock:
+            clients = [client for _, client, _ in self._idle_clients]
+            self._idle_clients.clear()
+        self._close_clients(clients)
+
+    @property
+    def size(self) -> int:
+        return len(self._idle_clients)
+
+    def _pop_idle_client(self, key: str):
+        client = None
+        with self._lock:
+            evicted_clients = self._evict_clients()
+            # The most recently used client is the most likely to be alive
+            for index in range(len(self._idle_clients) - 1, -1, -1):
+                if self._idle_clients[index][0] == key:
+                    client = self._idle_clients[index][1]
+                    del self._idle_clients[index]
+                    break
+        self._close_clients(evicted_clients)
+        return client
+
+    def _evict_clients(self) -> List[ClientBaseClass]:
+        """Remove the clients over max size or idle for too long,
+           must be called with the lock held
+        """
+        now = time.time()
+        evicted_clients = []
+        while len(self._idle_clients) and (
+            len(self._idle_clients) > self._max_size
+            or now - self._idle_clients[0][2] > self._idle_timeout
+        ):
+            evicted_clients.append(self._idle_clients.popleft()[1])
+        return evicted_clients
+
+    def _close_clients(self, clients: List[ClientBaseClass]):
+        for client in clients:
+            try:
+                client.close()
+            except Exception as e:
+                LOG.info("Failed to close query engine client: {}".format(e))
+
+
+_client_pool = None
+_client_pool_lock = Lock()
+
+
+def get_client_pool() -> ClientPool:
+    """The pool is shared by the executions of the whole process"""
+    global _client_pool
+    with _client_pool_lock:
+        if _client_pool is None:
+            _client_pool = ClientPool(
+                max_size=QuerybookSettings.QUERY_ENGINE_CLIENT_POOL_SIZE,
+                idle_timeout=QuerybookSettings.QUERY_ENGINE_CLIENT_IDLE_TIMEOUT,
+            )
+    return _client_pool
@@ -109,6 +109,14 @@ class PrestoCursor(CursorBaseClass):
     def percent_complete(self):
         return self._percent_complete
 
+    @property
+    def poll_interval(self):
+        # Presto holds the request to nextUri until the query makes progress
+        # (up to a second), so the next poll can be sent right away
+        if self._cursor._nextUri is not None:
+            return 0
+        return None
+
     def _update_percent_complete(self, poll_result):
         stats = poll_result.get("stats", {})
         completed_splits = stats.get("completedSplits", 0)
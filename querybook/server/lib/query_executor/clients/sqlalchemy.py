@@ -5,12 +5,17 @@ from lib.query_executor.base_client import ClientBaseClass, CursorBaseClass
 
 class SqlAlchemyClient(ClientBaseClass):
     def __init__(self, connection_string=None, proxy_user=None, *args, **kwargs):
-        self._engine = sqlalchemy.create_engine(connection_string)
+        # The engine is kept by the client pool, the connections
+        # are checked since they may have been closed by the server
+        self._engine = sqlalchemy.create_engine(connection_string, pool_pre_ping=True)
         super(SqlAlchemyClient, self).__init__()
 
     def __del__(self):
         self._engine.dispose()
 
+    def close(self):
+        self._engine.dispose()
+
     def cursor(self) -> CursorBaseClass:
         return SqlAlchemyCursor(engine=self._engine)
 
@@ -20,8 +25,12 @@ class SqlAlchemyCursor(CursorBaseClass):
         self._connection = engine.connect()
 
     def __del__(self):
+        self.close()
+
+    def close(self):
         if self._connection:
             self._connection.close()
+            self._connection = None
 
     def run(self, query):
         self._cursor = self._connection.execute(sqlalchemy.sql.text(query))
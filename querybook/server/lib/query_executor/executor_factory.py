@@ -43,6 +43,7 @@ def _get_executor_params_and_engine(query_execution_id, celery_task, session=Non
                 **engine.get_engine_params(),
                 "proxy_user": user.username,
             },
+            "language": engine.language,
         },
         engine,
     )
@@ -67,12 +68,12 @@ def _get_query_execution_info(query_execution_id, session=None):
     uid = query_execution.uid
     engine_id = query_execution.engine_id
 
-    _assert_safe_query(query, engine_id, session=session)
+    assert_safe_query(query, engine_id, session=session)
     return query, statement_ranges, uid, engine_id
 
 
 @with_session
-def _assert_safe_query(query, engine_id, session=None):
+def assert_safe_query(query, engine_id, session=None):
     try:
         from lib.metastore.utils import MetastoreTableACLChecker
 
@@ -0,0 +1,95 @@
+"""Logs of running statements buffered in redis
+
+The logs are appended in chunks to a redis list per statement execution,
+so they can be read by the web servers while the query is running without
+writing rows to the database. Once the statement is done, they are uploaded
+to the result store and the list is deleted.
+
+The list keeps the last QUERY_EXECUTION_LOG_BUFFER_MAX_CHUNKS chunks, and
+expires if nothing is appended for QUERY_EXECUTION_LOG_BUFFER_TTL seconds
+(ex. the worker died before uploading the logs).
+"""
+from typing import Iterator, List
+
+from clients.redis_client import with_redis
+from env import QuerybookSettings
+from logic import query_execution as qe_logic
+
+# Number of chunks read at a time when the logs are uploaded
+LOG_BUFFER_READ_SIZE = 100
+
+
+def get_log_buffer_key(statement_execution_id: int) -> str:
+    return f"statement_execution_log/{statement_execution_id}"
+
+
+@with_redis
+def append_statement_execution_logs(
+    statement_execution_id: int, logs: List[str], redis_conn=None
+):
+    if not len(logs):
+        return
+
+    key = get_log_buffer_key(statement_execution_id)
+    with redis_conn.pipeline() as pipe:
+        pipe.rpush(key, *logs)
+        pipe.ltrim(key, -QuerybookSettings.QUERY_EXECUTION_LOG_BUFFER_MAX_CHUNKS, -1)
+        pipe.expire(key, QuerybookSettings.QUERY_EXECUTION_LOG_BUFFER_TTL)
+        pipe.execute()
+
+
+@with_redis
+def get_buffered_statement_execution_logs(
+    statement_execution_id: int, limit=100, from_end=False, redis_conn=None
+) -> List[str]:
+    key = get_log_buffer_key(statement_execution_id)
+    logs = (
+        redis_conn.lrange(key, -limit, -1)
+        if from_end
+        else redis_conn.lrange(key, 0, limit - 1)
+    )
+    return [log.decode("utf-8") for log in logs]
+
+
+@with_redis
+def iter_buffered_statement_execution_logs(
+    statement_execution_id: int, redis_conn=None
+) -> Iterator[str]:
+    key = get_log_buffer_key(statement_execution_id)
+    start = 0
+    while True:
+        logs = redis_conn.lrange(key, start, start + LOG_BUFFER_READ_SIZE - 1)
+        for log in logs:
+            yield log.decode("utf-8")
+        if len(logs) < LOG_BUFFER_READ_SIZE:
+            break
+        start += LOG_BUFFER_READ_SIZE
+
+
+@with_redis
+def delete_buffered_statement_execution_logs(
+    statement_execution_id: int, redis_conn=None
+):
+    redis_conn.delete(get_log_buffer_key(statement_execution_id))
+
+
+def get_statement_execution_stream_logs(
+    statement_execution_id: int, limit=100, from_end=False, session=None
+) -> List[str]:
+    """Get the logs of a statement that is still running
+
+    Statements started before the logs were buffered in redis
+    have them in the database instead
+    """
+    logs = get_buffered_statement_execution_logs(
+        statement_execution_id, limit=limit, from_end=from_end
+    )
+    if len(logs):
+        return logs
+
+    return [
+        log.log
+        for log in qe_logic.get_statement_execution_stream_logs(
+            statement_execution_id, limit=limit, from_end=from_end, session=session
+        )
+    ]
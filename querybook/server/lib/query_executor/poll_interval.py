@@ -0,0 +1,83 @@
+"""Strategies deciding how long the executor waits before polling
+   the query engine again
+"""
+from abc import ABCMeta, abstractmethod
+import time
+
+from env import QuerybookSettings
+
+
+class BasePollInterval(metaclass=ABCMeta):
+    def reset(self):
+        """Called when a statement starts running
+        """
+        pass
+
+    @abstractmethod
+    def next_interval(self, progressed: bool) -> float:
+        """Get the number of seconds to wait before the next poll
+
+        Arguments:
+            progressed {bool} -- If the last poll returned new logs or progress
+
+        Returns:
+            float -- the seconds to wait
+        """
+        raise NotImplementedError()
+
+
+class FixedPollInterval(BasePollInterval):
+    """Poll every second for the first 15 mins of the query,
+       then every 10 seconds
+    """
+
+    def __init__(self):
+        self._start_time = time.time()
+
+    def next_interval(self, progressed: bool) -> float:
+        time_passed = time.time() - self._start_time  # unit in seconds
+        return 1 if time_passed < 900 else 10
+
+
+class BackoffPollInterval(BasePollInterval):
+    """Poll right after the statement starts so short statements are done
+       quickly, then wait twice as long after each poll without progress.
+       Any new log or progress goes back to the min interval
+    """
+
+    def __init__(
+        self, min_interval: float = None, max_interval: float = None, factor: float = 2,
+    ):
+        self._min_interval = (
+            QuerybookSettings.QUERY_EXECUTION_MIN_POLL_INTERVAL
+            if min_interval is None
+            else min_interval
+        )
+        self._max_interval = (
+            QuerybookSettings.QUERY_EXECUTION_MAX_POLL_INTERVAL
+            if max_interval is None
+            else max_interval
+        )
+        self._factor = factor
+        self.reset()
+
+    def reset(self):
+        self._interval = self._min_interval
+
+    def next_interval(self, progressed: bool) -> float:
+        if progressed:
+            self._interval = self._min_interval
+
+        interval = self._interval
+        self._interval = min(self._interval * self._factor, self._max_interval)
+        return interval
+
+
+ALL_POLL_INTERVALS = {
+    "fixed": FixedPollInterval,
+    "backoff": BackoffPollInterval,
+}
+
+
+def get_poll_interval_class():
+    return ALL_POLL_INTERVALS[QuerybookSettings.QUERY_EXECUTION_POLL_STRATEGY]
@@ -1,4 +1,8 @@
+import csv
 import json
+from io import StringIO
+import math
+from typing import Any, List, Sequence
 
 import datetime
 from lib.utils.utils import DATE_STRING, DATETIME_STRING
@@ -74,6 +78,95 @@ def row_to_csv(row):
     return ",".join(output) + "\n"
 
 
+def _serialize_float(cell: float) -> str:
+    # Same as json.dumps except for NaN/Infinity
+    return float.__repr__(cell) if math.isfinite(cell) else json.dumps(cell)
+
+
+# Serializers that can be mapped over a column if every cell of the
+# column has the exact type, they give the same output as serialize_cell
+_COLUMN_SERIALIZER_BY_TYPE = {
+    int: int.__repr__,
+    float: _serialize_float,
+    datetime.datetime: DATETIME_STRING,
+    datetime.date: DATE_STRING,
+}
+
+
+def serialize_column(column: List[Any]) -> List[str]:
+    """Serialize the cells of a column, the cell types are checked once
+       for the whole column so homogeneous columns skip the per cell dispatch
+
+    Arguments:
+        column {List[Any]} -- cells of the same column
+
+    Returns:
+        List[str] -- serialized cells, same as calling serialize_cell on each
+    """
+    cell_types = set(map(type, column))
+    if len(cell_types) == 1:
+        cell_type = next(iter(cell_types))
+        if cell_type == str:
+            return column
+        if cell_type in _COLUMN_SERIALIZER_BY_TYPE:
+            return list(map(_COLUMN_SERIALIZER_BY_TYPE[cell_type], column))
+    return list(map(serialize_cell, column))
+
+
+class RowBatchCSVSerializer(object):
+    """Serialize rows into csv a batch at a time, the output is the same
+       as concatenating row_to_csv of each row.
+
+       Cells are serialized column by column and the escaping/joining is done
+       by the C implemented csv writer instead of per cell in python.
+    """
+
+    def __init__(self):
+        self._buffer = StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def serialize(
+        self, rows: List[List[Any]], columns: List[Sequence[Any]] = None
+    ) -> str:
+        """Serialize the rows
+
+        Arguments:
+            rows {List[List[Any]]} -- The rows of the batch
+
+        Keyword Arguments:
+            columns {List[Sequence[Any]]} -- The rows transposed, if they
+                                             are already (default: {None})
+
+        Returns:
+            str -- The csv of the rows
+        """
+        if len(rows) == 0:
+            return ""
+
+        if columns is None:
+            columns = zip(*rows)
+        serialized_columns = [serialize_column(list(column)) for column in columns]
+
+        # The csv writer quotes a row of a single empty cell ('""') so it is
+        # not read as a blank line, and skips rows without cells, while
+        # row_to_csv writes a blank line for both
+        if len(serialized_columns) == 0 or (
+            len(serialized_columns) == 1 and "" in serialized_columns[0]
+        ):
+            return "".join(map(row_to_csv, rows))
+
+        self._writer.writerows(zip(*serialized_columns))
+        output = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate(0)
+
+        # The csv writer does not quote carriage returns when the line
+        # terminator is "\n", fallback to the per row serializer for them
+        if "\r" in output:
+            return "".join(map(row_to_csv, rows))
+        return output
+
+
 def parse_exception(e):
     error_type = QueryExecutionErrorType.INTERNAL.value
     error_str = str(e)
@@ -1,30 +1,196 @@
-from typing import List
+from collections import deque
+from itertools import islice
+from typing import BinaryIO, Iterator, List, Optional, Union
 
 from .all_result_stores import ALL_RESULT_STORES
+from .budget import ResultBudget
+from .columnar import (
+    COLUMNAR_RESULT_FORMAT,
+    CSV_RESULT_FORMAT,
+    ColumnarResultReader,
+    is_columnar_path,
+)
+from .compression import get_compression, get_compression_by_path
+from .exc import UnknownResultColumns
+from .row_index import ROW_INDEX_INTERVAL, RowOffsetIndex
 from .stores.base_store import BaseReader, BaseUploader
+from clients.common import StreamChunkReader, is_gevent_patched
 from env import QuerybookSettings
 
+# Number of bytes held in memory at a time when streaming a result
+RAW_CHUNK_SIZE = 64 * 1024
+
+
+def get_result_format() -> str:
+    """The format to store query results in, columnar is only used
+       if the configured result store can upload bytes
+    """
+    uploader_cls = ALL_RESULT_STORES[QuerybookSettings.RESULT_STORE_TYPE].uploader
+    if (
+        QuerybookSettings.RESULT_STORE_FORMAT == COLUMNAR_RESULT_FORMAT
+        and uploader_cls.supports_binary
+    ):
+        return COLUMNAR_RESULT_FORMAT
+    return CSV_RESULT_FORMAT
+
+
+def project_csv_columns(
+    result: List[List[str]], columns: List[str] = None
+) -> List[List[str]]:
+    """Only keep the given columns of the csv whose first row is the header
+
+    Raises:
+        UnknownResultColumns -- If some columns are not in the header
+    """
+    if columns is None or not len(result):
+        return result
+
+    header = result[0]
+    unknown_columns = [column for column in columns if column not in header]
+    if len(unknown_columns):
+        raise UnknownResultColumns(unknown_columns)
+    column_indices = [header.index(column) for column in columns]
+    return [[row[index] for index in column_indices] for row in result]
+
+
+def _iter_stream_chunks(
+    streams: List[BinaryIO], chunk_size: int, cooperative: bool
+) -> Iterator[bytes]:
+    """Read the first stream chunk by chunk, all the streams are closed after"""
+    try:
+        while True:
+            chunk = streams[0].read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+            if cooperative:
+                import gevent
+
+                gevent.sleep(0)
+    finally:
+        for stream in streams:
+            stream.close()
+
+
+def _iter_columnar_chunks(
+    reader: ColumnarResultReader, chunk_size: int, cooperative: bool
+) -> Iterator[bytes]:
+    """Convert the columnar result to csv and group the lines into chunks"""
+    try:
+        lines = []
+        size = 0
+        for line in reader.iter_csv():
+            line = line.encode("utf-8")
+            lines.append(line)
+            size += len(line)
+            if size >= chunk_size:
+                yield b"".join(lines)
+                lines = []
+                size = 0
+                if cooperative:
+                    import gevent
+
+                    gevent.sleep(0)
+        if len(lines):
+            yield b"".join(lines)
+    finally:
+        reader.close()
+
+
+def _slice_chunks(
+    chunks: Iterator[bytes], skip: int = 0, limit: int = None
+) -> Iterator[bytes]:
+    """Drop the first skip bytes of the chunks and stop after limit bytes"""
+    try:
+        for chunk in chunks:
+            if skip:
+                skipped = min(skip, len(chunk))
+                chunk = chunk[skipped:]
+                skip -= skipped
+            if limit is not None:
+                chunk = chunk[:limit]
+                limit -= len(chunk)
+            if len(chunk):
+                yield chunk
+            if limit == 0:
+                break
+    finally:
+        chunks.close()
+
+
+def _get_num_bytes(data: Union[str, bytes]) -> int:
+    if isinstance(data, bytes) or data.isascii():
+        return len(data)
+    return len(data.encode("utf-8"))
+
 
 class GenericUploader(BaseUploader):
-    def __init__(self, uri):
+    def __init__(self, uri, budget: ResultBudget = None):
+        uploader_cls = ALL_RESULT_STORES[QuerybookSettings.RESULT_STORE_TYPE].uploader
+
+        # Compression needs the store to accept bytes, the compression
+        # extension is added to the uri so readers know how to decompress
+        self._compression = (
+            get_compression(QuerybookSettings.RESULT_STORE_COMPRESSION)
+            if uploader_cls.supports_binary
+            else None
+        )
+        if self._compression is not None:
+            uri += self._compression.extension
+        self._compressor = None
+
         self._uri = uri
         self._uri_with_store_type = "{}://{}".format(
             QuerybookSettings.RESULT_STORE_TYPE, uri
         )
-        self._uploader = ALL_RESULT_STORES[
-            QuerybookSettings.RESULT_STORE_TYPE
-        ].uploader(uri)
+        self._uploader = uploader_cls(uri)
+
+        # The stores do not check their size limit, so it is enforced here
+        # for every upload along with the limits of the given budget
+        self._budget = budget or ResultBudget()
+        self._budget.limit_bytes(uploader_cls.get_max_upload_size())
 
     def start(self) -> None:
         self._uploader.start()
+        if self._compression is not None:
+            self._compressor = self._compression.compressor()
 
-    def write(self, data: str) -> bool:
+    def write(self, data: Union[str, bytes]) -> bool:
+        if self._compressor is not None:
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            data = self._compressor.compress(data)
+            if not len(data):
+                return True
+
+        if not self._budget.take_bytes(_get_num_bytes(data)):
+            return False
         return self._uploader.write(data)
 
     def end(self):
+        if self._compressor is not None:
+            # Written even if over the budget, the rest of the
+            # compressed data would not be readable without it
+            compressed = self._compressor.flush()
+            if len(compressed):
+                self._uploader.write(compressed)
+            self._compressor = None
+
         self._uploader.end()
         self._uploader = None
 
+    @property
+    def supports_binary(self):
+        return self._uploader.supports_binary
+
+    @property
+    def budget(self) -> ResultBudget:
+        return self._budget
+
+    @property
+    def is_compressed(self):
+        return self._compression is not None
+
     @property
     def is_uploading(self):
         return self._uploader.is_uploading
@@ -35,29 +201,236 @@ class GenericUploader(BaseUploader):
 
 
 class GenericReader(BaseReader):
-    def __init__(self, uri: str):
+    def __init__(self, uri: str, cooperative: bool = None):
         store_type, uri_suffix = uri.split("://")
+        self._uri = uri
         self._reader = ALL_RESULT_STORES[store_type].reader(uri_suffix)
 
+        # In the web server, remote results are read through a stream on
+        # the gevent patched sockets that yields between chunks
+        self._cooperative = (
+            is_gevent_patched() if cooperative is None else cooperative
+        ) and self._reader.is_remote
+
+        # Columnar and compressed results are read through the binary stream,
+        # the columnar ones are converted on the fly for callers that expect csv
+        self._compression = get_compression_by_path(uri_suffix)
+        self._is_columnar = is_columnar_path(uri_suffix)
+        self._columnar_reader = None
+        self._chunk_reader = None
+
+    def _get_binary_stream(self):
+        stream = self._reader.get_binary_stream()
+        if self._compression is not None:
+            stream = self._compression.open_stream(stream)
+        return stream
+
     def start(self):
-        self._reader.start()
+        if self._is_columnar:
+            self._columnar_reader = ColumnarResultReader(self._get_binary_stream())
+        elif self._compression is not None:
+            self._chunk_reader = StreamChunkReader(
+                self._reader.get_binary_stream(),
+                self._compression.decompressor(),
+                cooperative=self._cooperative,
+            )
+        elif self._cooperative:
+            self._chunk_reader = StreamChunkReader(
+                self._reader.get_binary_stream(), cooperative=True
+            )
+        else:
+            self._reader.start()
+
+    def read_csv(
+        self, number_of_lines: int, columns: List[str] = None
+    ) -> List[List[str]]:
+        if self._is_columnar:
+            return self._columnar_reader.read_csv(number_of_lines, columns)
+
+        if self._chunk_reader is not None:
+            result = self._chunk_reader.read_csv(number_of_lines)
+        else:
+            result = self._reader.read_csv(number_of_lines)
+
+        return project_csv_columns(result, columns)
+
+    def read_csv_page(self, offset: int, limit: int) -> List[List[str]]:
+        """Read limit rows of the result starting from the offset-th row
+
+        Arguments:
+            offset {int} -- number of rows to skip, the header is not counted
+            limit {int} -- max number of rows to return
+
+        Returns:
+            List[List[str]] -- the column names followed by the rows of the page
+        """
+        if self._is_columnar:
+            return self._columnar_reader.read_csv_page(offset, limit)
+
+        try:
+            if self._compression is not None:
+                # Byte offsets into compressed results are meaningless,
+                # so skip through the decompressed rows instead
+                return self._read_csv_page_from(
+                    StreamChunkReader(
+                        self._reader.get_binary_stream(),
+                        self._compression.decompressor(),
+                        max_read_size=None,
+                        cooperative=self._cooperative,
+                    ),
+                    0,
+                    offset,
+                    limit,
+                )
+
+            # The header is row 0 of the index, the offset-th row is row offset + 1
+            row_index = (
+                RowOffsetIndex.load(self._uri)
+                if offset + 1 >= ROW_INDEX_INTERVAL
+                else None
+            ) or RowOffsetIndex()
+            indexed_row, byte_offset = row_index.lookup(offset + 1)
+            return self._read_csv_page_from(
+                StreamChunkReader(
+                    self._reader.get_binary_stream(byte_offset),
+                    max_read_size=None,
+                    cooperative=self._cooperative,
+                ),
+                indexed_row,
+                offset,
+                limit,
+            )
+        except NotImplementedError:
+            # The store can only be read from the start
+            result = self._reader.read_csv(offset + limit + 1)
+            return result[:1] + result[offset + 1 :]
 
-    def read_csv(self, number_of_lines: int) -> List[List[str]]:
-        return self._reader.read_csv(number_of_lines)
+    def _read_csv_page_from(
+        self, page_reader: StreamChunkReader, row: int, offset: int, limit: int
+    ) -> List[List[str]]:
+        """Read the page with a reader positioned at the start of the row-th row"""
+        try:
+            if row == 0:
+                header = page_reader.read_csv(1)
+                row = 1
+            else:
+                header_reader = StreamChunkReader(self._reader.get_binary_stream())
+                header = header_reader.read_csv(1)
+                header_reader.close()
+
+            deque(islice(page_reader.read_row(), offset + 1 - row), maxlen=0)
+            return header + page_reader.read_csv(limit)
+        finally:
+            page_reader.close()
 
     def read_lines(self, number_of_lines: int) -> List[str]:
+        if self._is_columnar:
+            return self._columnar_reader.read_lines(number_of_lines)
+        if self._chunk_reader is not None:
+            return self._chunk_reader.read_lines(number_of_lines)
         return self._reader.read_lines(number_of_lines)
 
     def read_raw(self) -> str:
+        if self._is_columnar:
+            return "".join(self._columnar_reader.iter_csv())
+        if self._compression is not None:
+            with self._get_binary_stream() as stream:
+                return stream.read().decode("utf-8")
         return self._reader.read_raw()
 
+    def get_raw_size(self) -> Optional[int]:
+        """Size in bytes of the csv streamed by iter_raw
+
+        Returns:
+            Optional[int] -- None if it cannot be known without converting the
+                             whole result (columnar or compressed results)
+                             or if the store cannot tell
+        """
+        if self._is_columnar or self._compression is not None:
+            return None
+        try:
+            return self._reader.get_size()
+        except NotImplementedError:
+            return None
+
+    def iter_raw(
+        self, offset: int = 0, end: int = None, chunk_size: int = RAW_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """Stream the result as csv bytes without reading it all in memory,
+           start() does not need to be called. The stored object is opened
+           before returning so a missing result raises right away
+
+        Arguments:
+            offset {int} -- the first byte of the csv to return
+            end {int} -- stop before this byte, the end of the csv if None
+            chunk_size {int} -- max number of bytes of each chunk
+
+        Returns:
+            Iterator[bytes] -- the chunks of the csv
+        """
+        limit = None if end is None else max(end - offset, 0)
+
+        if self._is_columnar:
+            chunks = _iter_columnar_chunks(
+                ColumnarResultReader(self._get_binary_stream()),
+                chunk_size,
+                self._cooperative,
+            )
+            return _slice_chunks(chunks, offset, limit)
+
+        if self._compression is not None:
+            # Byte offsets of the csv are only known after decompressing
+            raw_stream = self._reader.get_binary_stream()
+            chunks = _iter_stream_chunks(
+                [self._compression.open_stream(raw_stream), raw_stream],
+                chunk_size,
+                self._cooperative,
+            )
+            return _slice_chunks(chunks, offset, limit)
+
+        try:
+            chunks = _iter_stream_chunks(
+                [self._reader.get_binary_stream(offset)], chunk_size, self._cooperative
+            )
+            return _slice_chunks(chunks, 0, limit)
+        except NotImplementedError:
+            # The store can only read the whole result
+            self._reader.start()
+            raw = self._reader.read_raw().encode("utf-8")
+            chunks = (
+                raw[index : index + chunk_size]
+                for index in range(0, len(raw), chunk_size)
+            )
+            return _slice_chunks(chunks, offset, limit)
+
+    @property
+    def is_columnar(self):
+        return self._is_columnar
+
+    @property
+    def columnar_reader(self) -> ColumnarResultReader:
+        """Gives access to the typed values of a columnar result"""
+        return self._columnar_reader
+
     @property
     def has_download_url(self):
+        # The stored object is not csv, so it has to be converted
+        # by the server before being downloaded
+        if self._is_columnar:
+            return False
         return self._reader.has_download_url
 
     def get_download_url(self):
+        if self._is_columnar:
+            return None
         return self._reader.get_download_url()
 
     def end(self):
+        if self._columnar_reader is not None:
+            self._columnar_reader.close()
+            self._columnar_reader = None
+        if self._chunk_reader is not None:
+            self._chunk_reader.close()
+            self._chunk_reader = None
         self._reader.end()
         self._reader = None
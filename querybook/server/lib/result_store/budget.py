@@ -0,0 +1,74 @@
+"""Limits of the number of rows and bytes of an uploaded result
+
+Every upload goes through the budget of its GenericUploader, which is
+capped by the max size the result store can hold. Query results also
+have the RESULT_MAX_ROWS and RESULT_MAX_SIZE limits, so the executor can
+stop fetching rows from the engine as soon as the result is full.
+"""
+from env import QuerybookSettings
+
+
+def _min_limit(limit: int, other_limit: int) -> int:
+    """Smallest of the two limits, 0 means no limit"""
+    if limit <= 0:
+        return max(other_limit, 0)
+    if other_limit <= 0:
+        return limit
+    return min(limit, other_limit)
+
+
+class ResultBudget(object):
+    def __init__(self, max_rows: int = 0, max_bytes: int = 0):
+        """
+        Keyword Arguments:
+            max_rows {int} -- max number of rows, 0 for no limit (default: {0})
+            max_bytes {int} -- max number of bytes, 0 for no limit (default: {0})
+        """
+        self._max_rows = max(max_rows, 0)
+        self._max_bytes = max(max_bytes, 0)
+        self._num_rows = 0
+        self._num_bytes = 0
+        # Whether some rows or bytes did not fit
+        self.exceeded = False
+
+    @property
+    def num_rows(self) -> int:
+        return self._num_rows
+
+    @property
+    def num_bytes(self) -> int:
+        return self._num_bytes
+
+    def limit_bytes(self, max_bytes: int):
+        self._max_bytes = _min_limit(self._max_bytes, max_bytes)
+
+    def take_rows(self, num_rows: int) -> int:
+        """Count the rows that fit in the budget
+
+        Returns:
+            int -- how many of the num_rows fit
+        """
+        if self._max_rows > 0 and self._num_rows + num_rows > self._max_rows:
+            num_rows = self._max_rows - self._num_rows
+            self.exceeded = True
+        self._num_rows += num_rows
+        return num_rows
+
+    def take_bytes(self, num_bytes: int) -> bool:
+        """Count the bytes if they all fit in the budget
+
+        Returns:
+            bool -- False if they do not fit, in which case none is counted
+        """
+        if self._max_bytes > 0 and self._num_bytes + num_bytes > self._max_bytes:
+            self.exceeded = True
+            return False
+        self._num_bytes += num_bytes
+        return True
+
+
+def get_query_result_budget() -> ResultBudget:
+    return ResultBudget(
+        max_rows=QuerybookSettings.RESULT_MAX_ROWS,
+        max_bytes=QuerybookSettings.RESULT_MAX_SIZE,
+    )
@@ -0,0 +1,271 @@
+"""Columnar result format backed by the Arrow IPC stream format
+
+The result is stored as a schema followed by a sequence of record batches,
+so the writer only needs to hold one batch in memory and the reader can stop
+after the first few batches or materialize only the requested columns.
+"""
+from itertools import islice
+from typing import Any, Iterator, List, Sequence
+
+from lib.logger import get_logger
+from lib.query_executor.utils import row_to_csv, serialize_cell
+from lib.result_store.compression import get_compression_by_path
+from lib.result_store.exc import UnknownResultColumns
+
+LOG = get_logger(__file__)
+
+COLUMNAR_RESULT_FORMAT = "arrow"
+CSV_RESULT_FORMAT = "csv"
+DEFAULT_BATCH_SIZE = 10000
+
+
+def get_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise Exception(
+            "pyarrow is not installed. "
+            + "Please make sure it is installed "
+            + "to use the columnar result format"
+        )
+    return pyarrow
+
+
+def is_columnar_path(path: str) -> bool:
+    if path is None:
+        return False
+
+    compression = get_compression_by_path(path)
+    if compression is not None:
+        path = path[: -len(compression.extension)]
+    return path.endswith("." + COLUMNAR_RESULT_FORMAT)
+
+
+def _infer_column_type(pa, values: List[Any]):
+    """Pick the arrow type of a column from its first batch of values.
+       Null, nested and binary columns are kept as their serialized string
+       so that the csv view matches the csv result format.
+    """
+    try:
+        arrow_type = pa.array(values).type
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        return pa.string()
+
+    if (
+        pa.types.is_null(arrow_type)
+        or pa.types.is_nested(arrow_type)
+        or pa.types.is_binary(arrow_type)
+        or pa.types.is_large_binary(arrow_type)
+    ):
+        return pa.string()
+    return arrow_type
+
+
+def _to_arrow_array(pa, values: List[Any], arrow_type):
+    if arrow_type == pa.string():
+        values = [None if value is None else serialize_cell(value) for value in values]
+
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        # The engine returned a value that does not fit the type
+        # inferred from the first batch, null them out individually
+        converted = []
+        num_invalid = 0
+        for value in values:
+            try:
+                pa.array([value], type=arrow_type)
+                converted.append(value)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+                converted.append(None)
+                num_invalid += 1
+        LOG.warning(f"Dropped {num_invalid} values that are not {arrow_type}")
+        return pa.array(converted, type=arrow_type)
+
+
+class _BufferedSink(object):
+    """File-like sink handed to the arrow writer. The serialized bytes
+       are collected and forwarded to the uploader once per batch.
+    """
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+class ColumnarResultWriter(object):
+    def __init__(self, uploader, columns: List[str], batch_size=DEFAULT_BATCH_SIZE):
+        self._pa = get_pyarrow()
+        self._uploader = uploader
+        self._columns = [str(column) for column in columns]
+        self._batch_size = batch_size
+
+        self._rows = []
+        self._schema = None
+        self._writer = None
+        self._sink = _BufferedSink()
+        self._did_upload = True
+
+    def write_row(self, row: Sequence[Any]) -> bool:
+        """Buffer the row and upload it once a full batch is collected
+
+        Returns:
+            bool -- False if the uploader no longer accepts data
+        """
+        if not self._did_upload:
+            return False
+
+        self._rows.append(row)
+        if len(self._rows) >= self._batch_size:
+            self._flush()
+        return self._did_upload
+
+    def close(self):
+        self._flush(force=True)
+        if self._writer is not None:
+            self._writer.close()
+            self._upload(self._sink.pop())
+
+    def _flush(self, force=False):
+        if not self._did_upload or (not len(self._rows) and not force):
+            return
+
+        pa = self._pa
+        rows = self._rows
+        self._rows = []
+        columns_values = [
+            [row[index] for row in rows] for index in range(len(self._columns))
+        ]
+
+        if self._schema is None:
+            self._schema = pa.schema(
+                [
+                    (column, _infer_column_type(pa, values))
+                    for column, values in zip(self._columns, columns_values)
+                ]
+            )
+            self._writer = pa.ipc.new_stream(self._sink, self._schema)
+
+        if len(rows):
+            batch = pa.record_batch(
+                [
+                    _to_arrow_array(pa, values, field.type)
+                    for values, field in zip(columns_values, self._schema)
+                ],
+                schema=self._schema,
+            )
+            self._writer.write_batch(batch)
+        self._upload(self._sink.pop())
+
+    def _upload(self, data: bytes):
+        if len(data) and self._did_upload:
+            self._did_upload = self._uploader.write(data)
+
+
+class ColumnarResultReader(object):
+    def __init__(self, stream):
+        self._pa = get_pyarrow()
+        self._stream = stream
+        self._reader = self._pa.ipc.open_stream(stream)
+
+    @property
+    def columns(self) -> List[str]:
+        return self._reader.schema.names
+
+    def iter_rows(self, columns: List[str] = None) -> Iterator[List[Any]]:
+        """Yield the rows as python values, only the given columns are
+           converted if columns is provided
+        """
+        schema = self._reader.schema
+        column_indices = (
+            list(range(len(schema.names)))
+            if columns is None
+            else [schema.get_field_index(column) for column in columns]
+        )
+        if -1 in column_indices:
+            raise UnknownResultColumns(
+                [
+                    column
+                    for column, index in zip(columns, column_indices)
+                    if index == -1
+                ]
+            )
+
+        while True:
+            try:
+                batch = self._reader.read_next_batch()
+            except StopIteration:
+                break
+            except (OSError, self._pa.ArrowInvalid) as e:
+                # Happens when the upload was cut off in the middle of a batch
+                LOG.warning(f"Stopped reading truncated columnar result: {e}")
+                break
+
+            batch_columns = [
+                batch.column(index).to_pylist() for index in column_indices
+            ]
+            for row in zip(*batch_columns):
+                yield list(row)
+
+    def read_rows(self, number_of_rows: int = None, columns: List[str] = None):
+        rows = []
+        if number_of_rows is not None and number_of_rows <= 0:
+            return rows
+
+        for row in self.iter_rows(columns):
+            rows.append(row)
+            if number_of_rows is not None and len(rows) >= number_of_rows:
+                break
+        return rows
+
+    def read_csv(
+        self, number_of_lines: int = None, columns: List[str] = None
+    ) -> List[List[str]]:
+        """Same shape as reading the csv result, the first line is the column
+           names and every cell is serialized as a string
+        """
+        header = list(columns or self.columns)
+        number_of_rows = None if number_of_lines is None else number_of_lines - 1
+        return [header] + [
+            [serialize_cell(cell) for cell in row]
+            for row in self.read_rows(number_of_rows, columns)
+        ]
+
+    def read_csv_page(self, offset: int, limit: int) -> List[List[str]]:
+        """Same as read_csv but skips the first offset rows of the result"""
+        rows = islice(self.iter_rows(), offset, offset + limit)
+        return [list(self.columns)] + [
+            [serialize_cell(cell) for cell in row] for row in rows
+        ]
+
+    def iter_csv(self) -> Iterator[str]:
+        yield row_to_csv(self.columns)
+        for row in self.iter_rows():
+            yield row_to_csv(row)
+
+    def read_lines(self, number_of_lines: int = None) -> List[str]:
+        lines = []
+        for line in self.iter_csv():
+            if number_of_lines is not None and len(lines) >= number_of_lines:
+                break
+            lines.append(line[:-1])
+        return lines
+
+    def close(self):
+        close = getattr(self._stream, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,112 @@
+"""Compression of the objects written to the result store
+
+The compression of an object is identified by the extension of its path
+(ex. result.csv.gz), so objects uploaded before compression was enabled
+are still read as is.
+"""
+from abc import ABCMeta, abstractmethod
+import gzip
+from typing import BinaryIO, Optional
+import zlib
+
+
+class BaseCompression(metaclass=ABCMeta):
+    @property
+    @abstractmethod
+    def extension(self) -> str:
+        """Appended to the uri of the compressed object, ex. .gz"""
+        raise NotImplementedError()
+
+    @property
+    def content_encoding(self) -> Optional[str]:
+        """The HTTP Content-Encoding of the compressed object, None if
+           http clients cannot be expected to decode it
+        """
+        return None
+
+    @abstractmethod
+    def compressor(self):
+        """Return an object with compress(bytes) -> bytes and flush() -> bytes"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def decompressor(self):
+        """Return an object with decompress(bytes) -> bytes and flush() -> bytes"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def open_stream(self, stream: BinaryIO) -> BinaryIO:
+        """Wrap the compressed binary stream into a decompressed one"""
+        raise NotImplementedError()
+
+
+class GzipCompression(BaseCompression):
+    def __init__(self, level: int = 6):
+        self._level = level
+
+    @property
+    def extension(self):
+        return ".gz"
+
+    @property
+    def content_encoding(self):
+        return "gzip"
+
+    def compressor(self):
+        # wbits of 16 + MAX_WBITS writes the gzip header and trailer
+        return zlib.compressobj(self._level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def decompressor(self):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def open_stream(self, stream):
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+
+
+class ZstdCompression(BaseCompression):
+    def __init__(self, level: int = 3):
+        self._level = level
+
+    @property
+    def extension(self):
+        return ".zst"
+
+    def _get_zstandard(self):
+        try:
+            import zstandard
+        except ImportError:
+            raise Exception(
+                "zstandard is not installed. "
+                + "Please make sure it is installed "
+                + "to use zstd result store compression"
+            )
+        return zstandard
+
+    def compressor(self):
+        return self._get_zstandard().ZstdCompressor(level=self._level).compressobj()
+
+    def decompressor(self):
+        return self._get_zstandard().ZstdDecompressor().decompressobj()
+
+    def open_stream(self, stream):
+        return self._get_zstandard().ZstdDecompressor().stream_reader(stream)
+
+
+ALL_COMPRESSIONS = {
+    "gzip": GzipCompression(),
+    "zstd": ZstdCompression(),
+}
+
+
+def get_compression(name: str) -> Optional[BaseCompression]:
+    if name is None or name == "none":
+        return None
+    return ALL_COMPRESSIONS[name]
+
+
+def get_compression_by_path(path: str) -> Optional[BaseCompression]:
+    if path is not None:
+        for compression in ALL_COMPRESSIONS.values():
+            if path.endswith(compression.extension):
+                return compression
+    return None
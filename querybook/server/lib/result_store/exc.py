@@ -0,0 +1,11 @@
+from typing import List
+
+
+class UnknownResultColumns(ValueError):
+    """The requested columns are not in the header of the result"""
+
+    def __init__(self, unknown_columns: List[str]):
+        super(UnknownResultColumns, self).__init__(
+            "Unknown columns: {}".format(", ".join(unknown_columns))
+        )
+        self.unknown_columns = unknown_columns
@@ -0,0 +1,125 @@
+"""Shared cache of the parsed result previews of statement executions
+
+Results no longer change once the statement execution is done, so the parsed
+preview is kept in redis and shared by all web servers instead of being read
+from the result store every time the data doc is opened.
+
+The cache keeps at most RESULT_CACHE_MAX_ENTRIES previews, the least recently
+read ones are evicted first. Previews larger than RESULT_CACHE_MAX_ENTRY_SIZE
+bytes are not cached.
+"""
+import time
+from typing import Dict, List, Optional
+
+from clients.redis_client import with_redis
+from env import QuerybookSettings
+from lib.logger import get_logger
+from lib.utils import json
+
+LOG = get_logger(__file__)
+
+RESULT_CACHE_LRU_KEY = "result_cache/lru"
+RESULT_CACHE_HITS_KEY = "result_cache/hits"
+RESULT_CACHE_MISSES_KEY = "result_cache/misses"
+
+
+def get_result_cache_key(statement_execution_id: int) -> str:
+    return f"result_cache/statement_execution/{statement_execution_id}"
+
+
+def is_result_cache_enabled() -> bool:
+    return QuerybookSettings.RESULT_CACHE_MAX_ENTRIES > 0
+
+
+@with_redis
+def get_cached_result(
+    statement_execution_id: int, redis_conn=None
+) -> Optional[List[List[str]]]:
+    """Get the cached preview and mark it as recently used
+
+    Returns:
+        Optional[List[List[str]]] -- the preview, None if it is not cached
+    """
+    if not is_result_cache_enabled():
+        return None
+
+    try:
+        raw_result = redis_conn.get(get_result_cache_key(statement_execution_id))
+        with redis_conn.pipeline() as pipe:
+            if raw_result is None:
+                pipe.incr(RESULT_CACHE_MISSES_KEY)
+            else:
+                pipe.incr(RESULT_CACHE_HITS_KEY)
+                pipe.zadd(RESULT_CACHE_LRU_KEY, {statement_execution_id: time.time()})
+            pipe.execute()
+    except Exception as e:
+        # The cache is optional, the result store is read instead
+        LOG.warning(f"Failed to read result cache: {e}")
+        return None
+
+    return None if raw_result is None else json.loads(raw_result)
+
+
+@with_redis
+def cache_result(statement_execution_id: int, result: List[List[str]], redis_conn=None):
+    """Add the preview to the cache and evict the least recently used
+       previews if the cache is full
+    """
+    if not is_result_cache_enabled():
+        return
+
+    raw_result = json.dumps(result)
+    if len(raw_result) > QuerybookSettings.RESULT_CACHE_MAX_ENTRY_SIZE:
+        return
+
+    try:
+        with redis_conn.pipeline() as pipe:
+            pipe.set(get_result_cache_key(statement_execution_id), raw_result)
+            pipe.zadd(RESULT_CACHE_LRU_KEY, {statement_execution_id: time.time()})
+            pipe.zcard(RESULT_CACHE_LRU_KEY)
+            num_entries = pipe.execute()[-1]
+
+        num_evictions = num_entries - QuerybookSettings.RESULT_CACHE_MAX_ENTRIES
+        if num_evictions > 0:
+            evicted_ids = redis_conn.zrange(RESULT_CACHE_LRU_KEY, 0, num_evictions - 1)
+            with redis_conn.pipeline() as pipe:
+                pipe.zrem(RESULT_CACHE_LRU_KEY, *evicted_ids)
+                pipe.delete(
+                    *[
+                        get_result_cache_key(int(evicted_id))
+                        for evicted_id in evicted_ids
+                    ]
+                )
+                pipe.execute()
+    except Exception as e:
+        LOG.warning(f"Failed to write result cache: {e}")
+
+
+@with_redis
+def invalidate_cached_result(statement_execution_id: int, redis_conn=None):
+    if not is_result_cache_enabled():
+        return
+
+    with redis_conn.pipeline() as pipe:
+        pipe.delete(get_result_cache_key(statement_execution_id))
+        pipe.zrem(RESULT_CACHE_LRU_KEY, statement_execution_id)
+        pipe.execute()
+
+
+@with_redis
+def get_result_cache_stats(redis_conn=None) -> Dict:
+    with redis_conn.pipeline() as pipe:
+        pipe.get(RESULT_CACHE_HITS_KEY)
+        pipe.get(RESULT_CACHE_MISSES_KEY)
+        pipe.zcard(RESULT_CACHE_LRU_KEY)
+        hits, misses, num_entries = pipe.execute()
+
+    hits = int(hits or 0)
+    misses = int(misses or 0)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else None,
+        "entries": num_entries,
+        "max_entries": QuerybookSettings.RESULT_CACHE_MAX_ENTRIES,
+    }
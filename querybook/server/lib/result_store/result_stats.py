@@ -0,0 +1,228 @@
+"""Column statistics of a query result computed while it is uploaded
+
+The rows written to the result store are also added to the
+ResultStatsCollector, so the statistics cover the whole stored result
+instead of the preview shown in the browser, without reading it again.
+They are computed a batch of rows at a time, on the columns of the batch:
+
+- number of nulls
+- min and max, if the values of the column can be compared
+- approximate number of distinct values (HyperLogLog), only the distinct
+  values of each batch are hashed
+
+A uniform sample of the rows is kept as well (reservoir sampling).
+"""
+import math
+import random
+from typing import Any, Dict, List, Sequence
+
+# 2^12 registers, the distinct counts have a standard error of ~1.6%
+HLL_PRECISION = 12
+# Long strings are cut in the stats, they are only meant to be displayed
+MAX_STATS_VALUE_LENGTH = 200
+# Rows added one by one are buffered into batches of this size
+STATS_BATCH_SIZE = 1000
+
+_MASK_64 = (1 << 64) - 1
+
+
+def _hashable(value: Any) -> Any:
+    try:
+        hash(value)
+        return value
+    except TypeError:  # ex. arrays and maps returned by presto
+        return str(value)
+
+
+class HyperLogLog(object):
+    def __init__(self, precision: int = HLL_PRECISION):
+        self._precision = precision
+        self._num_registers = 1 << precision
+        self._rank_bits = 64 - precision
+        self._rank_mask = (1 << self._rank_bits) - 1
+        self._registers = bytearray(self._num_registers)
+
+    def add(self, value: Any):
+        self.add_values([value])
+
+    def add_values(self, values: Sequence[Any]):
+        try:
+            distinct_values = set(values)
+        except TypeError:
+            distinct_values = set(map(_hashable, values))
+
+        registers = self._registers
+        rank_bits = self._rank_bits
+        rank_mask = self._rank_mask
+        for h in map(hash, distinct_values):
+            # The hash of an int is the int itself, so its bits are mixed
+            # (splitmix64 finalizer, inlined) to be evenly spread over the registers
+            h = (h + 0x9E3779B97F4A7C15) & _MASK_64
+            h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & _MASK_64
+            h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & _MASK_64
+            h ^= h >> 31
+            index = h >> rank_bits
+            # Position of the first 1 bit in the rest of the hash
+            rank = rank_bits - (h & rank_mask).bit_length() + 1
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def count(self) -> int:
+        m = self._num_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self._registers)
+
+        # Few values, the empty registers give a better estimate
+        empty_registers = self._registers.count(0)
+        if estimate <= 2.5 * m and empty_registers > 0:
+            estimate = m * math.log(m / empty_registers)
+        return int(round(estimate))
+
+
+class ColumnStats(object):
+    __slots__ = ("null_count", "min", "max", "_comparable", "_distinct")
+
+    def __init__(self):
+        self.null_count = 0
+        self.min = None
+        self.max = None
+        self._comparable = True
+        self._distinct = HyperLogLog()
+
+    def add_values(self, values: Sequence[Any]):
+        non_null_values = [value for value in values if value is not None]
+        self.null_count += len(values) - len(non_null_values)
+        if not len(non_null_values):
+            return
+
+        self._distinct.add_values(non_null_values)
+        if self._comparable:
+            try:
+                batch_min = min(non_null_values)
+                batch_max = max(non_null_values)
+                if self.min is None or batch_min < self.min:
+                    self.min = batch_min
+                if self.max is None or batch_max > self.max:
+                    self.max = batch_max
+            except TypeError:
+                # Mixed types or values without order (ex. maps)
+                self._comparable = False
+                self.min = self.max = None
+
+    @property
+    def distinct_count(self) -> int:
+        return self._distinct.count()
+
+
+def _to_stats_value(value: Any) -> Any:
+    """Make the value serializable to json"""
+    if value is None or isinstance(value, (bool, int)):
+        return value
+    if isinstance(value, float):
+        return value if math.isfinite(value) else str(value)
+    value = value if isinstance(value, str) else str(value)
+    return value[:MAX_STATS_VALUE_LENGTH]
+
+
+class ResultStatsCollector(object):
+    def __init__(self, columns: List[str], sample_size: int, seed: int = None):
+        self._columns = columns
+        self._column_stats = [ColumnStats() for _ in columns]
+        self._num_rows = 0
+        self._pending_rows = []
+
+        self._sample_size = sample_size
+        self._sample = []
+        self._random = random.Random(seed)
+        # Once the sample is full, index of the next row to sample (Algorithm L)
+        self._next_sample_index = None
+        self._sample_weight = None
+
+    @property
+    def num_rows(self) -> int:
+        return self._num_rows + len(self._pending_rows)
+
+    def add_row(self, row: List[Any]):
+        self._pending_rows.append(row)
+        if len(self._pending_rows) >= STATS_BATCH_SIZE:
+            self._flush_pending_rows()
+
+    def add_rows(self, rows: List[List[Any]], columns: List[Sequence[Any]] = None):
+        """Add a batch of rows
+
+        Arguments:
+            rows {List[List[Any]]} -- The rows of the batch
+
+        Keyword Arguments:
+            columns {List[Sequence[Any]]} -- The rows transposed, if they
+                                             are already (default: {None})
+        """
+        self._flush_pending_rows()
+        if not len(rows):
+            return
+
+        if columns is None:
+            columns = list(zip(*rows))
+        for column_stats, values in zip(self._column_stats, columns):
+            column_stats.add_values(values)
+        self._sample_rows(rows)
+        self._num_rows += len(rows)
+
+    def _flush_pending_rows(self):
+        if len(self._pending_rows):
+            rows = self._pending_rows
+            self._pending_rows = []
+            self.add_rows(rows)
+
+    def _sample_rows(self, rows: List[List[Any]]):
+        # Every row read so far has the same chance to be in the sample,
+        # the random numbers are drawn per sampled row instead of per row
+        sample_size = self._sample_size
+        if sample_size <= 0:
+            return
+
+        start_index = self._num_rows
+        num_filled = min(max(sample_size - start_index, 0), len(rows))
+        self._sample.extend(rows[:num_filled])
+        if self._next_sample_index is None:
+            if len(self._sample) < sample_size:
+                return
+            self._sample_weight = 1.0
+            self._next_sample_index = start_index + num_filled - 1
+            self._skip_to_next_sample()
+
+        end_index = start_index + len(rows)
+        while self._next_sample_index < end_index:
+            self._sample[self._random.randrange(sample_size)] = rows[
+                self._next_sample_index - start_index
+            ]
+            self._skip_to_next_sample()
+
+    def _skip_to_next_sample(self):
+        self._sample_weight *= math.exp(
+            math.log(1.0 - self._random.random()) / self._sample_size
+        )
+        if self._sample_weight >= 1.0:
+            skip = 0
+        else:
+            skip = int(
+                math.log(1.0 - self._random.random()) / math.log1p(-self._sample_weight)
+            )
+        self._next_sample_index += skip + 1
+
+    def to_dict(self) -> Dict:
+        self._flush_pending_rows()
+        return {
+            "row_count": self._num_rows,
+            "columns": [
+                {
+                    "name": column,
+                    "null_count": column_stats.null_count,
+                    "min": _to_stats_value(column_stats.min),
+                    "max": _to_stats_value(column_stats.max),
+                    "distinct_count": column_stats.distinct_count,
+                }
+                for column, column_stats in zip(self._columns, self._column_stats)
+            ],
+            "sample": [list(map(_to_stats_value, row)) for row in self._sample],
+        }
@@ -0,0 +1,91 @@
+"""Sparse index from csv row number to byte offset of the stored result
+
+The index is built while the result is uploaded and uploaded to the
+result store next to the result, so it expires along with it. A page of
+rows deep into a result can then be read by seeking (or range requesting)
+close to it instead of reading the whole result from the start.
+"""
+import bisect
+import json
+from typing import List, Optional, Tuple
+
+from lib.logger import get_logger
+
+LOG = get_logger(__file__)
+
+# Min number of rows between two entries of the index
+ROW_INDEX_INTERVAL = 1000
+
+
+def get_row_index_uri(uri: str) -> str:
+    return f"{uri}.row_index"
+
+
+class RowOffsetIndex(object):
+    def __init__(self, entries: List[Tuple[int, int]] = None):
+        # List of (row number, byte offset) sorted by row number,
+        # row 0 is the header of the csv
+        self._entries = entries or [(0, 0)]
+        self._num_rows = 0
+        self._num_bytes = 0
+
+    @property
+    def entries(self) -> List[Tuple[int, int]]:
+        return self._entries
+
+    def add(self, data: str, num_rows: int):
+        """Add the offset of the next written csv data
+
+        Arguments:
+            data {str} -- the csv string written to the result store
+            num_rows {int} -- number of rows in data
+        """
+        last_row, _ = self._entries[-1]
+        if self._num_rows - last_row >= ROW_INDEX_INTERVAL:
+            self._entries.append((self._num_rows, self._num_bytes))
+
+        self._num_rows += num_rows
+        self._num_bytes += len(data) if data.isascii() else len(data.encode("utf-8"))
+
+    def lookup(self, row: int) -> Tuple[int, int]:
+        """Find the closest indexed row at or before row
+
+        Returns:
+            Tuple[int, int] -- the indexed row number and its byte offset
+        """
+        position = bisect.bisect_right(self._entries, (row, float("inf"))) - 1
+        return self._entries[max(position, 0)]
+
+    def save(self, key: str):
+        """Upload the index next to the result
+
+        Arguments:
+            key {str} -- the key the result was uploaded to
+        """
+        # Delaying this import to avoid circular depdendency
+        from lib.result_store import GenericUploader
+
+        with GenericUploader(get_row_index_uri(key)) as uploader:
+            uploader.write(json.dumps(self._entries))
+
+    @classmethod
+    def load(cls, uri: str) -> Optional["RowOffsetIndex"]:
+        """Load the index of the result
+
+        Arguments:
+            uri {str} -- the upload url of the result
+
+        Returns:
+            Optional[RowOffsetIndex] -- None if the result has no index
+        """
+        # Delaying this import to avoid circular depdendency
+        from lib.result_store import GenericReader
+
+        try:
+            with GenericReader(get_row_index_uri(uri), cooperative=False) as reader:
+                raw_entries = reader.read_raw()
+        except Exception as e:
+            # Small results are uploaded without an index
+            LOG.debug(f"No row index for {uri}: {e}")
+            return None
+        return cls([tuple(entry) for entry in json.loads(raw_entries)])
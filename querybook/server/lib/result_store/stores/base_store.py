@@ -1,15 +1,29 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import BinaryIO, List, Union
 
 
 class BaseUploader(ABC):
     """Base interface for result uploader
     """
 
+    # Whether or not write accepts bytes, which is required
+    # to store results in the columnar format
+    supports_binary = False
+
     @abstractmethod
     def __init__(self, uri: str):
         pass
 
+    @classmethod
+    def get_max_upload_size(cls) -> int:
+        """The max number of bytes the store can hold for one uri,
+           enforced by GenericUploader
+
+        Returns:
+            int -- the max size, 0 if there is no limit
+        """
+        return 0
+
     def __enter__(self):
         self.start()
         return self
@@ -28,11 +42,12 @@ class BaseUploader(ABC):
         pass
 
     @abstractmethod
-    def write(self, data: str) -> bool:
+    def write(self, data: Union[str, bytes]) -> bool:
         """Upload part of the string
 
         Arguments:
-            data {str} -- Part of the string to upload
+            data {Union[str, bytes]} -- Part of the string to upload,
+                                        bytes only if supports_binary
 
         Returns:
             bool -- Whether or not the upload was successful
@@ -48,6 +63,13 @@ class BaseUploader(ABC):
 
 
 class BaseReader(ABC):
+    """Base interface for result reader
+    """
+
+    # Whether the object is read over the network, if so the web server
+    # reads it through get_binary_stream so other requests are not held up
+    is_remote = False
+
     @abstractmethod
     def __init__(self, uri: str):
         pass
@@ -104,6 +126,28 @@ class BaseReader(ABC):
         """
         pass
 
+    def get_binary_stream(self, offset: int = 0) -> BinaryIO:
+        """Open the stored object as a binary file-like object,
+           used to read results stored in the columnar format
+           and to read pages of the result without reading it from the start
+
+        Arguments:
+            offset {int} -- the byte to start reading from
+
+        Returns:
+            BinaryIO -- object that supports read(size)
+        """
+        raise NotImplementedError()
+
+    def get_size(self) -> int:
+        """Get the size of the stored object in bytes, used to
+           serve byte ranges of the result when it is downloaded
+
+        Returns:
+            int -- the number of bytes of the stored object
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def end(self):
         """End the reading process
@@ -1,11 +1,13 @@
-from typing import List
+from io import BytesIO
+from typing import BinaryIO, List
 
 from env import QuerybookSettings
 from lib.result_store.stores.base_store import BaseReader, BaseUploader
 from logic.result_store import (
     get_key_value_store,
     create_key_value_store,
-    string_to_csv,
+    CSVRowSplitter,
+    rows_to_csv,
 )
 
 
@@ -29,10 +31,30 @@ class DBReader(BaseReader):
             self._text = ""
             return lines
 
+    def _get_first_n_rows(self, n: int) -> List[str]:
+        # Unlike lines, the end of a row can only be found by going
+        # through the text line by line
+        rows = []
+        splitter = CSVRowSplitter()
+        position = 0
+        text_len = len(self._text)
+        while len(rows) < n and position < text_len:
+            line_end = self._text.find("\n", position)
+            if line_end == -1:
+                line_end = text_len
+
+            row = splitter.add_line(self._text[position:line_end])
+            if row is not None:
+                rows.append(row)
+            position = line_end + 1
+
+        if len(rows) < n and splitter.incomplete_row is not None:
+            rows.append(splitter.incomplete_row)
+        self._text = self._text[position:]
+        return rows
+
     def read_csv(self, number_of_lines: int) -> List[List[str]]:
-        curr_lines = self._get_first_n_lines(number_of_lines)
-        raw_csv_str = "\n".join(curr_lines)
-        return string_to_csv(raw_csv_str)
+        return rows_to_csv(self._get_first_n_rows(number_of_lines))
 
     def read_lines(self, number_of_lines: int) -> List[str]:
         return self._get_first_n_lines(number_of_lines)
@@ -40,6 +62,16 @@ class DBReader(BaseReader):
     def read_raw(self) -> str:
         return self._text
 
+    def _get_value(self) -> bytes:
+        kvs = get_key_value_store(self._uri)
+        return kvs.value.encode("utf-8") if kvs else b""
+
+    def get_binary_stream(self, offset: int = 0) -> BinaryIO:
+        return BytesIO(self._get_value()[offset:])
+
+    def get_size(self) -> int:
+        return len(self._get_value())
+
     def end(self):
         self._text = ""
 
@@ -52,28 +84,25 @@ class DBReader(BaseReader):
 
 
 class DBUploader(BaseUploader):
+    # Only text is stored, so results are neither compressed nor
+    # columnar and are counted against DB_MAX_UPLOAD_SIZE as they are stored
     def __init__(self, uri: str):
         self._reset_variables()
         self._uri = uri
 
     def _reset_variables(self):
         self._chunks = []
-        self._chunks_length = 0
         self.is_uploading = False
 
+    @classmethod
+    def get_max_upload_size(cls) -> int:
+        return QuerybookSettings.DB_MAX_UPLOAD_SIZE
+
     def start(self):
         self._reset_variables()
         self.is_uploading = True
 
     def write(self, data: str) -> bool:
-        data_len = len(data)
-        if (
-            QuerybookSettings.DB_MAX_UPLOAD_SIZE > 0
-            and self._chunks_length + data_len > QuerybookSettings.DB_MAX_UPLOAD_SIZE
-        ):
-            return False
-
-        self._chunks_length += data_len
         self._chunks.append(data)
         return True
 
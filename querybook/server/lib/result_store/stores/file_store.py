@@ -1,5 +1,9 @@
 import csv
+from itertools import islice
 import os
+from typing import BinaryIO, Union
+
+from clients.common import FileDoesNotExist
 from lib.result_store.stores.base_store import BaseReader, BaseUploader
 from env import QuerybookSettings
 
@@ -13,30 +17,28 @@ FILE_STORE_PATH = "/opt/store/"
 
 
 class FileUploader(BaseUploader):
+    supports_binary = True
+
     def __init__(self, uri: str):
         self._uri = uri
         if not os.path.exists("{}querybook_temp".format(FILE_STORE_PATH)):
             os.makedirs("{}querybook_temp".format(FILE_STORE_PATH))
 
+    @classmethod
+    def get_max_upload_size(cls) -> int:
+        return QuerybookSettings.DB_MAX_UPLOAD_SIZE
+
     def start(self):
-        self._chunks_length = 0
+        # The log and the row index are uploaded next to the result
         os.makedirs(
-            "{}querybook_temp/{}".format(FILE_STORE_PATH, self._uri.split("/")[1])
+            "{}querybook_temp/{}".format(FILE_STORE_PATH, self._uri.split("/")[1]),
+            exist_ok=True,
         )
 
-    def write(self, data: str):
-        # write each line into csv
-        data_len = len(data)
-        if (
-            QuerybookSettings.DB_MAX_UPLOAD_SIZE > 0
-            and self._chunks_length + data_len > QuerybookSettings.DB_MAX_UPLOAD_SIZE
-        ):
-            return False
-
-        self._chunks_length += data_len
-        with open(self.uri, "a") as result_file:
-            writer = csv.writer(result_file, delimiter=",")
-            writer.writerow(data.split(","))
+    def write(self, data: Union[str, bytes]):
+        # data is already serialized as csv (or bytes if columnar)
+        with open(self.uri, "ab" if isinstance(data, bytes) else "a") as result_file:
+            result_file.write(data)
         return True
 
     def end(self):
@@ -55,9 +57,9 @@ class FileReader(BaseReader):
         pass
 
     def read_csv(self, number_of_lines: int):
-        with open(self.uri) as result_file:
+        with open(self.uri, newline="") as result_file:
             reader = csv.reader(result_file)
-            return list(reader)
+            return list(islice(reader, number_of_lines))
 
     def read_lines(self, number_of_lines: int):
         with open(self.uri) as result_file:
@@ -75,6 +77,16 @@ class FileReader(BaseReader):
         with open(self.uri) as result_file:
             return result_file.read()
 
+    def get_binary_stream(self, offset: int = 0) -> BinaryIO:
+        result_file = open(self.uri, "rb")
+        result_file.seek(offset)
+        return result_file
+
+    def get_size(self) -> int:
+        if not os.path.exists(self.uri):
+            raise FileDoesNotExist("{} does not exist".format(self.uri))
+        return os.path.getsize(self.uri)
+
     def end(self):
         pass
 
@@ -1,15 +1,20 @@
-from typing import List
+from typing import BinaryIO, List, Union
 
 from clients.google_client import (
     GoogleUploadClient,
     GoogleDownloadClient,
     GoogleKeySigner,
+    get_blob_size,
+    get_blob_stream,
 )
+from lib.result_store.compression import get_compression_by_path
 from lib.result_store.stores.base_store import BaseReader, BaseUploader
 from env import QuerybookSettings
 
 
 class GoogleUploader(BaseUploader):
+    supports_binary = True
+
     def __init__(self, uri: str):
         self._uri = uri
 
@@ -19,8 +24,8 @@ class GoogleUploader(BaseUploader):
         )
         self._uploader.start()
 
-    def write(self, data: str) -> bool:
-        self._uploader.write(data.encode())
+    def write(self, data: Union[str, bytes]) -> bool:
+        self._uploader.write(data.encode() if isinstance(data, str) else data)
         return True
 
     def end(self):
@@ -37,6 +42,8 @@ class GoogleUploader(BaseUploader):
 
 
 class GoogleReader(BaseReader):
+    is_remote = True
+
     def __init__(self, uri: str):
         self._uri = uri
         self._reader = None
@@ -53,15 +60,26 @@ class GoogleReader(BaseReader):
         return self._reader.read_lines(number_of_lines)
 
     def read_raw(self) -> str:
-        # TODO: implement read raw for Google reader
-        raise NotImplementedError()
+        stream = self.get_binary_stream()
+        try:
+            return stream.read().decode("utf-8")
+        finally:
+            stream.close()
+
+    def get_binary_stream(self, offset: int = 0) -> BinaryIO:
+        return get_blob_stream(QuerybookSettings.STORE_BUCKET_NAME, self.uri, offset)
+
+    def get_size(self) -> int:
+        return get_blob_size(QuerybookSettings.STORE_BUCKET_NAME, self.uri)
 
     def end(self):
         self._reader = None
 
     @property
     def has_download_url(self):
-        return True
+        # Signed urls cannot override the Content-Encoding, so compressed
+        # objects are decompressed by the server instead
+        return get_compression_by_path(self._uri) is None
 
     def get_download_url(self):
         key_signer = GoogleKeySigner(QuerybookSettings.STORE_BUCKET_NAME)
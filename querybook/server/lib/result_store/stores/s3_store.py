@@ -1,21 +1,39 @@
-from typing import List
+from typing import BinaryIO, List, Union
 
+from lib.result_store.compression import get_compression_by_path
 from lib.result_store.stores.base_store import BaseReader, BaseUploader
 from env import QuerybookSettings
-from clients.s3_client import MultiPartUploader, S3FileReader, S3KeySigner
+from clients.s3_client import (
+    MultiPartUploader,
+    S3FileReader,
+    S3KeySigner,
+    get_object_body,
+    get_object_size,
+)
 
 
 class S3Uploader(BaseUploader):
+    supports_binary = True
+
     def __init__(self, uri: str):
         self._uploader = None
         self._uri = uri
 
+    @classmethod
+    def get_max_upload_size(cls) -> int:
+        # Every part but the last is larger than the min chunk size,
+        # so a result of this size never needs more than the max parts
+        return (
+            QuerybookSettings.STORE_MIN_UPLOAD_CHUNK_SIZE
+            * QuerybookSettings.STORE_MAX_UPLOAD_CHUNK_NUM
+        )
+
     def start(self):
         self._uploader = MultiPartUploader(
             QuerybookSettings.STORE_BUCKET_NAME, self.uri
         )
 
-    def write(self, data: str) -> bool:
+    def write(self, data: Union[str, bytes]) -> bool:
         return self._uploader.write(data)
 
     def end(self):
@@ -32,6 +50,8 @@ class S3Uploader(BaseUploader):
 
 
 class S3Reader(BaseReader):
+    is_remote = True
+
     def __init__(self, uri: str):
         self._uri = uri
         self._reader = None
@@ -46,19 +66,36 @@ class S3Reader(BaseReader):
         return self._reader.read_lines(number_of_lines)
 
     def read_raw(self) -> str:
-        # TODO: implement read raw for s3 reader
-        raise NotImplementedError()
+        stream = self.get_binary_stream()
+        try:
+            return stream.read().decode("utf-8")
+        finally:
+            stream.close()
+
+    def get_binary_stream(self, offset: int = 0) -> BinaryIO:
+        return get_object_body(QuerybookSettings.STORE_BUCKET_NAME, self.uri, offset)
+
+    def get_size(self) -> int:
+        return get_object_size(QuerybookSettings.STORE_BUCKET_NAME, self.uri)
 
     def end(self):
         self._reader = None
 
     @property
     def has_download_url(self):
-        return True
+        # Compressed objects can only be downloaded directly
+        # if http clients can decode them
+        compression = get_compression_by_path(self._uri)
+        return compression is None or compression.content_encoding is not None
 
     def get_download_url(self):
+        params = {}
+        compression = get_compression_by_path(self._uri)
+        if compression is not None and compression.content_encoding is not None:
+            params["ResponseContentEncoding"] = compression.content_encoding
+
         key_signer = S3KeySigner(QuerybookSettings.STORE_BUCKET_NAME)
-        download_url = key_signer.generate_presigned_url(self.uri)
+        download_url = key_signer.generate_presigned_url(self.uri, params=params)
         return download_url
 
     @property
@@ -2,6 +2,7 @@ from app.db import with_session
 from logic.admin import get_query_engine_by_id
 from logic.user import get_user_by_id
 from lib.query_executor.all_executors import get_executor_class
+from lib.query_executor.client_pool import get_client_key, get_client_pool
 from lib.query_analysis import get_statements
 
 
@@ -47,12 +48,19 @@ class ExecuteQuery(object):
         if len(statements) == 0:
             return None  # Empty statement, return None
 
-        cursor = executor._get_client(client_settings).cursor()
+        client_key = get_client_key(client_settings)
+        client = get_client_pool().acquire(
+            client_key, lambda: executor._get_client(client_settings)
+        )
+        cursor = client.cursor()
         if self._async:
-            self._async_run(cursor, statements)
+            self._async_run(client_key, client, cursor, statements)
             return None
-        else:
+
+        try:
             return self._sync_run(cursor, statements)
+        finally:
+            release_client(client_key, client, cursor)
 
     def _sync_run(self, cursor, statements):
         for statement in statements[:-1]:
@@ -62,7 +70,9 @@ class ExecuteQuery(object):
         cursor.poll_until_finish()
         return cursor.get()
 
-    def _async_run(self, cursor, statements):
+    def _async_run(self, client_key, client, cursor, statements):
+        self._client_key = client_key
+        self._client = client
         self._cursor = cursor
         self._statements = statements
         self._set_async_parameters()
@@ -79,25 +89,31 @@ class ExecuteQuery(object):
         if self._cur_index >= len(self._statements):
             return True
 
-        # Start the query if progress is not set yet
-        if len(self._progress) <= self._cur_index:
-            self._cursor.run(self._statements[self._cur_index])
-            self._progress.append(0)
-
-        if self._cursor.poll():
-            # If finished, move to the next index
-            self._progress[self._cur_index] = 100
-            self._cur_index += 1
-        else:
-            # Update the running statement's progress
-            self._progress[self._cur_index] = self._cursor.percent_complete
+        try:
+            # Start the query if progress is not set yet
+            if len(self._progress) <= self._cur_index:
+                self._cursor.run(self._statements[self._cur_index])
+                self._progress.append(0)
+
+            if self._cursor.poll():
+                # If finished, move to the next index
+                self._progress[self._cur_index] = 100
+                self._cur_index += 1
+            else:
+                # Update the running statement's progress
+                self._progress[self._cur_index] = self._cursor.percent_complete
+
+            # If we reached the end of query
+            is_query_finished = self._cur_index == len(self._statements)
+            if is_query_finished:
+                # Populate the result of the last query
+                self._result = self._cursor.get()
+        except Exception as e:
+            self._release_client()
+            raise e
 
-        # If we reached the end of query
-        is_query_finished = self._cur_index == len(self._statements)
         if is_query_finished:
-            # Populate the result of the last query
-            self._result = self._cursor.get()
-
+            self._release_client()
         return is_query_finished
 
     @property
@@ -124,5 +140,18 @@ class ExecuteQuery(object):
         self._cur_index = 0
         self._result = None
 
+    def _release_client(self):
+        if self._client is not None:
+            release_client(self._client_key, self._client, self._cursor)
+            self._client = None
+
+
+def release_client(client_key, client, cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
+    get_client_pool().release(client_key, client)
+
 
 execute_query = ExecuteQuery(False)
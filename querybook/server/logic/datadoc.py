@@ -18,7 +18,7 @@ from models.datadoc import (
 )
 from models.access_request import AccessRequest
 from models.impression import Impression
-from tasks.sync_elasticsearch import sync_elasticsearch
+from tasks.sync_elasticsearch import queue_sync_elasticsearch
 
 cell_types = get_config_value("datadoc.cell_types")
 
@@ -153,6 +153,11 @@ def get_data_doc_by_id(id, session=None):
     return session.query(DataDoc).get(id)
 
 
+@with_session
+def get_data_docs_by_ids(ids, session=None):
+    return session.query(DataDoc).filter(DataDoc.id.in_(ids)).all()
+
+
 @with_session
 def get_data_doc_by_user(uid, environment_id, offset, limit, session=None):
     return (
@@ -939,4 +944,4 @@ def get_data_cells_executions(ids, session=None):
 
 
 def update_es_data_doc_by_id(id):
-    sync_elasticsearch.apply_async(args=[ElasticsearchItem.datadocs.value, id])
+    queue_sync_elasticsearch(ElasticsearchItem.datadocs.value, id)
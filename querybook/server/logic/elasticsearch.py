@@ -1,10 +1,15 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from html import escape
+from itertools import islice
 import math
 import re
+from typing import Dict, Iterable, List
 
 from const.impression import ImpressionItemType
 from env import QuerybookSettings
-from elasticsearch import Elasticsearch, RequestsHttpConnection
+from elasticsearch import Elasticsearch, RequestsHttpConnection, helpers
 
 from lib.utils.utils import (
     DATETIME_TO_UTC,
@@ -18,17 +23,22 @@ from app.db import with_session
 from logic.datadoc import (
     get_all_data_docs,
     get_data_doc_by_id,
+    get_data_docs_by_ids,
     get_data_doc_editors_by_doc_id,
 )
 from logic.metastore import (
-    get_all_table,
+    get_all_table_after_id,
     get_table_by_id,
+    get_tables_by_ids,
     get_table_query_samples_count,
+    get_tables_query_samples_count,
 )
 from logic.impression import (
     get_viewers_count_by_item_after_date,
+    get_viewers_count_by_items_after_date,
     get_last_impressions_date,
 )
+from logic.user import get_users_by_ids
 from models.user import User
 from models.datadoc import DataCellType
 
@@ -127,13 +137,11 @@ def datadocs_to_es(datadoc, session=None):
     return expand_datadoc
 
 
-@with_exception
-def _bulk_insert_datadocs():
+def _bulk_insert_datadocs(index_name=None):
     type_name = ES_CONFIG["datadocs"]["type_name"]
-    index_name = ES_CONFIG["datadocs"]["index_name"]
+    index_name = index_name or ES_CONFIG["datadocs"]["index_name"]
 
-    for datadoc in get_datadocs_iter():
-        _insert(index_name, type_name, datadoc["id"], datadoc)
+    _bulk_index(index_name, type_name, get_datadocs_iter())
 
 
 @with_exception
@@ -161,6 +169,28 @@ def update_data_doc_by_id(doc_id, session=None):
             LOG.error("failed to upsert {}. Will pass.".format(doc_id))
 
 
+@with_session
+def update_data_docs_by_ids(doc_ids: List[int], session=None):
+    """Bulk version of update_data_doc_by_id
+
+    Arguments:
+        doc_ids {List[int]} -- Ids of DataDoc
+
+    Keyword Arguments:
+        session -- Sqlalchemy DB session (default: {None})
+    """
+    _bulk_sync(
+        "datadocs",
+        doc_ids,
+        get_items=lambda ids: [
+            doc
+            for doc in get_data_docs_by_ids(ids, session=session)
+            if not doc.archived
+        ],
+        items_to_es=lambda docs: [datadocs_to_es(doc, session=session) for doc in docs],
+    )
+
+
 """
     TABLES
 """
@@ -168,19 +198,19 @@ def update_data_doc_by_id(doc_id, session=None):
 
 @with_session
 def get_tables_iter(batch_size=5000, session=None):
-    offset = 0
+    last_id = 0
 
     while True:
-        tables = get_all_table(limit=batch_size, offset=offset, session=session,)
-        LOG.info("\n--Table count: {}, offset: {}".format(len(tables), offset))
+        tables = get_all_table_after_id(
+            last_id=last_id, limit=batch_size, session=session
+        )
+        LOG.info("\n--Table count: {}, after id: {}".format(len(tables), last_id))
 
-        for table in tables:
-            expand_table = table_to_es(table, session=session)
-            yield expand_table
+        yield from tables_to_es(tables, session=session)
 
         if len(tables) < batch_size:
             break
-        offset += batch_size
+        last_id = tables[-1].id
 
 
 @with_session
@@ -205,14 +235,61 @@ def get_table_weight(table_id: int, session=None) -> int:
         session=session,
     )
     boost_score = get_table_by_id(table_id, session=session).boost_score
+    return _compute_table_weight(num_samples, num_impressions, boost_score)
 
+
+@with_session
+def get_tables_weight(tables, session=None) -> Dict[int, int]:
+    """Same as get_table_weight, for many tables with one query per
+       signal instead of three queries per table.
+
+    Arguments:
+        tables {List[DataTable]} -- The tables
+
+    Keyword Arguments:
+        session -- Sqlalchemy DB session (default: {None})
+
+    Returns:
+        Dict[int, int] -- Table id to its weight
+    """
+    table_ids = [table.id for table in tables]
+    if not len(table_ids):
+        return {}
+
+    samples_count = get_tables_query_samples_count(table_ids, session=session)
+    impressions_count = get_viewers_count_by_items_after_date(
+        ImpressionItemType.DATA_TABLE,
+        table_ids,
+        get_last_impressions_date(),
+        session=session,
+    )
+    return {
+        table.id: _compute_table_weight(
+            samples_count.get(table.id, 0),
+            impressions_count.get(table.id, 0),
+            table.boost_score,
+        )
+        for table in tables
+    }
+
+
+def _compute_table_weight(num_samples: int, num_impressions: int, boost_score) -> int:
     # Samples worth 10x as much as impression
     # Log the score to flatten the score distrution (since its power law distribution)
     return int(math.log2(((num_impressions + num_samples * 10) + 1) * boost_score))
 
 
 @with_session
-def table_to_es(table, session=None):
+def tables_to_es(tables, session=None) -> List[Dict]:
+    weights = get_tables_weight(tables, session=session)
+    return [
+        table_to_es(table, weight=weights[table.id], session=session)
+        for table in tables
+    ]
+
+
+@with_session
+def table_to_es(table, weight: int = None, session=None):
     schema = table.data_schema
 
     column_names = [c.name for c in table.columns]
@@ -225,7 +302,8 @@ def table_to_es(table, session=None):
     )
 
     full_name = "{}.{}".format(schema_name, table_name)
-    weight = get_table_weight(table.id, session=session)
+    if weight is None:
+        weight = get_table_weight(table.id, session=session)
 
     expand_table = {
         "id": table.id,
@@ -249,12 +327,11 @@ def table_to_es(table, session=None):
     return expand_table
 
 
-def _bulk_insert_tables():
+def _bulk_insert_tables(index_name=None):
     type_name = ES_CONFIG["tables"]["type_name"]
-    index_name = ES_CONFIG["tables"]["index_name"]
+    index_name = index_name or ES_CONFIG["tables"]["index_name"]
 
-    for table in get_tables_iter():
-        _insert(index_name, type_name, table["id"], table)
+    _bulk_index(index_name, type_name, get_tables_iter())
 
 
 @with_exception
@@ -280,6 +357,25 @@ def update_table_by_id(table_id, session=None):
             LOG.error("failed to upsert {}. Will pass.".format(table_id))
 
 
+@with_session
+def update_tables_by_ids(table_ids: List[int], session=None):
+    """Bulk version of update_table_by_id, used when many tables
+       change at once (ex. metastore load)
+
+    Arguments:
+        table_ids {List[int]} -- Ids of DataTable
+
+    Keyword Arguments:
+        session -- Sqlalchemy DB session (default: {None})
+    """
+    _bulk_sync(
+        "tables",
+        table_ids,
+        get_items=lambda ids: get_tables_by_ids(ids, session=session),
+        items_to_es=lambda tables: tables_to_es(tables, session=session),
+    )
+
+
 def delete_es_table_by_id(table_id,):
     type_name = ES_CONFIG["tables"]["type_name"]
     index_name = ES_CONFIG["tables"]["index_name"]
@@ -340,12 +436,11 @@ def get_users_iter(batch_size=5000, session=None):
         offset += batch_size
 
 
-def _bulk_insert_users():
+def _bulk_insert_users(index_name=None):
     type_name = ES_CONFIG["users"]["type_name"]
-    index_name = ES_CONFIG["users"]["index_name"]
+    index_name = index_name or ES_CONFIG["users"]["index_name"]
 
-    for user in get_users_iter():
-        _insert(index_name, type_name, user["id"], user)
+    _bulk_index(index_name, type_name, get_users_iter())
 
 
 @with_exception
@@ -373,6 +468,26 @@ def update_user_by_id(uid, session=None):
             LOG.error("failed to upsert {}. Will pass.".format(uid))
 
 
+@with_session
+def update_users_by_ids(uids: List[int], session=None):
+    """Bulk version of update_user_by_id
+
+    Arguments:
+        uids {List[int]} -- Ids of User
+
+    Keyword Arguments:
+        session -- Sqlalchemy DB session (default: {None})
+    """
+    _bulk_sync(
+        "users",
+        uids,
+        get_items=lambda ids: [
+            user for user in get_users_by_ids(ids, session=session) if not user.deleted
+        ],
+        items_to_es=lambda users: [user_to_es(user, session=session) for user in users],
+    )
+
+
 """
     Elastic Search Utils
 """
@@ -390,43 +505,256 @@ def _update(index_name, doc_type, id, content):
     get_hosted_es().update(index=index_name, doc_type=doc_type, id=id, body=content)
 
 
-def create_indices(*config_names):
-    es_configs = get_es_config_by_name(*config_names)
-    for es_config in es_configs:
-        get_hosted_es().indices.create(es_config["index_name"], es_config["mappings"])
+def _iter_chunks(items: Iterable, chunk_size: int) -> Iterable[List]:
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not len(chunk):
+            break
+        yield chunk
+
+
+def _bulk_chunk(actions: List[Dict]) -> int:
+    num_done = 0
+    for ok, result in helpers.streaming_bulk(
+        get_hosted_es(),
+        actions,
+        chunk_size=len(actions),
+        max_retries=QuerybookSettings.ELASTICSEARCH_BULK_MAX_RETRIES,
+        raise_on_error=False,
+    ):
+        # result is {op_type: {"_id": ..., "status": ..., "error": ...}}
+        op_type, op_result = next(iter(result.items()))
+        if ok or (op_type == "delete" and op_result.get("status") == 404):
+            num_done += 1
+        else:
+            LOG.error(
+                "failed to {} {}: {}".format(
+                    op_type, op_result.get("_id"), op_result.get("error")
+                )
+            )
+    return num_done
+
+
+def _bulk(actions: Iterable[Dict]) -> int:
+    """Send the actions with the _bulk api. They are sent in chunks of
+       ELASTICSEARCH_BULK_CHUNK_SIZE, ELASTICSEARCH_BULK_CONCURRENCY chunks
+       at a time. Actions rejected because elasticsearch is overloaded (429)
+       are retried with exponential backoff.
+
+    Arguments:
+        actions {Iterable[Dict]} -- Actions in the format of helpers.streaming_bulk
+
+    Returns:
+        int -- Number of actions done
+    """
+    chunk_size = max(QuerybookSettings.ELASTICSEARCH_BULK_CHUNK_SIZE, 1)
+    concurrency = max(QuerybookSettings.ELASTICSEARCH_BULK_CONCURRENCY, 1)
+
+    num_done = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # The docs are read from the db in this thread while the previous
+        # chunks are sent, up to 2 chunks per thread are kept in memory
+        futures = deque()
+        for chunk in _iter_chunks(actions, chunk_size):
+            if len(futures) >= concurrency * 2:
+                num_done += futures.popleft().result()
+            futures.append(executor.submit(_bulk_chunk, chunk))
+        for future in futures:
+            num_done += future.result()
+    return num_done
+
+
+def _bulk_index(index_name, doc_type, docs: Iterable[Dict], upsert=False) -> int:
+    """Index the docs with the _bulk api
+
+    Arguments:
+        index_name {str} -- Name of the index
+        doc_type {str} -- Type of the docs
+        docs {Iterable[Dict]} -- The docs, each with its "id"
+
+    Keyword Arguments:
+        upsert {bool} -- Update the existing docs instead of replacing them (default: {False})
+
+    Returns:
+        int -- Number of docs indexed
+    """
+    actions = (
+        {
+            "_op_type": "update",
+            "_index": index_name,
+            "_type": doc_type,
+            "_id": doc["id"],
+            "doc": doc,
+            "doc_as_upsert": True,
+        }
+        if upsert
+        else {"_index": index_name, "_type": doc_type, "_id": doc["id"], "_source": doc}
+        for doc in docs
+    )
+    num_indexed = _bulk(actions)
+    LOG.info("Indexed {} docs in {}".format(num_indexed, index_name))
+    return num_indexed
 
-    LOG.info("Inserting datadocs")
-    _bulk_insert_datadocs()
 
-    LOG.info("Inserting tables")
-    _bulk_insert_tables()
+def _bulk_delete(index_name, doc_type, ids: Iterable[int]) -> int:
+    """Delete the docs with the _bulk api, missing docs count as deleted
+
+    Returns:
+        int -- Number of docs deleted
+    """
+    return _bulk(
+        {"_op_type": "delete", "_index": index_name, "_type": doc_type, "_id": id}
+        for id in ids
+    )
+
+
+def _bulk_sync(config_name, ids: List[int], get_items, items_to_es, batch_size=1000):
+    """Upsert the items that exist and delete the others with the _bulk api
+
+    Arguments:
+        config_name {str} -- Name of the config in elasticsearch.yaml
+        ids {List[int]} -- Ids of the items
+        get_items {Callable[[List[int]], List]} -- Get the items of the ids
+            that exist and should be searchable, with one query
+        items_to_es {Callable[[List], List[Dict]]} -- Convert the items to docs
+    """
+    type_name = ES_CONFIG[config_name]["type_name"]
+    index_name = ES_CONFIG[config_name]["index_name"]
+    deleted_ids = []
+
+    def get_docs():
+        for start in range(0, len(ids), batch_size):
+            batch_ids = ids[start : start + batch_size]
+            items = get_items(batch_ids)
+            found_ids = set(item.id for item in items)
+            deleted_ids.extend(id for id in batch_ids if id not in found_ids)
+            yield from items_to_es(items)
+
+    _bulk_index(index_name, type_name, get_docs(), upsert=True)
+    if len(deleted_ids):
+        _bulk_delete(index_name, type_name, deleted_ids)
+
+
+"""
+    Index management
+
+    The index_name of each config is an alias of a versioned index, which
+    is what search reads and updates write to. Indices are rebuilt in a new
+    versioned index and the alias is swapped once it is loaded, so search
+    keeps working on the previous index during the rebuild.
+"""
 
-    LOG.info("Inserting users")
-    _bulk_insert_users()
+# Applied while an index is loaded, no replica to copy the docs to
+# and no refresh since nothing reads it yet
+BUILD_INDEX_SETTINGS = {"number_of_replicas": 0, "refresh_interval": "-1"}
+
+
+def _get_bulk_insert_function(type_name):
+    return {
+        "datadocs": _bulk_insert_datadocs,
+        "tables": _bulk_insert_tables,
+        "users": _bulk_insert_users,
+    }[type_name]
+
+
+def _get_alias_indices(alias_name) -> List[str]:
+    """Get the indices of the alias, empty if alias_name is not an alias"""
+    es = get_hosted_es()
+    if not es.indices.exists_alias(name=alias_name):
+        return []
+    return list(es.indices.get_alias(name=alias_name).keys())
+
+
+def _build_index(es_config) -> str:
+    """Create a new versioned index for the config and load all its docs
+
+    Arguments:
+        es_config {Dict} -- Config in elasticsearch.yaml
+
+    Returns:
+        str -- Name of the new index
+    """
+    es = get_hosted_es()
+    index_name = "{}_{}".format(
+        es_config["index_name"], datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    )
+    index_settings = es_config["mappings"].get("settings", {})
+    es.indices.create(
+        index_name,
+        {
+            **es_config["mappings"],
+            "settings": {**index_settings, **BUILD_INDEX_SETTINGS},
+        },
+    )
+
+    try:
+        LOG.info("Inserting {} in {}".format(es_config["type_name"], index_name))
+        _get_bulk_insert_function(es_config["type_name"])(index_name)
+
+        # Restore the settings of the config, None resets them to the default
+        es.indices.put_settings(
+            index=index_name,
+            body={
+                "index": {
+                    setting: index_settings.get(setting)
+                    for setting in BUILD_INDEX_SETTINGS
+                }
+            },
+        )
+        es.indices.refresh(index=index_name)
+    except Exception:
+        es.indices.delete(index_name)
+        raise
+    return index_name
+
+
+def _swap_alias(alias_name, index_name):
+    """Point the alias to index_name in one atomic update,
+       then delete the indices it pointed to
+    """
+    es = get_hosted_es()
+    old_indices = _get_alias_indices(alias_name)
+
+    actions = [{"add": {"index": index_name, "alias": alias_name}}]
+    if len(old_indices):
+        actions += [
+            {"remove": {"index": old_index, "alias": alias_name}}
+            for old_index in old_indices
+        ]
+    elif es.indices.exists(index=alias_name):
+        # Index created before the aliases were used, it has the
+        # name of the alias so it is removed in the same update
+        actions.append({"remove_index": {"index": alias_name}})
+    es.indices.update_aliases(body={"actions": actions})
+
+    for old_index in old_indices:
+        es.indices.delete(old_index)
+
+
+def create_indices(*config_names):
+    es_configs = get_es_config_by_name(*config_names)
+    for es_config in es_configs:
+        index_name = _build_index(es_config)
+        _swap_alias(es_config["index_name"], index_name)
 
 
 def create_indices_if_not_exist(*config_names):
     es_configs = get_es_config_by_name(*config_names)
     for es_config in es_configs:
         if not get_hosted_es().indices.exists(index=es_config["index_name"]):
-            get_hosted_es().indices.create(
-                es_config["index_name"], es_config["mappings"]
-            )
-            if es_config["type_name"] == "datadocs":
-                LOG.info("Inserting datadocs")
-                _bulk_insert_datadocs()
-            elif es_config["type_name"] == "tables":
-                LOG.info("Inserting tables")
-                _bulk_insert_tables()
-            elif es_config["type_name"] == "users":
-                LOG.info("Inserting users")
-                _bulk_insert_users()
+            index_name = _build_index(es_config)
+            _swap_alias(es_config["index_name"], index_name)
 
 
 def delete_indices(*config_names):
     es_configs = get_es_config_by_name(*config_names)
     for es_config in es_configs:
-        get_hosted_es().indices.delete(es_config["index_name"])
+        index_names = _get_alias_indices(es_config["index_name"]) or [
+            es_config["index_name"]
+        ]
+        for index_name in index_names:
+            get_hosted_es().indices.delete(index_name)
 
 
 def get_es_config_by_name(*config_names):
@@ -436,5 +764,8 @@ def get_es_config_by_name(*config_names):
 
 
 def recreate_indices(*config_names):
-    delete_indices(*config_names)
-    create_indices_if_not_exist(*config_names)
+    """Rebuild the indices without downtime, search reads the previous
+       indices until the new ones are loaded. Docs updated during the
+       rebuild may be stale in the new indices until their next update.
+    """
+    create_indices(*config_names)
@@ -19,7 +19,7 @@ from models.metastore import (
     DataTableColumnStatistics,
 )
 from models.query_execution import QueryExecution
-from tasks.sync_elasticsearch import sync_elasticsearch
+from tasks.sync_elasticsearch import queue_sync_elasticsearch
 
 
 @with_session
@@ -114,6 +114,25 @@ def get_all_table(offset=0, limit=100, session=None):
     return session.query(DataTable).offset(offset).limit(limit).all()
 
 
+@with_session
+def get_all_table_after_id(last_id=0, limit=100, session=None):
+    """Get the tables with an id greater than last_id, ordered by id.
+       Unlike offset, the cost of each page does not grow with the page number.
+    """
+    return (
+        session.query(DataTable)
+        .filter(DataTable.id > last_id)
+        .order_by(DataTable.id)
+        .limit(limit)
+        .all()
+    )
+
+
+@with_session
+def get_tables_by_ids(table_ids, session=None):
+    return session.query(DataTable).filter(DataTable.id.in_(table_ids)).all()
+
+
 @with_session
 def get_table_by_name(schema_name, name, metastore_id, session=None):
     """Get an table by its name"""
@@ -174,7 +193,8 @@ def create_table(
         "table_created_at": datetime.datetime.fromtimestamp(float(table_created_at))
         if table_created_at
         else None,
-        "table_updated_by": datetime.datetime.fromtimestamp(float(table_updated_at))
+        "table_updated_by": table_updated_by,
+        "table_updated_at": datetime.datetime.fromtimestamp(float(table_updated_at))
         if table_updated_at
         else None,
         "data_size_bytes": data_size_bytes,
@@ -730,6 +750,22 @@ def get_table_query_samples_count(table_id, session):
     return session.query(DataTableQueryExecution).filter_by(table_id=table_id).count()
 
 
+def get_tables_query_samples_count(table_ids, session):
+    """Get the query samples count of each table
+
+    Returns:
+        Dict[int, int] -- table id to count, tables without samples are not included
+    """
+    return dict(
+        session.query(
+            DataTableQueryExecution.table_id, func.count(DataTableQueryExecution.id)
+        )
+        .filter(DataTableQueryExecution.table_id.in_(table_ids))
+        .group_by(DataTableQueryExecution.table_id)
+        .all()
+    )
+
+
 """
     ---------------------------------------------------------------------------------------------------------
     ELASTICSEARCH
@@ -738,7 +774,7 @@ def get_table_query_samples_count(table_id, session):
 
 
 def update_es_tables_by_id(id):
-    sync_elasticsearch.apply_async(args=[ElasticsearchItem.tables.value, id])
+    queue_sync_elasticsearch(ElasticsearchItem.tables.value, id)
 
 
 """
@@ -1,11 +1,20 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+import hashlib
 
 from sqlalchemy.orm import joinedload
 from app.db import with_session
 from app.flask_app import celery
 
-from const.query_execution import QueryExecutionStatus, StatementExecutionStatus
+from const.query_execution import (
+    QueryExecutionCacheStatus,
+    QueryExecutionStatus,
+    StatementExecutionStatus,
+)
+from env import QuerybookSettings
 from lib.logger import get_logger
+from lib.query_analysis import get_statement_ranges, get_statements
+from lib.query_analysis.lineage import get_table_statement_type
+from lib.result_store.result_cache import invalidate_cached_result
 from models.query_execution import (
     QueryExecution,
     StatementExecution,
@@ -98,13 +107,67 @@ def create_query_execution(
     uid,
     task_id=None,
     status=QueryExecutionStatus.INITIALIZED,
+    cache_ttl=None,
     commit=True,
     session=None,
 ):
+    """Create a query execution to be run by run_query_task
+
+    Keyword Arguments:
+        cache_ttl {int} -- If given, reuse the result of the same query run
+                           by the user on the engine in the last cache_ttl
+                           seconds. The execution is then already DONE
+                           and must not be run (default: {None})
+
+    If QUERY_EXECUTION_COALESCE is enabled and the same read only query is
+    already running, the new execution follows it (leader_id) instead.
+    """
     query_execution = QueryExecution(
         query=query, engine_id=engine_id, uid=uid, task_id=task_id, status=status
     )
+
+    cache_ttl = min(cache_ttl or 0, QuerybookSettings.QUERY_EXECUTION_CACHE_MAX_TTL)
+    coalesce = QuerybookSettings.QUERY_EXECUTION_COALESCE and is_read_only_query(query)
+    if cache_ttl > 0 or coalesce:
+        query_execution.cache_key = get_query_execution_cache_key(query)
+
+    # Looked up before the new execution is added so it is not found
+    leader_query_execution = (
+        get_in_flight_query_execution(
+            query_execution.cache_key, engine_id, uid, session=session
+        )
+        if coalesce
+        else None
+    )
     session.add(query_execution)
+
+    if cache_ttl > 0:
+        cached_query_execution = get_cached_query_execution(
+            query_execution.cache_key, engine_id, uid, cache_ttl, session=session
+        )
+        if cached_query_execution is not None and not is_query_allowed(
+            query, engine_id, session=session
+        ):
+            # Run instead, so it fails with the error of the check like
+            # any other execution
+            cached_query_execution = None
+
+        if cached_query_execution is None:
+            query_execution.cache_status = QueryExecutionCacheStatus.MISS
+        else:
+            reuse_query_execution_result(
+                query_execution, cached_query_execution, session=session
+            )
+            query_execution.cache_status = QueryExecutionCacheStatus.HIT
+            query_execution.cached_from_id = cached_query_execution.id
+
+    if (
+        leader_query_execution is not None
+        and query_execution.status != QueryExecutionStatus.DONE
+    ):
+        # Followed by run_query_task instead of being run
+        query_execution.leader_id = leader_query_execution.id
+
     if commit:
         session.commit()
     else:
@@ -114,6 +177,144 @@ def create_query_execution(
     return query_execution
 
 
+def get_query_execution_cache_key(query: str) -> str:
+    """Queries with the same statements, ignoring comments
+       and whitespaces, have the same cache key
+    """
+    normalized_query = ";\n".join(get_statements(query))
+    return hashlib.sha256(normalized_query.encode("utf-8")).hexdigest()
+
+
+@with_session
+def get_cached_query_execution(cache_key, engine_id, uid, cache_ttl, session=None):
+    """Get the most recent execution of the query that actually ran and
+       completed in the last cache_ttl seconds. Only the executions of the
+       same user are reused since the engine can run the queries as the
+       user (ex. proxy user)
+    """
+    return (
+        session.query(QueryExecution)
+        .filter(QueryExecution.cache_key == cache_key)
+        .filter(QueryExecution.engine_id == engine_id)
+        .filter(QueryExecution.uid == uid)
+        .filter(QueryExecution.status == QueryExecutionStatus.DONE)
+        .filter(QueryExecution.cache_status == QueryExecutionCacheStatus.MISS)
+        .filter(
+            QueryExecution.completed_at
+            >= datetime.utcnow() - timedelta(seconds=cache_ttl)
+        )
+        .order_by(QueryExecution.id.desc())
+        .first()
+    )
+
+
+@with_session
+def is_query_allowed(query, engine_id, session=None) -> bool:
+    """Check the query like run_query_task does before running it (ex. the
+       table ACL of the metastore), since it may have changed after the
+       results were cached
+    """
+    # Delaying this import to avoid circular depdendency
+    from lib.query_executor.exc import InvalidQueryExecution
+    from lib.query_executor.executor_factory import assert_safe_query
+
+    try:
+        assert_safe_query(query, engine_id, session=session)
+    except InvalidQueryExecution:
+        return False
+    return True
+
+
+def is_read_only_query(query: str) -> bool:
+    statement_types = get_table_statement_type(query)
+    return len(statement_types) > 0 and all(
+        statement_type == "SELECT" for statement_type in statement_types
+    )
+
+
+@with_session
+def get_in_flight_query_execution(cache_key, engine_id, uid, session=None):
+    """Get the execution of the same query by the same user that is not
+       done yet, so the new one can follow it instead of running the query
+       again. Executions of other users are not followed since engines can
+       run the queries as the user (ex. proxy_user of presto), with their
+       own access to the data.
+    """
+    return (
+        session.query(QueryExecution)
+        .filter(QueryExecution.cache_key == cache_key)
+        .filter(QueryExecution.engine_id == engine_id)
+        .filter(QueryExecution.uid == uid)
+        .filter(QueryExecution.leader_id.is_(None))
+        .filter(
+            QueryExecution.status.in_(
+                [
+                    QueryExecutionStatus.INITIALIZED,
+                    QueryExecutionStatus.DELIVERED,
+                    QueryExecutionStatus.RUNNING,
+                ]
+            )
+        )
+        .order_by(QueryExecution.id)
+        .first()
+    )
+
+
+@with_session
+def get_follower_query_execution_ids(query_execution_id, session=None):
+    return [
+        follower_id
+        for follower_id, in session.query(QueryExecution.id).filter(
+            QueryExecution.leader_id == query_execution_id
+        )
+    ]
+
+
+@with_session
+def reuse_query_execution_result(query_execution, source_query_execution, session=None):
+    """Complete the query execution with copies of the statement executions
+       of the source one (cached or followed), which point to the same
+       results and logs
+    """
+    session.flush()
+
+    source_statement_executions = sorted(
+        source_query_execution.statement_executions, key=lambda s: s.id
+    )
+    # The query can differ in comments and whitespaces
+    statement_ranges = get_statement_ranges(query_execution.query)
+    if len(statement_ranges) != len(source_statement_executions):
+        statement_ranges = [
+            (s.statement_range_start, s.statement_range_end)
+            for s in source_statement_executions
+        ]
+
+    utcnow = datetime.utcnow()
+    for (statement_start, statement_end), source_statement_execution in zip(
+        statement_ranges, source_statement_executions
+    ):
+        session.add(
+            StatementExecution(
+                query_execution_id=query_execution.id,
+                statement_range_start=statement_start,
+                statement_range_end=statement_end,
+                status=StatementExecutionStatus.DONE,
+                meta_info=source_statement_execution.meta_info,
+                completed_at=utcnow,
+                result_row_count=source_statement_execution.result_row_count,
+                result_stats=source_statement_execution.result_stats,
+                result_truncated=source_statement_execution.result_truncated,
+                result_path=source_statement_execution.result_path,
+                has_log=source_statement_execution.has_log,
+                log_path=source_statement_execution.log_path,
+            )
+        )
+
+    query_execution.status = QueryExecutionStatus.DONE
+    query_execution.completed_at = utcnow
+    session.flush()
+
+
 @with_session
 def update_query_execution(
     query_execution_id,
@@ -207,6 +408,8 @@ def update_statement_execution(
     meta_info=None,
     completed_at=None,
     result_row_count=None,
+    result_stats=None,
+    result_truncated=None,
     result_path=None,
     has_log=None,
     log_path=None,
@@ -230,6 +433,12 @@ def update_statement_execution(
     if result_row_count is not None:
         statement_execution.result_row_count = result_row_count
 
+    if result_stats is not None:
+        statement_execution.result_stats = result_stats
+
+    if result_truncated is not None:
+        statement_execution.result_truncated = result_truncated
+
     if result_path is not None:
         statement_execution.result_path = result_path
 
@@ -243,6 +452,14 @@ def update_statement_execution(
         session.commit()
         statement_execution.id
 
+    if result_path is not None:
+        # The result was (re)uploaded, the cached preview is outdated
+        try:
+            invalidate_cached_result(statement_id)
+        except Exception as e:
+            # Already committed, the execution must not fail because of the cache
+            LOG.warning(f"Failed to invalidate result cache: {e}")
+
     return statement_execution
 
 
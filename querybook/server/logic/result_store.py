@@ -1,7 +1,7 @@
 import csv
 from io import StringIO
 import sys
-from typing import List
+from typing import Iterable, List, Optional
 from datetime import datetime
 
 
@@ -68,3 +68,48 @@ def string_to_csv(raw_csv_str: str) -> List[List[str]]:
         csv_reader = csv.reader(raw_results, delimiter=",")
         result = [row for row in csv_reader]
     return result
+
+
+class CSVRowSplitter(object):
+    """Incrementally joins the lines of a csv into rows, a quoted cell
+       can contain new lines so a row can span multiple lines.
+
+       A row is complete once the number of quotes seen is even,
+       escaped quotes ("") do not change the parity.
+    """
+
+    def __init__(self):
+        self._lines = []
+        self._in_quotes = False
+
+    def add_line(self, line: str) -> Optional[str]:
+        """Add the next line (without the line terminator)
+
+        Returns:
+            Optional[str] -- the row if it is complete with this line
+        """
+        if line.count('"') % 2:
+            self._in_quotes = not self._in_quotes
+
+        if self._in_quotes:
+            self._lines.append(line)
+            return None
+        if len(self._lines):
+            self._lines.append(line)
+            row = "\n".join(self._lines)
+            self._lines = []
+            return row
+        return line
+
+    @property
+    def incomplete_row(self) -> Optional[str]:
+        """The lines of a row whose quoted cell is not closed yet"""
+        return "\n".join(self._lines) if len(self._lines) else None
+
+
+def rows_to_csv(rows: Iterable[str]) -> List[List[str]]:
+    """Same as string_to_csv, but the rows are parsed one by one
+       instead of being joined into a single string first
+    """
+    # Remove NULL byte to make sure csv conversion works
+    return list(csv.reader(row.replace("\x00", "") for row in rows))
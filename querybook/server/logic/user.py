@@ -7,7 +7,7 @@ from models.user import (
     UserSetting,
     UserRole,
 )
-from tasks.sync_elasticsearch import sync_elasticsearch
+from tasks.sync_elasticsearch import queue_sync_elasticsearch
 
 
 user_settings_config = get_config_value("user_setting")
@@ -242,4 +242,4 @@ def create_admin_when_no_admin(user, commit, session=None):
 
 
 def update_es_users_by_id(uid):
-    sync_elasticsearch.apply_async(args=[ElasticsearchItem.users.value, uid])
+    queue_sync_elasticsearch(ElasticsearchItem.users.value, uid)
@@ -11,7 +11,11 @@ from const.db import (
     mediumtext_length,
     text_length,
 )
-from const.query_execution import QueryExecutionStatus, StatementExecutionStatus
+from const.query_execution import (
+    QueryExecutionCacheStatus,
+    QueryExecutionStatus,
+    StatementExecutionStatus,
+)
 from lib.sqlalchemy import CRUDMixin
 
 
@@ -37,6 +41,19 @@ class QueryExecution(Base):
     )
     uid = sql.Column(sql.Integer, sql.ForeignKey("user.id", ondelete="CASCADE"))
 
+    # Only set if the result cache was requested, see logic/query_execution.py
+    cache_key = sql.Column(sql.String(length=64), index=True)
+    cache_status = sql.Column(sql.Enum(QueryExecutionCacheStatus))
+    cached_from_id = sql.Column(
+        sql.Integer, sql.ForeignKey("query_execution.id", ondelete="SET NULL")
+    )
+    # The execution of the same query this one waits for instead of running
+    leader_id = sql.Column(
+        sql.Integer,
+        sql.ForeignKey("query_execution.id", ondelete="SET NULL"),
+        index=True,
+    )
+
     owner = relationship("User", uselist=False)
     engine = relationship(
         "QueryEngine",
@@ -73,6 +90,11 @@ class QueryExecution(Base):
             "query": self.query,
             "engine_id": self.engine_id,
             "uid": self.uid,
+            "cache_status": self.cache_status.value
+            if self.cache_status is not None
+            else None,
+            "cached_from_id": self.cached_from_id,
+            "leader_id": self.leader_id,
         }
 
         if with_statement:
@@ -125,6 +147,11 @@ class StatementExecution(Base):
     completed_at = sql.Column(sql.DateTime)
 
     result_row_count = sql.Column(sql.BigInteger, nullable=False, default=0)
+    # Column stats and row sample of the result, not in to_dict since
+    # they are only needed when inspecting the result
+    result_stats = sql.Column(sql.JSON)
+    # If the result reached RESULT_MAX_ROWS/RESULT_MAX_SIZE or the store limit
+    result_truncated = sql.Column(sql.Boolean, nullable=False, default=False)
     result_path = sql.Column(sql.String(length=url_length))
 
     has_log = sql.Column(sql.Boolean, nullable=False, default=False)
@@ -142,6 +169,7 @@ class StatementExecution(Base):
             "created_at": self.created_at,
             "completed_at": self.completed_at,
             "result_row_count": self.result_row_count,
+            "result_truncated": self.result_truncated,
             "result_path": self.result_path,
             "has_log": self.has_log,
             "log_path": self.log_path,
@@ -0,0 +1,70 @@
+"""Measure reading a large csv result with the streaming chunk reader,
+compared to joining the whole text and parsing it at once
+
+Usage: python scripts/benchmark_csv_reader.py [num_rows] [read_size]
+"""
+from io import BytesIO
+import random
+import sys
+import timeit
+import tracemalloc
+
+from clients.common import StreamChunkReader
+from lib.query_executor.utils import row_to_csv
+from logic.result_store import string_to_csv
+
+
+def generate_csv(num_rows: int, multi_line_ratio: float) -> bytes:
+    rows = [["id", "name", "description", "score"]]
+    for i in range(num_rows):
+        description = (
+            'line one\nline two, with "quotes"'
+            if random.random() < multi_line_ratio
+            else "some text"
+        )
+        rows.append([i, "user_{}".format(i), description, random.random()])
+    return "".join(map(row_to_csv, rows)).encode("utf-8")
+
+
+def read_with_chunk_reader(data: bytes, read_size: int):
+    StreamChunkReader(BytesIO(data), read_size=read_size, max_read_size=None).read_csv()
+
+
+def read_joined(data: bytes, read_size: int):
+    string_to_csv(data.decode("utf-8"))
+
+
+def get_peak_memory(fn) -> int:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def benchmark(num_rows=500000, read_size=131072, repeat=3):
+    for multi_line_ratio in (0, 0.1):
+        data = generate_csv(num_rows, multi_line_ratio)
+        print(
+            "{} rows, {:.0%} multi-line cells, {:.1f} MB".format(
+                num_rows, multi_line_ratio, len(data) / 1024 / 1024
+            )
+        )
+
+        for name, fn in (
+            ("StreamChunkReader", read_with_chunk_reader),
+            ("string_to_csv", read_joined),
+        ):
+            best = min(
+                timeit.repeat(lambda: fn(data, read_size), number=1, repeat=repeat)
+            )
+            peak = get_peak_memory(lambda: fn(data, read_size))
+            print(
+                "  {:<20}{:>8.3f}s {:>12.0f} rows/s {:>8.1f} MB peak".format(
+                    name, best, num_rows / best, peak / 1024 / 1024
+                )
+            )
+
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:3]])
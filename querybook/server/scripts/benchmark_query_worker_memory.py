@@ -0,0 +1,222 @@
+"""Measure the memory used by workers running many long queries at once:
+prefork workers (one process per query, like prod_worker) against one
+gevent worker process running all of them (like prod_query_worker)
+
+The queries are simulated by a cursor that never completes, so only the
+memory of the worker is measured. Half of them are cancelled midway and
+the others stop at the soft time limit, to check both still work.
+
+Prefork is estimated from the proportional memory (PSS) of a sample of
+forked processes, since it shares the imported modules with the parent.
+
+Usage: python scripts/benchmark_query_worker_memory.py
+            [--queries 500] [--duration 20] [--processes 20]
+"""
+import sys
+
+if "--gevent" in sys.argv:
+    from gevent import monkey
+
+    monkey.patch_all()
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import subprocess  # noqa: E402
+import time  # noqa: E402
+from types import SimpleNamespace  # noqa: E402
+
+from celery.exceptions import SoftTimeLimitExceeded  # noqa: E402
+
+from const.query_execution import QueryExecutionStatus  # noqa: E402
+from lib.query_executor.base_client import (  # noqa: E402
+    ClientBaseClass,
+    CursorBaseClass,
+)
+from lib.query_executor.base_executor import QueryExecutorBaseClass  # noqa: E402
+from tasks.run_query import run_executor_until_finish  # noqa: E402
+
+
+class SleepingCursor(CursorBaseClass):
+    def run(self, query):
+        pass
+
+    def poll(self):
+        return False
+
+    def cancel(self):
+        pass
+
+    def get_one_row(self):
+        return None
+
+    def get_columns(self):
+        return None
+
+
+class SleepingClient(ClientBaseClass):
+    def cursor(self):
+        return SleepingCursor()
+
+
+class NullLogger(object):
+    """Skips the db writes and socket events of QueryExecutorLogger"""
+
+    def __init__(self, *args):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class SleepingExecutor(QueryExecutorBaseClass):
+    @classmethod
+    def EXECUTOR_NAME(cls):
+        return "sleeping"
+
+    @classmethod
+    def EXECUTOR_LANGUAGE(cls):
+        return "sleeping"
+
+    @classmethod
+    def EXECUTOR_TEMPLATE(cls):
+        return None
+
+    @classmethod
+    def LOGGER_CLASS(cls):
+        return NullLogger
+
+    @classmethod
+    def _get_client(cls, client_setting):
+        return SleepingClient()
+
+
+class FakeTask(object):
+    """Task aborted after abort_after seconds if given, otherwise it
+       stops at the soft time limit
+    """
+
+    def __init__(self, soft_time_limit: float, abort_after: float = None):
+        self.request = SimpleNamespace(timelimit=(None, soft_time_limit))
+        self.soft_time_limit = None
+        self.app = SimpleNamespace(conf=SimpleNamespace(task_soft_time_limit=None))
+        self._abort_at = None if abort_after is None else time.time() + abort_after
+
+    def is_aborted(self):
+        return self._abort_at is not None and time.time() > self._abort_at
+
+
+def run_query(index: int, duration: float) -> str:
+    executor = SleepingExecutor(index, None, "select 1", [(0, 8)], {})
+    task = FakeTask(duration, abort_after=duration / 2 if index % 2 else None)
+    try:
+        run_executor_until_finish(task, executor)
+    except SoftTimeLimitExceeded:
+        return "soft time limit"
+    return "cancelled" if executor.status == QueryExecutionStatus.CANCEL else "done"
+
+
+def get_memory(pid: int) -> int:
+    """Proportional set size of the process in bytes"""
+    with open("/proc/{}/smaps_rollup".format(pid)) as smaps:
+        for line in smaps:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) * 1024
+    raise Exception("Pss not found")
+
+
+def measure_gevent(num_queries: int, duration: float):
+    import gevent
+
+    greenlets = [gevent.spawn(run_query, i, duration) for i in range(num_queries)]
+    gevent.sleep(duration * 0.4)
+    memory = get_memory(os.getpid())
+    gevent.joinall(greenlets, raise_error=True)
+
+    outcomes = [greenlet.value for greenlet in greenlets]
+    return {
+        "memory": memory,
+        "outcomes": {outcome: outcomes.count(outcome) for outcome in set(outcomes)},
+    }
+
+
+def measure_prefork(num_queries: int, duration: float, num_processes: int):
+    pids = []
+    for i in range(num_processes):
+        pid = os.fork()
+        if pid == 0:
+            run_query(i, duration)
+            os._exit(0)
+        pids.append(pid)
+
+    time.sleep(duration * 0.4)
+    parent_memory = get_memory(os.getpid())
+    process_memory = sum(get_memory(pid) for pid in pids) / len(pids)
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    return {
+        "memory": parent_memory + process_memory * num_queries,
+        "process_memory": process_memory,
+    }
+
+
+def run_mode(mode: str, args) -> dict:
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            __file__,
+            "--{}".format(mode),
+            "--queries",
+            str(args.queries),
+            "--duration",
+            str(args.duration),
+            "--processes",
+            str(args.processes),
+        ]
+    )
+    return json.loads(output.decode("utf-8").strip().split("\n")[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--processes", type=int, default=20)
+    parser.add_argument("--gevent", action="store_true")
+    parser.add_argument("--prefork", action="store_true")
+    args = parser.parse_args()
+
+    if args.gevent:
+        print(json.dumps(measure_gevent(args.queries, args.duration)))
+    elif args.prefork:
+        print(json.dumps(measure_prefork(args.queries, args.duration, args.processes)))
+    else:
+        mb = 1024 * 1024
+        print("{} queries running for {}s".format(args.queries, args.duration))
+
+        prefork = run_mode("prefork", args)
+        print(
+            "{:<28} {:>8.1f} MB  ({:.1f} MB per process, from {} processes)".format(
+                "prefork, 1 query/process",
+                prefork["memory"] / mb,
+                prefork["process_memory"] / mb,
+                args.processes,
+            )
+        )
+
+        multiplexed = run_mode("gevent", args)
+        print(
+            "{:<28} {:>8.1f} MB  {}".format(
+                "gevent, 1 process",
+                multiplexed["memory"] / mb,
+                ", ".join(
+                    "{} {}".format(count, outcome)
+                    for outcome, count in sorted(multiplexed["outcomes"].items())
+                ),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Compare the per cell row_to_csv with the batched csv serializer
+
+Usage: python scripts/benchmark_result_serialization.py [num_rows] [batch_size]
+"""
+import datetime
+import random
+import sys
+import timeit
+
+from lib.query_executor.utils import row_to_csv, RowBatchCSVSerializer
+
+
+def generate_rows(num_rows: int):
+    now = datetime.datetime.utcnow()
+    return [
+        [
+            i,
+            random.random() * 1000,
+            "user_{}".format(random.randint(0, 100000)),
+            now - datetime.timedelta(seconds=i),
+            None if i % 7 == 0 else "some, text",
+            i % 2 == 0,
+        ]
+        for i in range(num_rows)
+    ]
+
+
+def per_cell_serialize(batches):
+    for rows in batches:
+        "".join(map(row_to_csv, rows))
+
+
+def batched_serialize(batches):
+    serializer = RowBatchCSVSerializer()
+    for rows in batches:
+        serializer.serialize(rows)
+
+
+def benchmark(num_rows=1000000, batch_size=10000, repeat=3):
+    rows = generate_rows(num_rows)
+    batches = [rows[i : i + batch_size] for i in range(0, num_rows, batch_size)]
+    num_cells = num_rows * len(rows[0])
+
+    for name, fn in (
+        ("row_to_csv", per_cell_serialize),
+        ("RowBatchCSVSerializer", batched_serialize),
+    ):
+        best = min(timeit.repeat(lambda: fn(batches), number=1, repeat=repeat))
+        print("{:<24}{:>8.3f}s {:>12.0f} cells/s".format(name, best, num_cells / best))
+
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:3]])
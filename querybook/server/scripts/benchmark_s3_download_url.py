@@ -0,0 +1,86 @@
+"""Measure the time download_statement_execution_result spends getting the
+download url of an s3 result: new boto3 clients and a prefix listing per
+download (as before) against the shared client and cached HEAD check
+
+Runs against a local moto s3 server unless an endpoint is given (ex. minio)
+
+Usage: python scripts/benchmark_s3_download_url.py
+            [--requests 200] [--endpoint-url URL]
+"""
+from gevent import monkey
+
+# Patched like the web server, where downloads are served
+monkey.patch_all()
+
+import argparse  # noqa: E402
+import time  # noqa: E402
+
+import boto3  # noqa: E402
+
+from lib.result_store import GenericReader  # noqa: E402
+from scripts.load_test_result_reader import (  # noqa: E402
+    BUCKET_NAME,
+    local_s3,
+    percentile,
+)
+
+NUM_RESULTS = 20
+
+
+def get_download_url_before(key: str):
+    s3 = boto3.client("s3")
+    bucket = boto3.resource("s3").Bucket(BUCKET_NAME)
+    objects = list(bucket.objects.filter(Prefix=key))
+    if len(objects) > 0 and objects[0].key == key:
+        return s3.generate_presigned_url(
+            ClientMethod="get_object",
+            Params={"Bucket": BUCKET_NAME, "Key": key},
+            ExpiresIn=86400,
+        )
+    return None
+
+
+def get_download_url_after(key: str):
+    return GenericReader("s3://" + key).get_download_url()
+
+
+def benchmark(num_requests: int):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=BUCKET_NAME)
+    keys = []
+    for i in range(NUM_RESULTS):
+        # Other results share the prefix of result 1 (ex. querybook_temp/10/...)
+        key = "querybook_temp/{}/result.csv".format(i)
+        s3.put_object(Bucket=BUCKET_NAME, Key=key, Body=b"id\n1\n")
+        keys.append(key)
+
+    for name, get_download_url in (
+        ("client per download", get_download_url_before),
+        ("shared client", get_download_url_after),
+    ):
+        latencies = []
+        for i in range(num_requests):
+            start = time.time()
+            assert get_download_url(keys[i % NUM_RESULTS]) is not None
+            latencies.append(time.time() - start)
+
+        print(
+            "{:<22} p50 {:>7.1f}ms  p99 {:>7.1f}ms".format(
+                name, percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--endpoint-url", default=None)
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    with local_s3(args.endpoint_url, args.port):
+        benchmark(args.requests)
+
+
+if __name__ == "__main__":
+    main()
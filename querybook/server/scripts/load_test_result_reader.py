@@ -0,0 +1,177 @@
+"""Load test fetching result previews from s3 with concurrent users, as done
+by the web server when data docs are opened.
+
+Compares a new s3 client per read (as before) with the cooperative reader
+the web server now uses: one shared client and a reader that yields
+between chunks. Also reports how late a 10ms timer fires on the event loop,
+which shows how much the reads hold up the other requests.
+
+Runs against a local moto s3 server unless an endpoint is given (ex. minio)
+
+Usage: python scripts/load_test_result_reader.py
+            [--users 50] [--requests 20] [--rows 20000] [--endpoint-url URL]
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse  # noqa: E402
+from contextlib import contextmanager  # noqa: E402
+import os  # noqa: E402
+import random  # noqa: E402
+import socket  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+
+import boto3  # noqa: E402
+import gevent  # noqa: E402
+
+from clients import s3_client  # noqa: E402
+from env import QuerybookSettings  # noqa: E402
+from lib.query_executor.utils import row_to_csv  # noqa: E402
+from lib.result_store import GenericReader  # noqa: E402
+
+BUCKET_NAME = "querybook-load-test"
+NUM_RESULTS = 10
+
+
+def start_moto_server(port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "moto.server", "s3", "-p", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(("localhost", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise Exception("moto server did not start")
+
+
+def use_endpoint(endpoint_url: str):
+    original_client = boto3.session.Session.client
+    original_resource = boto3.session.Session.resource
+
+    def client(self, service_name, *args, **kwargs):
+        kwargs.setdefault("endpoint_url", endpoint_url)
+        return original_client(self, service_name, *args, **kwargs)
+
+    def resource(self, service_name, *args, **kwargs):
+        kwargs.setdefault("endpoint_url", endpoint_url)
+        return original_resource(self, service_name, *args, **kwargs)
+
+    boto3.session.Session.client = client
+    boto3.session.Session.resource = resource
+
+
+@contextmanager
+def local_s3(endpoint_url: str = None, port: int = 5055):
+    """Point boto3 to the endpoint, or to a local moto server if none is given,
+       and store the results in the load test bucket
+    """
+    server = None
+    if endpoint_url is None:
+        for key in ["AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"]:
+            os.environ.setdefault(key, "testing")
+        os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+        server = start_moto_server(port)
+        endpoint_url = "http://localhost:{}".format(port)
+
+    try:
+        use_endpoint(endpoint_url)
+        QuerybookSettings.STORE_BUCKET_NAME = BUCKET_NAME
+        QuerybookSettings.STORE_PATH_PREFIX = ""
+        yield
+    finally:
+        if server is not None:
+            server.kill()
+
+
+def upload_results(num_rows: int):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=BUCKET_NAME)
+
+    rows = [["id", "name", "description"]] + [
+        [i, "user_{}".format(i), "some text, " * 5] for i in range(num_rows)
+    ]
+    body = "".join(map(row_to_csv, rows)).encode("utf-8")
+    for i in range(NUM_RESULTS):
+        s3.put_object(
+            Bucket=BUCKET_NAME, Key="querybook_temp/{}/result.csv".format(i), Body=body
+        )
+
+
+def fetch_result(cooperative: bool):
+    if not cooperative:
+        # Reset the shared client to create one per read like before
+        s3_client._s3_client = None
+
+    path = "s3://querybook_temp/{}/result.csv".format(random.randrange(NUM_RESULTS))
+    start = time.time()
+    with GenericReader(path, cooperative=cooperative) as reader:
+        reader.read_csv(number_of_lines=2001)
+    return time.time() - start
+
+
+def measure_loop_lag(lags, interval=0.01):
+    while True:
+        start = time.time()
+        gevent.sleep(interval)
+        lags.append(time.time() - start - interval)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+
+def run(cooperative: bool, num_users: int, num_requests: int):
+    latencies = []
+    lags = []
+
+    def user():
+        for _ in range(num_requests):
+            latencies.append(fetch_result(cooperative))
+
+    ticker = gevent.spawn(measure_loop_lag, lags)
+    start = time.time()
+    gevent.joinall([gevent.spawn(user) for _ in range(num_users)], raise_error=True)
+    duration = time.time() - start
+    ticker.kill()
+
+    print(
+        "{:<22} {:>7.0f} req/s  p50 {:>7.1f}ms  p95 {:>7.1f}ms  p99 {:>7.1f}ms"
+        "  max loop lag {:>6.1f}ms".format(
+            "cooperative reader" if cooperative else "client per read",
+            len(latencies) / duration,
+            percentile(latencies, 50) * 1000,
+            percentile(latencies, 95) * 1000,
+            percentile(latencies, 99) * 1000,
+            max(lags) * 1000,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--endpoint-url", default=None)
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    with local_s3(args.endpoint_url, args.port):
+        upload_results(args.rows)
+
+        print("{} users x {} requests".format(args.users, args.requests))
+        for cooperative in [False, True]:
+            run(cooperative, args.users, args.requests)
+
+
+if __name__ == "__main__":
+    main()
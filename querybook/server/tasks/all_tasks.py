@@ -10,7 +10,7 @@ from .run_query import run_query_task
 from .run_sample_query import run_sample_query
 from .dummy_task import dummy_task
 from .update_metastore import update_metastore
-from .sync_elasticsearch import sync_elasticsearch
+from .sync_elasticsearch import sync_elasticsearch, sync_elasticsearch_changes
 from .run_datadoc import run_datadoc
 from .delete_mysql_cache import delete_mysql_cache
 from .poll_engine_status import poll_engine_status
@@ -30,6 +30,7 @@ run_query_task
 dummy_task
 update_metastore
 sync_elasticsearch
+sync_elasticsearch_changes
 run_datadoc
 delete_mysql_cache
 poll_engine_status
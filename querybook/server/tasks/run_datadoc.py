@@ -42,6 +42,8 @@ def run_datadoc_with_config(
     notify_on=NotifyOn.ALL.value,
     # Exporting related settings
     exports=[],
+    # Reuse the results of the queries run in the last cache_ttl seconds
+    cache_ttl=None,
     *args,
     **kwargs,
 ):
@@ -65,6 +67,7 @@ def run_datadoc_with_config(
                     "query": query,
                     "engine_id": query_cell.meta["engine"],
                     "uid": runner_id,
+                    "cache_ttl": cache_ttl,
                 },
             }
             tasks_to_run.append(
@@ -1,23 +1,41 @@
 import traceback
 import datetime
+import time
+
 from celery.contrib.abortable import AbortableTask
-from celery.exceptions import SoftTimeLimitExceeded
+from celery.exceptions import Retry, SoftTimeLimitExceeded
 from celery.utils.log import get_task_logger
 
 from app.db import with_session, DBSession
-from app.flask_app import celery
-from const.query_execution import QueryExecutionStatus
+from app.flask_app import celery, socketio
+from const.query_execution import (
+    QueryExecutionCacheStatus,
+    QueryExecutionStatus,
+    QUERY_EXECUTION_NAMESPACE,
+)
 from lib.query_executor.notification import notifiy_on_execution_completion
 from lib.query_executor.executor_factory import create_executor_from_execution
 from lib.query_executor.exc import QueryExecutorException
 from lib.query_executor.utils import format_error_message
 
 from logic import query_execution as qe_logic
+from models.query_execution import QueryExecution
 from tasks.log_query_per_table import log_query_per_table_task
 
 
 LOG = get_task_logger(__name__)
 
+# Seconds between two checks of the leader by a follower, doubled
+# after each check up to FOLLOW_MAX_POLL_INTERVAL
+FOLLOW_POLL_INTERVAL = 1
+FOLLOW_MAX_POLL_INTERVAL = 30
+
+FINAL_QUERY_EXECUTION_STATUSES = (
+    QueryExecutionStatus.DONE,
+    QueryExecutionStatus.ERROR,
+    QueryExecutionStatus.CANCEL,
+)
+
 
 @celery.task(
     bind=True,
@@ -31,10 +49,28 @@ def run_query_task(self, query_execution_id):
     executor = None
     error_message = None
     query_execution_status = QueryExecutionStatus.INITIALIZED
+    # Set when a follower is retried later, the query execution is not done
+    retrying = False
 
     try:
+        if is_cached_query_execution(query_execution_id):
+            # The result of a recent execution was reused, nothing to run
+            return QueryExecutionStatus.DONE.value
+
+        follower_status = follow_query_execution(self, query_execution_id)
+        if follower_status is not None:
+            return follower_status.value
+
         executor = create_executor_from_execution(query_execution_id, celery_task=self)
         run_executor_until_finish(self, executor)
+        LOG.info(
+            "Query execution {} finished after {} polls".format(
+                query_execution_id, executor.poll_count
+            )
+        )
+    except Retry:
+        retrying = True
+        raise
     except SoftTimeLimitExceeded:
         # SoftTimeLimitExceeded
         # This exception happens when query has been running for more than
@@ -49,27 +85,189 @@ def run_query_task(self, query_execution_id):
             7406, "{}\n{}".format(e, traceback.format_exc())
         )
     finally:
-        # When the finally block is reached, it is expected
-        # that the executor should be in one of the end state
-        with DBSession() as session:
-            query_execution_status = get_query_execution_final_status(
-                query_execution_id, executor, error_message, session=session
-            )
-            notifiy_on_execution_completion(query_execution_id, session=session)
+        if executor is not None:
+            executor.release_client()
+
+        if not retrying:
+            # When the finally block is reached, it is expected
+            # that the executor should be in one of the end state
+            with DBSession() as session:
+                query_execution_status = get_query_execution_final_status(
+                    query_execution_id, executor, error_message, session=session
+                )
+                notifiy_on_execution_completion(query_execution_id, session=session)
 
-            # Executor exists means the query actually executed
-            # This prevents cases when query_execution got executed twice
-            if executor and query_execution_status == QueryExecutionStatus.DONE:
-                log_query_per_table_task.delay(query_execution_id)
+                # Executor exists means the query actually executed
+                # This prevents cases when query_execution got executed twice
+                if executor and query_execution_status == QueryExecutionStatus.DONE:
+                    log_query_per_table_task.delay(query_execution_id)
+
+            if executor is not None:
+                complete_followers(query_execution_id, query_execution_status)
 
     return query_execution_status.value if executor is not None else None
 
 
+@with_session
+def is_cached_query_execution(query_execution_id, session=None):
+    query_execution = qe_logic.get_query_execution_by_id(
+        query_execution_id, session=session
+    )
+    return (
+        query_execution is not None
+        and query_execution.cache_status == QueryExecutionCacheStatus.HIT
+    )
+
+
+def follow_query_execution(celery_task, query_execution_id):
+    """Complete the query execution the same way as the execution it
+       follows (its leader) if the leader is done. Otherwise the task is
+       retried later, so the worker is free while the leader runs. The
+       leader also completes its followers once it is done, see
+       complete_followers. The statements of the leader are sent to
+       the users of the follower while it runs, see _emit_statement_event
+
+    Returns:
+        QueryExecutionStatus -- The final status, None if the query has to
+                                be run since the leader was cancelled or
+                                the query execution is not a follower
+    """
+    with DBSession() as session:
+        query_execution = qe_logic.get_query_execution_by_id(
+            query_execution_id, session=session
+        )
+        if query_execution is None or query_execution.leader_id is None:
+            return None
+        if query_execution.status in FINAL_QUERY_EXECUTION_STATUSES:
+            # Completed by the leader, or cancelled
+            return query_execution.status
+
+        leader_id = query_execution.leader_id
+        if query_execution.task_id != celery_task.request.id:
+            qe_logic.update_query_execution(
+                query_execution_id, task_id=celery_task.request.id, session=session
+            )
+        leader = qe_logic.get_query_execution_by_id(leader_id, session=session)
+        leader_status = leader.status if leader is not None else None
+
+    if celery_task.is_aborted():
+        # Only this execution is cancelled, the leader keeps running
+        return complete_follower(query_execution_id, QueryExecutionStatus.CANCEL, None)
+    if leader_status in (QueryExecutionStatus.DONE, QueryExecutionStatus.ERROR):
+        return complete_follower(query_execution_id, leader_status, leader_id)
+    if leader_status in (None, QueryExecutionStatus.CANCEL):
+        LOG.info(
+            "Query execution {} runs the query since {} was cancelled".format(
+                query_execution_id, leader_id
+            )
+        )
+        return None
+
+    countdown = min(
+        FOLLOW_POLL_INTERVAL * 2 ** celery_task.request.retries,
+        FOLLOW_MAX_POLL_INTERVAL,
+    )
+    raise celery_task.retry(countdown=countdown, max_retries=None)
+
+
+def complete_followers(leader_id, status):
+    if status not in (QueryExecutionStatus.DONE, QueryExecutionStatus.ERROR):
+        # The followers run the query themselves when they are retried
+        return
+
+    for follower_id in qe_logic.get_follower_query_execution_ids(leader_id):
+        try:
+            complete_follower(follower_id, status, leader_id)
+        except Exception:
+            LOG.error(traceback.format_exc())
+
+
+@with_session
+def complete_follower(query_execution_id, status, leader_id, session=None):
+    """End the follower with the status of its leader, the results
+       or the error of the leader are copied to the follower.
+       The follower can be completed by its leader and its own task
+       at the same time, only the first one completes it.
+
+    Returns:
+        QueryExecutionStatus -- The final status of the follower
+    """
+    completed = (
+        session.query(QueryExecution)
+        .filter(QueryExecution.id == query_execution_id)
+        .filter(~QueryExecution.status.in_(FINAL_QUERY_EXECUTION_STATUSES))
+        .update(
+            {
+                QueryExecution.status: status,
+                QueryExecution.completed_at: datetime.datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+    )
+    if not completed:
+        session.rollback()
+        query_execution = qe_logic.get_query_execution_by_id(
+            query_execution_id, session=session
+        )
+        return query_execution.status if query_execution is not None else status
+
+    query_execution = qe_logic.get_query_execution_by_id(
+        query_execution_id, session=session
+    )
+    session.refresh(query_execution)
+    leader = (
+        qe_logic.get_query_execution_by_id(leader_id, session=session)
+        if leader_id is not None
+        else None
+    )
+
+    event = "query_cancel"
+    if status == QueryExecutionStatus.DONE:
+        qe_logic.reuse_query_execution_result(query_execution, leader, session=session)
+        event = "query_end"
+    elif status == QueryExecutionStatus.ERROR:
+        if leader.error is not None:
+            qe_logic.create_query_execution_error(
+                query_execution_id,
+                error_type=leader.error.error_type,
+                error_message_extracted=leader.error.error_message_extracted,
+                error_message=leader.error.error_message,
+                commit=False,
+                session=session,
+            )
+        event = "query_exception"
+    session.commit()
+
+    socketio.emit(
+        event,
+        query_execution.to_dict(),
+        namespace=QUERY_EXECUTION_NAMESPACE,
+        room=query_execution_id,
+    )
+    return status
+
+
+def get_soft_time_limit(celery_task):
+    time_limits = celery_task.request.timelimit or (None, None)
+    return (
+        time_limits[1]
+        or celery_task.soft_time_limit
+        or celery_task.app.conf.task_soft_time_limit
+    )
+
+
 def run_executor_until_finish(celery_task, executor):
+    # The gevent pool does not raise SoftTimeLimitExceeded by itself,
+    # so the soft time limit is checked between polls as well
+    soft_time_limit = get_soft_time_limit(celery_task)
+    deadline = time.time() + soft_time_limit if soft_time_limit else None
+
     while True:
         if celery_task.is_aborted():
             executor.cancel()
             break
+        if deadline is not None and time.time() > deadline:
+            raise SoftTimeLimitExceeded()
         executor.poll()
         if executor.status != QueryExecutionStatus.RUNNING:
             break
@@ -1,7 +1,28 @@
+"""Sync the changed items to elasticsearch
+
+Changed items are added to a change feed in redis, a sorted set of
+"item_type:item_id" ordered by the time of their first change, so an item
+changed many times is synced once. The first change schedules a
+sync_elasticsearch_changes task ELASTICSEARCH_SYNC_INTERVAL seconds later,
+which syncs all the queued items in batches with the _bulk api.
+"""
+from collections import defaultdict
+import time
+from typing import Dict, List
+
 from app.flask_app import celery
+from clients.redis_client import with_redis
+from env import QuerybookSettings
 from lib.celery.task_decorator import debounced_task
+from lib.logger import get_logger
 from const.elasticsearch import ElasticsearchItem
 
+LOG = get_logger(__file__)
+
+SYNC_QUEUE_KEY = "elasticsearch_sync_queue"
+# Set while a sync_elasticsearch_changes task is scheduled
+SYNC_SCHEDULED_KEY = "elasticsearch_sync_scheduled"
+
 
 @debounced_task(countdown=60)
 @celery.task(bind=True)
@@ -19,3 +40,89 @@ def sync_elasticsearch(self, item_type, item_id, *args, **kwargs):
         update_table_by_id(item_id)
     elif item_type == ElasticsearchItem.users.value:
         update_user_by_id(item_id)
+
+
+@with_redis
+def queue_sync_elasticsearch(item_type, item_id, redis_conn=None):
+    """Add the item to the change feed, it is synced by the
+       next sync_elasticsearch_changes task
+
+    Arguments:
+        item_type {str} -- ElasticsearchItem value
+        item_id {int} -- Id of the item
+    """
+    redis_conn.zadd(
+        SYNC_QUEUE_KEY, {"{}:{}".format(item_type, item_id): time.time()}, nx=True
+    )
+    _schedule_sync_elasticsearch_changes(redis_conn)
+
+
+def _schedule_sync_elasticsearch_changes(redis_conn):
+    interval = QuerybookSettings.ELASTICSEARCH_SYNC_INTERVAL
+    # The key expires in case the task is lost, so the next change schedules another
+    if redis_conn.set(SYNC_SCHEDULED_KEY, 1, nx=True, ex=interval + 60 * 10):
+        sync_elasticsearch_changes.apply_async(countdown=interval)
+
+
+def _pop_changes(redis_conn, batch_size: int) -> Dict[str, float]:
+    """Pop the oldest changes of the change feed
+
+    Returns:
+        Dict[str, float] -- "item_type:item_id" to the time of its first change
+    """
+    with redis_conn.pipeline() as pipe:
+        pipe.zrange(SYNC_QUEUE_KEY, 0, batch_size - 1, withscores=True)
+        pipe.zremrangebyrank(SYNC_QUEUE_KEY, 0, batch_size - 1)
+        changes, _ = pipe.execute()
+    return {member.decode("utf-8"): score for member, score in changes}
+
+
+def _sync_items(item_ids_by_type: Dict[str, List[int]]):
+    # Delaying this import to avoid circular depdendency
+    from logic.elasticsearch import (
+        update_data_docs_by_ids,
+        update_tables_by_ids,
+        update_users_by_ids,
+    )
+
+    update_by_ids_by_type = {
+        ElasticsearchItem.datadocs.value: update_data_docs_by_ids,
+        ElasticsearchItem.tables.value: update_tables_by_ids,
+        ElasticsearchItem.users.value: update_users_by_ids,
+    }
+    for item_type, item_ids in item_ids_by_type.items():
+        update_by_ids_by_type[item_type](item_ids)
+
+
+@celery.task(bind=True)
+@with_redis
+def sync_elasticsearch_changes(self, redis_conn=None):
+    # Changes queued from now on schedule the next task
+    redis_conn.delete(SYNC_SCHEDULED_KEY)
+
+    batch_size = QuerybookSettings.ELASTICSEARCH_SYNC_BATCH_SIZE
+    while True:
+        changes = _pop_changes(redis_conn, batch_size)
+        if not len(changes):
+            break
+
+        item_ids_by_type = defaultdict(list)
+        for change in changes:
+            item_type, item_id = change.split(":")
+            item_ids_by_type[item_type].append(int(item_id))
+
+        try:
+            _sync_items(item_ids_by_type)
+        except Exception:
+            # Requeue them for the next task
+            redis_conn.zadd(SYNC_QUEUE_KEY, changes, nx=True)
+            _schedule_sync_elasticsearch_changes(redis_conn)
+            raise
+
+        LOG.info(
+            "Synced {} changes to elasticsearch, oldest from {:.0f}s ago".format(
+                len(changes), time.time() - min(changes.values())
+            )
+        )
+        if len(changes) < batch_size:
+            break
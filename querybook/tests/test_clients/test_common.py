@@ -0,0 +1,69 @@
+from io import BytesIO
+from unittest import TestCase, mock
+
+from clients.common import StreamChunkReader
+from lib.query_executor.utils import row_to_csv
+from lib.result_store.stores.db_store import DBReader
+from logic.result_store import CSVRowSplitter
+
+ROWS = [
+    ["id", "text"],
+    ["1", "Hello\nWorld"],
+    ["2", 'Say "Hi"\n\nthere'],
+    ["3", "中文"],
+    ["4", ""],
+    ["5", '"\n"'],
+]
+CSV_TEXT = "".join(row_to_csv(row) for row in ROWS)
+
+
+class CSVRowSplitterTestCase(TestCase):
+    def test_add_line(self):
+        splitter = CSVRowSplitter()
+        self.assertEqual(splitter.add_line("1,2"), "1,2")
+        self.assertIsNone(splitter.add_line('1,"a'))
+        self.assertIsNone(splitter.add_line('b ""quoted""'))
+        self.assertEqual(splitter.incomplete_row, '1,"a\nb ""quoted""')
+        self.assertEqual(splitter.add_line('c",2'), '1,"a\nb ""quoted""\nc",2')
+        self.assertIsNone(splitter.incomplete_row)
+
+
+class ChunkReaderTestCase(TestCase):
+    def _get_reader(self, read_size, max_read_size=None):
+        return StreamChunkReader(
+            BytesIO(CSV_TEXT.encode("utf-8")),
+            read_size=read_size,
+            max_read_size=max_read_size,
+        )
+
+    def test_read_csv_with_multi_line_cells(self):
+        # Rows span across chunks of every size
+        for read_size in [1, 2, 3, 7, 64]:
+            self.assertEqual(self._get_reader(read_size).read_csv(), ROWS)
+
+    def test_number_of_lines_counts_rows(self):
+        self.assertEqual(self._get_reader(5).read_csv(3), ROWS[:3])
+
+    def test_drop_truncated_row(self):
+        # Stops reading in the middle of the 3rd row
+        reader = self._get_reader(5, max_read_size=len(CSV_TEXT.split("\n\n")[0]))
+        self.assertEqual(reader.read_csv(), ROWS[:2])
+
+    def test_read_lines(self):
+        self.assertEqual(
+            self._get_reader(5).read_lines(3), ["id,text", '1,"Hello', 'World"']
+        )
+
+
+class DBReaderTestCase(TestCase):
+    def test_read_csv_with_multi_line_cells(self):
+        with mock.patch(
+            "lib.result_store.stores.db_store.get_key_value_store",
+            return_value=mock.Mock(value=CSV_TEXT),
+        ):
+            reader = DBReader("querybook_temp/1/result.csv")
+            reader.start()
+
+        self.assertEqual(reader.read_csv(2), ROWS[:2])
+        self.assertEqual(reader.read_csv(10), ROWS[2:])
+        self.assertEqual(reader.read_csv(10), [])
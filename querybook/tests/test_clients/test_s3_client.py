@@ -0,0 +1,189 @@
+from collections import OrderedDict
+import threading
+from unittest import TestCase, mock
+
+import botocore
+
+from clients.s3_client import MultiPartUploader, S3KeySigner
+
+
+class MultiPartUploaderTestCase(TestCase):
+    def setUp(self):
+        self.s3 = mock.MagicMock()
+        self.s3.create_multipart_upload.return_value = {"UploadId": "upload"}
+        self.s3.upload_part.side_effect = lambda **kwargs: {
+            "ETag": '"etag_{}"'.format(kwargs["PartNumber"])
+        }
+        # Aborted uploads are gone
+        self.s3.list_parts.side_effect = botocore.exceptions.ClientError(
+            {"Error": {"Code": "NoSuchUpload"}}, "ListParts"
+        )
+
+        patcher = mock.patch("clients.s3_client.get_s3_client", return_value=self.s3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        chunk_size_patcher = mock.patch(
+            "clients.s3_client.QuerybookSettings.STORE_MIN_UPLOAD_CHUNK_SIZE", 4
+        )
+        chunk_size_patcher.start()
+        self.addCleanup(chunk_size_patcher.stop)
+
+    def test_parts_are_completed_in_order(self):
+        uploader = MultiPartUploader(
+            "bucket", "key", upload_concurrency=3, max_pending_parts=2
+        )
+        for i in range(10):
+            self.assertTrue(uploader.write("hello{}".format(i)))
+        uploader.complete()
+
+        bodies = sorted(
+            (kwargs["PartNumber"], kwargs["Body"])
+            for _, kwargs in self.s3.upload_part.call_args_list
+        )
+        self.assertEqual(
+            [body for _, body in bodies],
+            ["hello{}".format(i).encode() for i in range(10)],
+        )
+        self.s3.complete_multipart_upload.assert_called_once_with(
+            Bucket="bucket",
+            Key="key",
+            UploadId="upload",
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": i, "ETag": "etag_{}".format(i)} for i in range(1, 11)
+                ]
+            },
+        )
+
+    def test_abort_on_failed_part(self):
+        self.s3.upload_part.side_effect = Exception("Upload failed")
+
+        uploader = MultiPartUploader("bucket", "key")
+        uploader.write("hello world")
+        with self.assertRaises(Exception):
+            uploader.complete()
+
+        self.s3.abort_multipart_upload.assert_called_once()
+        self.s3.complete_multipart_upload.assert_not_called()
+
+    def test_abort_on_failed_write(self):
+        self.s3.upload_part.side_effect = Exception("Upload failed")
+
+        uploader = MultiPartUploader("bucket", "key", max_pending_parts=1)
+        uploader.write("hello world")
+        # The next part waits for the failed one, then stops the upload
+        with self.assertRaises(Exception):
+            uploader.write("hello world")
+        self.s3.abort_multipart_upload.assert_called_once_with(
+            Bucket="bucket", Key="key", UploadId="upload"
+        )
+        self.assertEqual(self.s3.upload_part.call_count, 1)
+
+        with self.assertRaises(Exception):
+            uploader.complete()
+        self.s3.abort_multipart_upload.assert_called_once()
+        self.s3.complete_multipart_upload.assert_not_called()
+
+    def test_abort_waits_for_uploading_parts(self):
+        calls = []
+        uploading = threading.Event()
+        can_finish = threading.Event()
+
+        def upload_part(**kwargs):
+            uploading.set()
+            can_finish.wait(5)
+            calls.append("upload_part")
+            return {"ETag": '"etag"'}
+
+        self.s3.upload_part.side_effect = upload_part
+        self.s3.abort_multipart_upload.side_effect = lambda **kwargs: calls.append(
+            "abort"
+        )
+
+        uploader = MultiPartUploader("bucket", "key", max_pending_parts=2)
+        uploader.write("hello world")
+        uploading.wait(5)
+
+        abort_thread = threading.Thread(target=uploader._abort)
+        abort_thread.start()
+        abort_thread.join(0.1)
+        self.s3.abort_multipart_upload.assert_not_called()
+
+        can_finish.set()
+        abort_thread.join(5)
+        self.assertEqual(calls, ["upload_part", "abort"])
+
+    def test_abort_again_if_parts_are_left(self):
+        self.s3.list_parts.side_effect = None
+        self.s3.list_parts.return_value = {"Parts": [{"PartNumber": 1}]}
+
+        uploader = MultiPartUploader("bucket", "key")
+        uploader._abort()
+        self.assertEqual(self.s3.abort_multipart_upload.call_count, 2)
+
+
+class S3KeySignerTestCase(TestCase):
+    def setUp(self):
+        self.s3 = mock.MagicMock()
+        self.s3.generate_presigned_url.return_value = "https://signed"
+
+        for patcher in [
+            mock.patch("clients.s3_client.get_s3_client", return_value=self.s3),
+            mock.patch("clients.s3_client._existing_keys", OrderedDict()),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_existence_is_cached(self):
+        signer = S3KeySigner("bucket")
+        for _ in range(3):
+            self.assertEqual(signer.generate_presigned_url("key"), "https://signed")
+
+        self.s3.head_object.assert_called_once_with(Bucket="bucket", Key="key")
+        self.s3.list_objects.assert_not_called()
+        self.s3.generate_presigned_url.assert_called_with(
+            ClientMethod="get_object",
+            Params={"Bucket": "bucket", "Key": "key"},
+            ExpiresIn=86400,
+        )
+
+    def test_missing_key(self):
+        self.s3.head_object.side_effect = botocore.exceptions.ClientError(
+            {"Error": {"Code": "404"}}, "HeadObject"
+        )
+        signer = S3KeySigner("bucket")
+        self.assertIsNone(signer.generate_presigned_url("key"))
+        self.assertIsNone(signer.generate_presigned_url("key"))
+
+        # Missing keys are checked again since they can be uploaded later
+        self.assertEqual(self.s3.head_object.call_count, 2)
+        self.s3.generate_presigned_url.assert_not_called()
+
+    def test_existence_expires(self):
+        signer = S3KeySigner("bucket")
+        with mock.patch("clients.s3_client.time.time", return_value=1000):
+            signer.generate_presigned_url("key")
+        with mock.patch("clients.s3_client.time.time", return_value=1299):
+            signer.generate_presigned_url("key")
+        self.assertEqual(self.s3.head_object.call_count, 1)
+
+        # The key may have been deleted since
+        self.s3.head_object.side_effect = botocore.exceptions.ClientError(
+            {"Error": {"Code": "404"}}, "HeadObject"
+        )
+        with mock.patch("clients.s3_client.time.time", return_value=1300):
+            self.assertIsNone(signer.generate_presigned_url("key"))
+        self.assertEqual(self.s3.head_object.call_count, 2)
+
+    def test_params_are_not_shared(self):
+        signer = S3KeySigner("bucket")
+        signer.generate_presigned_url(
+            "key1", params={"ResponseContentEncoding": "gzip"}
+        )
+        signer.generate_presigned_url("key2")
+
+        self.assertEqual(
+            self.s3.generate_presigned_url.call_args[1]["Params"],
+            {"Bucket": "bucket", "Key": "key2"},
+        )
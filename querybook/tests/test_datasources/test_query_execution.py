@@ -0,0 +1,43 @@
+from unittest import TestCase, mock
+
+from app.datasource import RequestException
+from datasources import query_execution as datasource
+
+get_result_page = datasource.get_statement_execution_result_page.__raw__
+
+
+class GetStatementExecutionResultPageTestCase(TestCase):
+    def setUp(self):
+        for patcher in [
+            mock.patch.object(datasource, "DBSession"),
+            mock.patch.object(datasource, "verify_query_execution_permission"),
+            mock.patch.object(datasource, "GenericReader"),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def assert_bad_request(self, **params):
+        with self.assertRaises(RequestException) as context:
+            get_result_page(1, **params)
+        self.assertEqual(context.exception.status_code, 400)
+
+    def test_non_numeric(self):
+        for value in ["abc", "1.5", "", None, 1.5, True]:
+            self.assert_bad_request(offset=value)
+            self.assert_bad_request(limit=value)
+
+    def test_negative(self):
+        self.assert_bad_request(offset=-1)
+        self.assert_bad_request(offset="-1")
+        self.assert_bad_request(limit=-1)
+
+    def test_limit_out_of_range(self):
+        self.assert_bad_request(limit=0)
+        self.assert_bad_request(limit=datasource.MAX_RESULT_PAGE_SIZE + 1)
+
+    def test_valid(self):
+        get_result_page(1, offset="10", limit=datasource.MAX_RESULT_PAGE_SIZE)
+        reader = datasource.GenericReader.return_value.__enter__.return_value
+        reader.read_csv_page.assert_called_once_with(
+            10, datasource.MAX_RESULT_PAGE_SIZE
+        )
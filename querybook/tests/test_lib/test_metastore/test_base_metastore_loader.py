@@ -0,0 +1,180 @@
+from unittest import TestCase, mock
+
+import fakeredis
+import pytest
+
+from app.db import DBSession
+from lib.metastore import load_metastore
+from lib.metastore.base_metastore_loader import (
+    BaseMetastoreLoader,
+    DataColumn,
+    DataTable,
+)
+from logic.metastore import get_schema_by_name, get_table_by_schema_id
+from tasks import sync_elasticsearch as sync_tasks
+
+
+class FakeMetastoreLoader(BaseMetastoreLoader):
+    def __init__(
+        self, metastore_dict, tables_updated_at, schema_name="incremental_schema"
+    ):
+        super(FakeMetastoreLoader, self).__init__(metastore_dict)
+        self.tables_updated_at = tables_updated_at
+        self.schema_name = schema_name
+        self.loaded_table_names = []
+
+    @classmethod
+    def get_metastore_params_template(cls):
+        return None
+
+    def get_all_schema_names(self):
+        return [self.schema_name]
+
+    def get_all_table_names_in_schema(self, schema_name):
+        return list(self.tables_updated_at.keys())
+
+    def get_tables_updated_at(self, schema_name, table_names):
+        return self.tables_updated_at
+
+    def get_table_and_columns(self, schema_name, table_name):
+        self.loaded_table_names.append(table_name)
+        return (
+            DataTable(
+                name=table_name, table_updated_at=self.tables_updated_at[table_name]
+            ),
+            [DataColumn(name="id", type="int", comment=None)],
+        )
+
+
+@pytest.fixture
+def mock_es():
+    with mock.patch(
+        "lib.metastore.base_metastore_loader.update_tables_by_ids"
+    ), mock.patch("logic.metastore.update_es_tables_by_id"):
+        yield
+
+
+def test_incremental_load(db_engine, mock_es):
+    metastore_dict = {"id": 9008, "acl_control": {}}
+    loader = FakeMetastoreLoader(
+        metastore_dict, {"table_a": 1000, "table_b": 1000, "table_c": None}
+    )
+    loader.load()
+    assert sorted(loader.loaded_table_names) == ["table_a", "table_b", "table_c"]
+
+    # table_a is updated, table_c has no update time
+    loader = FakeMetastoreLoader(
+        metastore_dict, {"table_a": 2000, "table_b": 1000, "table_c": None}
+    )
+    loader.load(incremental=True)
+    assert sorted(loader.loaded_table_names) == ["table_a", "table_c"]
+
+    # New tables are loaded and deleted ones are removed
+    loader = FakeMetastoreLoader(metastore_dict, {"table_a": 2000, "table_d": 1000})
+    loader.load(incremental=True)
+    assert loader.loaded_table_names == ["table_d"]
+
+    with DBSession() as session:
+        schema = get_schema_by_name("incremental_schema", 9008, session=session)
+        assert sorted(
+            table.name for table in get_table_by_schema_id(schema.id, session=session)
+        ) == ["table_a", "table_d"]
+
+
+def test_skip_failed_table(db_engine, mock_es):
+    loader = FakeMetastoreLoader(
+        {"id": 9009, "acl_control": {}},
+        {"table_a": 1000, "table_b": 1000, "table_c": 1000},
+        schema_name="failed_table_schema",
+    )
+    save_table = loader._save_table
+
+    def save_table_or_fail(schema_id, table, columns, session=None):
+        if table.name == "table_b":
+            raise Exception("Failed to save")
+        return save_table(schema_id, table, columns, session=session)
+
+    with mock.patch.object(loader, "_save_table", side_effect=save_table_or_fail):
+        loader.load()
+
+    # The tables of the same batch are committed without the failed one
+    with DBSession() as session:
+        schema = get_schema_by_name("failed_table_schema", 9009, session=session)
+        assert sorted(
+            table.name for table in get_table_by_schema_id(schema.id, session=session)
+        ) == ["table_a", "table_c"]
+
+
+def test_bulk_index_loaded_tables(db_engine):
+    redis_conn = fakeredis.FakeStrictRedis()
+    loader = FakeMetastoreLoader(
+        {"id": 9010, "acl_control": {}},
+        {"table_{}".format(i): 1000 for i in range(5)},
+        schema_name="bulk_index_schema",
+    )
+    with mock.patch(
+        "clients.redis_client.get_redis", return_value=redis_conn
+    ), mock.patch.object(
+        sync_tasks.sync_elasticsearch_changes, "apply_async"
+    ), mock.patch(
+        "lib.metastore.base_metastore_loader.update_tables_by_ids"
+    ) as update_tables_by_ids:
+        loader.load()
+
+    with DBSession() as session:
+        schema = get_schema_by_name("bulk_index_schema", 9010, session=session)
+        table_ids = [
+            table.id for table in get_table_by_schema_id(schema.id, session=session)
+        ]
+    assert len(table_ids) == 5
+
+    # Indexed once with the bulk api, not through the change feed
+    update_tables_by_ids.assert_called_once()
+    assert sorted(update_tables_by_ids.call_args[0][0]) == sorted(table_ids)
+    assert redis_conn.zcard(sync_tasks.SYNC_QUEUE_KEY) == 0
+
+
+class LoadMetastoreTestCase(TestCase):
+    def setUp(self):
+        self.redis_conn = fakeredis.FakeStrictRedis()
+        self.loader = mock.Mock()
+
+        settings_patch = mock.patch("lib.metastore.QuerybookSettings")
+        self.settings = settings_patch.start()
+        self.settings.METASTORE_FULL_LOAD_INTERVAL = 3600
+        self.addCleanup(settings_patch.stop)
+
+        for patcher in [
+            mock.patch("clients.redis_client.get_redis", return_value=self.redis_conn),
+            mock.patch("lib.metastore.get_metastore_loader", return_value=self.loader),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_incremental_calls(self):
+        return [call[1]["incremental"] for call in self.loader.load.call_args_list]
+
+    def test_full_load_interval(self):
+        load_metastore(1)
+        load_metastore(1)
+        load_metastore(2)
+        self.assertEqual(self.get_incremental_calls(), [False, True, False])
+
+        self.redis_conn.flushall()
+        load_metastore(1)
+        self.assertEqual(self.get_incremental_calls(), [False, True, False, False])
+
+    def test_always_full_load(self):
+        self.settings.METASTORE_FULL_LOAD_INTERVAL = 0
+        load_metastore(1)
+        load_metastore(1)
+        self.assertEqual(self.get_incremental_calls(), [False, False])
+
+    def test_failed_full_load(self):
+        self.loader.load.side_effect = Exception("metastore is down")
+        with self.assertRaises(Exception):
+            load_metastore(1)
+
+        self.loader.load.side_effect = None
+        load_metastore(1)
+        self.assertEqual(self.get_incremental_calls(), [False, False])
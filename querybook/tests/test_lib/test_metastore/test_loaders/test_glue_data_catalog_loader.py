@@ -134,6 +134,19 @@ class GlueDataCatalogLoaderTestCase(TestCase):
 
         self.assertEqual(result, [TABLE_NAME_B_1, TABLE_NAME_B_2, TABLE_NAME_B_3])
 
+    @mock_glue
+    def test_get_tables_updated_at(self):
+        self.client.create_database(DatabaseInput={"Name": DB_NAME_B})
+        self.client.create_table(DatabaseName=DB_NAME_B, TableInput=TABLE_INPUT_B_1)
+        self.client.create_table(DatabaseName=DB_NAME_B, TableInput=TABLE_INPUT_B_2)
+        self.client.create_table(DatabaseName=DB_NAME_B, TableInput=TABLE_INPUT_B_3)
+
+        result = self.loader.get_tables_updated_at(
+            DB_NAME_B, [TABLE_NAME_B_1, TABLE_NAME_B_3, "missing_table"]
+        )
+
+        self.assertEqual(set(result.keys()), {TABLE_NAME_B_1, TABLE_NAME_B_3})
+
     @mock_glue
     def test_get_table_and_columns(self):
         self.client.create_database(DatabaseInput={"Name": DB_NAME_A})
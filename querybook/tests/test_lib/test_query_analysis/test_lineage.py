@@ -5,6 +5,7 @@ from lib.query_analysis.lineage import (
     get_statement_placeholders,
     get_statement_schema,
     get_table_statement_type,
+    get_statement_dependencies,
 )
 
 
@@ -180,3 +181,37 @@ class GetTableStatementTypeTestCase(TestCase):
         self.assertSequenceEqual(
             get_table_statement_type(raw_query), [None, "INSERT", None]
         )
+
+
+class GetStatementDependenciesTestCase(TestCase):
+    def test_independent_statements(self):
+        statements = [
+            "select * from a",
+            "select * from b join c on b.id = c.id",
+            "insert into d select * from a",
+            "select * from d",
+            "insert into a values (1)",
+        ]
+        self.assertSequenceEqual(
+            get_statement_dependencies(statements), [set(), set(), set(), {2}, {0, 2}],
+        )
+
+    def test_other_statements(self):
+        # They change the session of the statements after them
+        for statements in [
+            ["use test", "select * from a", "select * from b"],
+            ["select * from a", "set hive.memory = 110G", "select 1"],
+            ["select * from a", "create table b (id int)"],
+        ]:
+            self.assertIsNone(get_statement_dependencies(statements))
+
+        self.assertSequenceEqual(
+            get_statement_dependencies(
+                [
+                    "select * from b",
+                    "with t as (select * from b) insert into c select * from t",
+                ],
+                language="sqlite",
+            ),
+            [set(), set()],
+        )
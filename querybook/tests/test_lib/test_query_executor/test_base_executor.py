@@ -1,5 +1,13 @@
-from unittest import TestCase
-from lib.query_executor.base_executor import QueryExecutorBaseClass
+from unittest import TestCase, mock
+
+from const.query_execution import QueryExecutionStatus
+from lib.query_executor.base_client import CursorBaseClass
+from lib.query_executor.base_executor import (
+    QueryExecutorBaseClass,
+    QueryExecutorLogger,
+)
+from lib.result_store.all_result_stores import ResultStore
+from lib.result_store.stores.base_store import BaseUploader
 
 
 class QueryExecutorBaseMatchTestCase(TestCase):
@@ -31,3 +39,419 @@ class QueryExecutorBaseMatchTestCase(TestCase):
         self.assertTrue(TestEngine.match("French", "Test"))
         self.assertFalse(TestEngine.match("English", "Prod"))
         self.assertFalse(TestEngine.match("Spanish", "Test"))
+
+
+class QueryExecutorLoggerTestCase(TestCase):
+    def setUp(self):
+        self.time = 1000
+        for patch in [
+            mock.patch("lib.query_executor.base_executor.DBSession"),
+            mock.patch("lib.query_executor.base_executor.time.time", self.get_time),
+            mock.patch(
+                "lib.query_executor.base_executor.QuerybookSettings"
+                ".QUERY_EXECUTION_UPDATE_INTERVAL",
+                5,
+            ),
+            mock.patch(
+                "lib.query_executor.base_executor.QuerybookSettings"
+                ".QUERY_EXECUTION_UPDATE_LOG_SIZE",
+                100,
+            ),
+        ]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        socketio_patch = mock.patch("lib.query_executor.base_executor.socketio")
+        self.socketio = socketio_patch.start()
+        self.addCleanup(socketio_patch.stop)
+
+        qe_logic_patch = mock.patch("lib.query_executor.base_executor.qe_logic")
+        self.qe_logic = qe_logic_patch.start()
+        self.addCleanup(qe_logic_patch.stop)
+
+        log_buffer_patch = mock.patch("lib.query_executor.base_executor.log_buffer")
+        self.log_buffer = log_buffer_patch.start()
+        self.addCleanup(log_buffer_patch.stop)
+
+        self.logger = QueryExecutorLogger(
+            1, mock.Mock(), "select 1;select 2", [(0, 8), (9, 17)]
+        )
+        self.start_statement(0, 10)
+        self.socketio.emit.reset_mock()
+
+    def start_statement(self, statement_index, statement_execution_id):
+        self.qe_logic.create_statement_execution.return_value.to_dict.return_value = {
+            "id": statement_execution_id
+        }
+        self.logger.on_statement_start(statement_index)
+
+    def get_time(self):
+        return self.time
+
+    def get_statement_updates(self):
+        return [
+            call[0][1]
+            for call in self.socketio.emit.call_args_list
+            if call[0][0] == "statement_update"
+        ]
+
+    def test_merge_updates_until_interval(self):
+        self.logger.on_statement_update(log="a", meta_info="url", percent_complete=1)
+        self.time += 1
+        self.logger.on_statement_update(log="b", meta_info="url", percent_complete=2)
+        self.time += 1
+        self.logger.on_statement_update(log="c", meta_info="url", percent_complete=3)
+        self.assertEqual(len(self.get_statement_updates()), 1)
+
+        self.time += 5
+        self.logger.on_statement_update(log="", meta_info="url", percent_complete=3)
+        self.assertEqual(
+            self.get_statement_updates()[1],
+            {
+                "query_execution_id": 1,
+                "id": 10,
+                "log": ["b", "c"],
+                "percent_complete": 3,
+            },
+        )
+        self.assertEqual(self.logger._log_cache, "a\nb\nc")
+
+    def test_follower_ids_fetched_per_statement(self):
+        for _ in range(3):
+            self.time += 5
+            self.logger.on_statement_update(log="a")
+        self.assertEqual(len(self.get_statement_updates()), 3)
+        self.qe_logic.get_follower_query_execution_ids.assert_called_once_with(1)
+
+    def test_flush_large_log(self):
+        self.logger.on_statement_update(log="a")
+        self.logger.on_statement_update(log="b" * 100)
+        self.assertEqual(len(self.get_statement_updates()), 2)
+
+    def test_buffer_and_upload_logs(self):
+        with mock.patch(
+            "lib.query_executor.base_executor.description_length", 4
+        ), mock.patch("lib.query_executor.base_executor.GenericUploader") as uploader:
+            self.logger.on_statement_update(log="abcdefg")
+            self.qe_logic.update_statement_execution.assert_called_with(
+                10, has_log=True, log_path="stream://", commit=False, session=mock.ANY
+            )
+            self.time += 5
+            self.logger.on_statement_update(log="hi")
+
+            self.log_buffer.iter_buffered_statement_execution_logs.return_value = [
+                "abcd",
+                "efg\n",
+                "hi",
+            ]
+            self.assertEqual(
+                self.logger._upload_log(10),
+                (uploader.return_value.__enter__.return_value.upload_url, True),
+            )
+
+        # Logs are buffered in chunks, the rest is added before the upload
+        self.assertEqual(
+            self.log_buffer.append_statement_execution_logs.call_args_list,
+            [mock.call(10, ["abcd"]), mock.call(10, ["efg\n"]), mock.call(10, ["hi"])],
+        )
+        self.assertEqual(
+            uploader.return_value.__enter__.return_value.write.call_args_list,
+            [mock.call("abcd"), mock.call("efg\n"), mock.call("hi")],
+        )
+        self.log_buffer.delete_buffered_statement_execution_logs.assert_called_once_with(
+            10
+        )
+
+    def test_flush_on_cancel(self):
+        self.logger.on_statement_update(log="a")
+        self.logger.on_statement_update(log="b")
+        with mock.patch.object(self.logger, "_upload_log", return_value=(None, False)):
+            self.logger.on_cancel()
+        self.assertEqual(self.get_statement_updates()[-1]["log"], ["b"])
+
+    def test_parallel_statements(self):
+        self.logger.on_statement_update(log="a", percent_complete=10)
+        self.start_statement(1, 11)
+        self.logger.on_statement_update(log="b", percent_complete=20)
+
+        self.time += 5
+        self.logger.use_statement(10)
+        self.logger.on_statement_update(log="c", percent_complete=30)
+        self.logger.use_statement(11)
+        self.logger.on_statement_update(log="d", percent_complete=40)
+
+        self.assertEqual(
+            [(update["id"], update["log"]) for update in self.get_statement_updates()],
+            [(10, ["a"]), (11, ["b"]), (10, ["c"]), (11, ["d"])],
+        )
+        self.assertEqual(self.logger._log_cache, "b\nd")
+        self.assertEqual(
+            self.logger._statement_progress,
+            {10: {"percent_complete": 30}, 11: {"percent_complete": 40}},
+        )
+
+        with mock.patch.object(self.logger, "_upload_log", return_value=(None, False)):
+            self.logger.on_cancel()
+        self.assertEqual(
+            [
+                call[0][0]
+                for call in self.qe_logic.update_statement_execution.call_args_list
+                if call[1].get("status") is not None
+            ],
+            [10, 11],
+        )
+
+
+class FakeCursor(object):
+    """Completes after the number of polls given in the query"""
+
+    def __init__(self, events):
+        self._events = events
+        self._polls_left = 0
+        self.query = None
+
+    def run(self, query):
+        self.query = query
+        self._polls_left = int(query.split("/*")[1].split("*/")[0])
+        self._events.append(("run", query.split(" ")[-1]))
+
+    def poll(self):
+        self._polls_left -= 1
+        return self._polls_left <= 0
+
+    def cancel(self):
+        pass
+
+    def close(self):
+        pass
+
+    def get_logs(self):
+        return ""
+
+    @property
+    def percent_complete(self):
+        return 0
+
+    @property
+    def tracking_url(self):
+        return None
+
+    @property
+    def poll_interval(self):
+        return None
+
+
+class ParallelStatementsTestCase(TestCase):
+    def setUp(self):
+        patch = mock.patch(
+            "lib.query_executor.base_executor.QuerybookSettings"
+            ".QUERY_EXECUTION_MAX_PARALLEL_STATEMENTS",
+            4,
+        )
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        self.events = []
+        events = self.events
+        logger = mock.Mock()
+        logger.statement_execution_ids = []
+
+        def on_statement_start(statement_index):
+            logger.statement_execution_ids.append(100 + statement_index)
+
+        def on_statement_end(cursor):
+            events.append(("end", cursor.query.split(" ")[-1]))
+
+        logger.on_statement_start.side_effect = on_statement_start
+        logger.on_statement_end.side_effect = on_statement_end
+
+        client = mock.Mock()
+        client.cursor.side_effect = lambda: FakeCursor(events)
+        self.client = client
+
+        class TestExecutor(QueryExecutorBaseClass):
+            @classmethod
+            def EXECUTOR_LANGUAGE(cls):
+                return "test"
+
+            @classmethod
+            def EXECUTOR_NAME(cls):
+                return "test"
+
+            @classmethod
+            def EXECUTOR_TEMPLATE(cls):
+                return None
+
+            @classmethod
+            def LOGGER_CLASS(cls):
+                return lambda *args: logger
+
+            @classmethod
+            def _get_client(cls, client_setting):
+                return client
+
+        self.executor_class = TestExecutor
+
+    def run_query(self, statements):
+        query = ""
+        statement_ranges = []
+        for statement in statements:
+            statement_ranges.append((len(query), len(query) + len(statement)))
+            query += statement + ";"
+
+        executor = self.executor_class(1, None, query, statement_ranges, {})
+        for _ in range(20):
+            executor.poll()
+            if executor.status != QueryExecutionStatus.RUNNING:
+                break
+        return executor
+
+    def test_run_independent_statements_together(self):
+        executor = self.run_query(
+            [
+                "/*3*/ select * from a",
+                "/*1*/ select * from b",
+                "/*1*/ insert into c select * from a",
+                "/*1*/ select * from c",
+            ]
+        )
+        self.assertEqual(executor.status, QueryExecutionStatus.DONE)
+        self.assertEqual(
+            self.events,
+            [
+                ("run", "a"),
+                ("run", "b"),
+                ("run", "a"),
+                ("run", "c"),
+                ("end", "a"),
+                ("end", "b"),
+                ("end", "a"),
+                ("end", "c"),
+            ],
+        )
+
+    def test_run_session_statements_in_order(self):
+        for session_statement in ["/*1*/ use db", "/*1*/ set x = y"]:
+            self.events.clear()
+            self.client.cursor.reset_mock()
+            executor = self.run_query(
+                [session_statement, "/*2*/ select * from a", "/*1*/ select * from b"]
+            )
+            self.assertEqual(executor.status, QueryExecutionStatus.DONE)
+            # Every statement runs on the same cursor, one after the other
+            self.assertEqual(self.client.cursor.call_count, 1)
+            self.assertEqual(
+                self.events[2:],
+                [("run", "a"), ("end", "a"), ("run", "b"), ("end", "b")],
+            )
+
+    def test_run_statement_after_dependency(self):
+        executor = self.run_query(
+            ["/*2*/ insert into a select * from b", "/*1*/ select * from a"]
+        )
+        self.assertEqual(executor.status, QueryExecutionStatus.DONE)
+        self.assertEqual(
+            self.events, [("run", "b"), ("end", "b"), ("run", "a"), ("end", "a")],
+        )
+
+
+class ListCursor(CursorBaseClass):
+    def __init__(self, rows):
+        self._rows = rows
+        self.cancelled = False
+
+    def run(self, query):
+        pass
+
+    def poll(self):
+        return True
+
+    def cancel(self):
+        self.cancelled = True
+
+    def get_one_row(self):
+        return self.get_n_rows(1)[0]
+
+    def get_n_rows(self, n):
+        rows = self._rows[:n]
+        self._rows = self._rows[n:]
+        return rows
+
+    def get_columns(self):
+        return ["id", "name"]
+
+
+class MemoryUploader(BaseUploader):
+    uploads = {}
+
+    def __init__(self, uri: str):
+        self._uri = uri
+
+    @classmethod
+    def get_max_upload_size(cls):
+        return 100
+
+    def start(self):
+        self.uploads[self._uri] = ""
+
+    def write(self, data):
+        self.uploads[self._uri] += data
+        return True
+
+    def end(self):
+        pass
+
+
+class UploadQueryResultTestCase(TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.dict(
+                "lib.result_store.ALL_RESULT_STORES",
+                {"memory": ResultStore(None, MemoryUploader)},
+            ),
+            mock.patch(
+                "lib.result_store.QuerybookSettings.RESULT_STORE_TYPE", "memory"
+            ),
+            mock.patch("lib.result_store.QuerybookSettings.RESULT_STORE_FORMAT", "csv"),
+            mock.patch("env.QuerybookSettings.RESULT_MAX_ROWS", 0),
+            mock.patch("lib.query_executor.base_executor.DBSession"),
+            mock.patch("lib.query_executor.base_executor.qe_logic"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.logger = QueryExecutorLogger(1, mock.Mock(), "select 1", [(0, 8)])
+
+    def upload(self, rows):
+        cursor = ListCursor(rows)
+        path, row_count, _, truncated = self.logger._upload_query_result(cursor, 1)
+        self.assertEqual(path, "memory://querybook_temp/1/result.csv")
+        return (
+            MemoryUploader.uploads["querybook_temp/1/result.csv"],
+            row_count,
+            truncated,
+            cursor.cancelled,
+        )
+
+    def test_not_truncated(self):
+        self.assertEqual(
+            self.upload([[1, "a"], [2, "b"]]), ("id,name\n1,a\n2,b\n", 3, False, False),
+        )
+
+    def test_truncated_by_rows(self):
+        with mock.patch("env.QuerybookSettings.RESULT_MAX_ROWS", 2):
+            self.assertEqual(
+                self.upload([[i, "a"] for i in range(10)]),
+                ("id,name\n0,a\n1,a\n", 3, True, True),
+            )
+
+    def test_truncated_by_size(self):
+        # 8 bytes of header, then 11 bytes per row, 100 bytes max
+        csv, row_count, truncated, cancelled = self.upload(
+            [[i, "abcdefg"] for i in range(10, 30)]
+        )
+        self.assertEqual(len(csv), 96)
+        self.assertEqual(row_count, 9)
+        self.assertTrue(truncated)
+        self.assertTrue(cancelled)
@@ -0,0 +1,75 @@
+from unittest import TestCase, mock
+
+from lib.query_executor.client_pool import ClientPool, get_client_key
+
+
+def create_client(healthy=True):
+    client = mock.Mock()
+    client.is_healthy.return_value = healthy
+    return client
+
+
+class GetClientKeyTestCase(TestCase):
+    def test_same_settings(self):
+        self.assertEqual(
+            get_client_key({"connection_string": "a", "proxy_user": "bob"}),
+            get_client_key({"proxy_user": "bob", "connection_string": "a"}),
+        )
+        self.assertNotEqual(
+            get_client_key({"connection_string": "a", "proxy_user": "bob"}),
+            get_client_key({"connection_string": "a", "proxy_user": "alice"}),
+        )
+
+
+class ClientPoolTestCase(TestCase):
+    def setUp(self):
+        time_patch = mock.patch(
+            "lib.query_executor.client_pool.time.time", return_value=0
+        )
+        self.mock_time = time_patch.start()
+        self.addCleanup(time_patch.stop)
+
+    def test_reuse_client(self):
+        pool = ClientPool(max_size=10, idle_timeout=600)
+        client = pool.acquire("a", create_client)
+        pool.release("a", client)
+
+        self.assertEqual(pool.acquire("a", create_client), client)
+        self.assertNotEqual(pool.acquire("a", create_client), client)
+        self.assertNotEqual(pool.acquire("b", create_client), client)
+
+    def test_replace_unhealthy_client(self):
+        pool = ClientPool(max_size=10, idle_timeout=600)
+        client = create_client(healthy=False)
+        pool.release("a", client)
+
+        self.assertNotEqual(pool.acquire("a", create_client), client)
+        client.close.assert_called_once()
+        self.assertEqual(pool.size, 0)
+
+    def test_close_idle_client(self):
+        pool = ClientPool(max_size=10, idle_timeout=600)
+        client = create_client()
+        pool.release("a", client)
+
+        self.mock_time.return_value = 601
+        self.assertNotEqual(pool.acquire("a", create_client), client)
+        client.close.assert_called_once()
+
+    def test_max_size(self):
+        pool = ClientPool(max_size=2, idle_timeout=600)
+        clients = [create_client() for _ in range(3)]
+        for client in clients:
+            pool.release("a", client)
+
+        self.assertEqual(pool.size, 2)
+        clients[0].close.assert_called_once()
+        clients[1].close.assert_not_called()
+
+    def test_disabled(self):
+        pool = ClientPool(max_size=0, idle_timeout=600)
+        client = create_client()
+        pool.release("a", client)
+
+        self.assertEqual(pool.size, 0)
+        client.close.assert_called_once()
@@ -0,0 +1,59 @@
+from unittest import TestCase, mock
+
+import fakeredis
+
+from lib.query_executor.log_buffer import (
+    append_statement_execution_logs,
+    delete_buffered_statement_execution_logs,
+    get_buffered_statement_execution_logs,
+    get_statement_execution_stream_logs,
+    iter_buffered_statement_execution_logs,
+)
+
+
+class LogBufferTestCase(TestCase):
+    def setUp(self):
+        self.redis_conn = fakeredis.FakeStrictRedis()
+
+        settings_patch = mock.patch("lib.query_executor.log_buffer.QuerybookSettings")
+        self.settings = settings_patch.start()
+        self.settings.QUERY_EXECUTION_LOG_BUFFER_MAX_CHUNKS = 250
+        self.settings.QUERY_EXECUTION_LOG_BUFFER_TTL = 60
+        self.addCleanup(settings_patch.stop)
+
+        redis_patch = mock.patch(
+            "clients.redis_client.get_redis", return_value=self.redis_conn
+        )
+        redis_patch.start()
+        self.addCleanup(redis_patch.stop)
+
+    def test_read_logs(self):
+        append_statement_execution_logs(1, ["a", "中文"])
+        append_statement_execution_logs(1, ["c"])
+        append_statement_execution_logs(2, ["d"])
+
+        self.assertEqual(get_buffered_statement_execution_logs(1), ["a", "中文", "c"])
+        self.assertEqual(
+            get_buffered_statement_execution_logs(1, limit=2, from_end=True),
+            ["中文", "c"],
+        )
+        self.assertEqual(get_buffered_statement_execution_logs(1, limit=1), ["a"])
+        self.assertLessEqual(self.redis_conn.ttl("statement_execution_log/1"), 60)
+
+        delete_buffered_statement_execution_logs(1)
+        self.assertEqual(get_buffered_statement_execution_logs(1), [])
+        self.assertEqual(get_buffered_statement_execution_logs(2), ["d"])
+
+    def test_keep_last_chunks(self):
+        logs = [str(i) for i in range(300)]
+        append_statement_execution_logs(1, logs[:200])
+        append_statement_execution_logs(1, logs[200:])
+        self.assertEqual(list(iter_buffered_statement_execution_logs(1)), logs[50:])
+
+    @mock.patch("lib.query_executor.log_buffer.qe_logic")
+    def test_read_database_logs(self, qe_logic):
+        qe_logic.get_statement_execution_stream_logs.return_value = [mock.Mock(log="a")]
+        self.assertEqual(get_statement_execution_stream_logs(1), ["a"])
+
+        append_statement_execution_logs(1, ["b"])
+        self.assertEqual(get_statement_execution_stream_logs(1), ["b"])
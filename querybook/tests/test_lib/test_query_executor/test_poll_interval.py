@@ -0,0 +1,34 @@
+from unittest import TestCase, mock
+
+from lib.query_executor.poll_interval import BackoffPollInterval, FixedPollInterval
+
+
+class BackoffPollIntervalTestCase(TestCase):
+    def test_backoff(self):
+        poll_interval = BackoffPollInterval(min_interval=0.25, max_interval=2)
+        self.assertEqual(
+            [poll_interval.next_interval(False) for _ in range(6)],
+            [0.25, 0.5, 1, 2, 2, 2],
+        )
+
+    def test_reset_on_progress(self):
+        poll_interval = BackoffPollInterval(min_interval=0.25, max_interval=2)
+        for _ in range(3):
+            poll_interval.next_interval(False)
+        self.assertEqual(poll_interval.next_interval(True), 0.25)
+        self.assertEqual(poll_interval.next_interval(False), 0.5)
+
+        poll_interval.reset()
+        self.assertEqual(poll_interval.next_interval(False), 0.25)
+
+
+class FixedPollIntervalTestCase(TestCase):
+    def test_fixed(self):
+        with mock.patch("lib.query_executor.poll_interval.time.time", return_value=0):
+            poll_interval = FixedPollInterval()
+            self.assertEqual(poll_interval.next_interval(True), 1)
+
+        with mock.patch(
+            "lib.query_executor.poll_interval.time.time", return_value=1000
+        ):
+            self.assertEqual(poll_interval.next_interval(True), 10)
@@ -6,6 +6,8 @@ from lib.query_executor.utils import (
     merge_str,
     serialize_cell,
     row_to_csv,
+    serialize_column,
+    RowBatchCSVSerializer,
     format_if_internal_error_with_stack_trace,
 )
 
@@ -62,6 +64,66 @@ class RowToCSVTestCase(TestCase):
         self.assertEqual(row_to_csv(quote_row), '123,"Hello""World",123\n')
 
 
+class SerializeColumnTestCase(TestCase):
+    def test_homogeneous_column(self):
+        self.assertEqual(serialize_column(["a", "b"]), ["a", "b"])
+        self.assertEqual(serialize_column([1, 23]), ["1", "23"])
+        self.assertEqual(
+            serialize_column([0.5, float("nan"), float("inf")]),
+            ["0.5", "NaN", "Infinity"],
+        )
+        self.assertEqual(
+            serialize_column([datetime.date(2020, 1, 2)]), ["2020-01-02"],
+        )
+
+    def test_mixed_column(self):
+        column = [1, None, True, "a", [1], datetime.datetime(2020, 1, 2, 3, 4, 5)]
+        self.assertEqual(
+            serialize_column(column), [serialize_cell(cell) for cell in column]
+        )
+
+
+class RowBatchCSVSerializerTestCase(TestCase):
+    def test_same_as_row_to_csv(self):
+        rows = [
+            ["Hello World", 1234, 0.5, "中文", None],
+            [123, "Hello\nWorld", 123, [], {}],
+            [True, "Hello,World", 1.5, 'Hello"World', ""],
+        ]
+        serializer = RowBatchCSVSerializer()
+        self.assertEqual(
+            serializer.serialize(rows), "".join(row_to_csv(row) for row in rows)
+        )
+        # Serializer can be reused for the next batch
+        self.assertEqual(serializer.serialize(rows[:1]), row_to_csv(rows[0]))
+        # The rows can be given already transposed
+        self.assertEqual(
+            serializer.serialize(rows, list(zip(*rows))),
+            "".join(row_to_csv(row) for row in rows),
+        )
+
+    def test_edge_cases(self):
+        cells = ["", None, 'Hello"World', "Hello\r\nWorld", "Hello,World", " ", 1]
+        rows_per_batch = (
+            [[[cell]] for cell in cells]
+            + [[[cell] for cell in cells]]
+            + [[[cell, other_cell] for other_cell in cells] for cell in cells]
+            + [[[]]]
+        )
+        serializer = RowBatchCSVSerializer()
+        for rows in rows_per_batch:
+            self.assertEqual(
+                serializer.serialize(rows), "".join(row_to_csv(row) for row in rows)
+            )
+
+    def test_carriage_return(self):
+        rows = [["Hello\rWorld", 1]]
+        self.assertEqual(RowBatchCSVSerializer().serialize(rows), '"Hello\rWorld",1\n')
+
+    def test_empty_batch(self):
+        self.assertEqual(RowBatchCSVSerializer().serialize([]), "")
+
+
 class FormatIfInternalErrorWithStackTraceTestCase(TestCase):
     def test_is_internal_error(self):
         self.assertEqual(
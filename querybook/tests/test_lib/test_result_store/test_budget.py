@@ -0,0 +1,98 @@
+from unittest import TestCase, mock
+
+from lib.result_store import GenericUploader
+from lib.result_store.all_result_stores import ResultStore
+from lib.result_store.budget import ResultBudget
+from lib.result_store.stores.base_store import BaseUploader
+
+
+class MemoryUploader(BaseUploader):
+    supports_binary = True
+    max_upload_size = 0
+
+    def __init__(self, uri: str):
+        self.chunks = []
+
+    @classmethod
+    def get_max_upload_size(cls):
+        return cls.max_upload_size
+
+    def start(self):
+        pass
+
+    def write(self, data):
+        self.chunks.append(data)
+        return True
+
+    def end(self):
+        pass
+
+
+class ResultBudgetTestCase(TestCase):
+    def test_rows(self):
+        budget = ResultBudget(max_rows=10)
+        self.assertEqual(budget.take_rows(6), 6)
+        self.assertFalse(budget.exceeded)
+        self.assertEqual(budget.take_rows(6), 4)
+        self.assertTrue(budget.exceeded)
+        self.assertEqual(budget.take_rows(1), 0)
+
+    def test_bytes(self):
+        budget = ResultBudget(max_bytes=10)
+        self.assertTrue(budget.take_bytes(6))
+        self.assertFalse(budget.take_bytes(6))
+        self.assertTrue(budget.exceeded)
+        # Smaller data can still fit
+        self.assertTrue(budget.take_bytes(4))
+        self.assertEqual(budget.num_bytes, 10)
+
+    def test_no_limit(self):
+        budget = ResultBudget()
+        self.assertEqual(budget.take_rows(10 ** 9), 10 ** 9)
+        self.assertTrue(budget.take_bytes(10 ** 12))
+        self.assertFalse(budget.exceeded)
+
+    def test_limit_bytes(self):
+        budget = ResultBudget(max_bytes=10)
+        budget.limit_bytes(0)
+        budget.limit_bytes(20)
+        self.assertFalse(budget.take_bytes(11))
+
+        budget = ResultBudget()
+        budget.limit_bytes(20)
+        self.assertFalse(budget.take_bytes(21))
+
+
+class GenericUploaderBudgetTestCase(TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.dict(
+                "lib.result_store.ALL_RESULT_STORES",
+                {"memory": ResultStore(None, MemoryUploader)},
+            ),
+            mock.patch(
+                "lib.result_store.QuerybookSettings.RESULT_STORE_TYPE", "memory"
+            ),
+            mock.patch(
+                "lib.result_store.QuerybookSettings.RESULT_STORE_COMPRESSION", "none"
+            ),
+            mock.patch.object(MemoryUploader, "max_upload_size", 10),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_store_limit(self):
+        uploader = GenericUploader("key")
+        uploader.start()
+        self.assertTrue(uploader.write("中文"))  # 6 bytes
+        self.assertFalse(uploader.write("abcde"))
+        self.assertTrue(uploader.write("abcd"))
+        self.assertEqual(uploader._uploader.chunks, ["中文", "abcd"])
+        self.assertTrue(uploader.budget.exceeded)
+
+    def test_budget_limit(self):
+        uploader = GenericUploader("key", budget=ResultBudget(max_bytes=4))
+        uploader.start()
+        self.assertFalse(uploader.write("abcde"))
+        self.assertTrue(uploader.write("abcd"))
@@ -0,0 +1,121 @@
+from unittest import TestCase
+from io import BytesIO
+import datetime
+
+from lib.query_executor.utils import row_to_csv
+from lib.result_store import project_csv_columns
+from lib.result_store.columnar import (
+    ColumnarResultReader,
+    ColumnarResultWriter,
+    is_columnar_path,
+)
+from lib.result_store.exc import UnknownResultColumns
+
+
+class FakeUploader(object):
+    def __init__(self, max_size=None):
+        self.chunks = []
+        self.max_size = max_size
+
+    def write(self, data: bytes) -> bool:
+        if self.max_size is not None and len(self.value) + len(data) > self.max_size:
+            return False
+        self.chunks.append(data)
+        return True
+
+    @property
+    def value(self):
+        return b"".join(self.chunks)
+
+
+COLUMNS = ["id", "name", "score", "created_at", "tags"]
+ROWS = [
+    [1, "Hello", 0.5, datetime.datetime(2020, 1, 2, 3, 4, 5), [1, 2]],
+    [2, None, 1.5, datetime.datetime(2020, 1, 3, 3, 4, 5), []],
+    [3, "Hello,\n World", None, None, None],
+]
+
+
+def write_columnar_result(rows, batch_size=2, uploader=None):
+    uploader = uploader or FakeUploader()
+    writer = ColumnarResultWriter(uploader, COLUMNS, batch_size=batch_size)
+    for row in rows:
+        if not writer.write_row(row):
+            break
+    writer.close()
+    return uploader
+
+
+class IsColumnarPathTestCase(TestCase):
+    def test_is_columnar_path(self):
+        self.assertTrue(is_columnar_path("s3://querybook_temp/1/result.arrow"))
+        self.assertFalse(is_columnar_path("s3://querybook_temp/1/result.csv"))
+        self.assertFalse(is_columnar_path(None))
+
+
+class ColumnarResultTestCase(TestCase):
+    def test_typed_round_trip(self):
+        uploader = write_columnar_result(ROWS)
+        reader = ColumnarResultReader(BytesIO(uploader.value))
+
+        self.assertEqual(reader.columns, COLUMNS)
+        self.assertEqual(
+            reader.read_rows(),
+            [
+                [1, "Hello", 0.5, datetime.datetime(2020, 1, 2, 3, 4, 5), "[1, 2]"],
+                [2, None, 1.5, datetime.datetime(2020, 1, 3, 3, 4, 5), "[]"],
+                [3, "Hello,\n World", None, None, None],
+            ],
+        )
+
+    def test_csv_view_matches_csv_format(self):
+        uploader = write_columnar_result(ROWS)
+        reader = ColumnarResultReader(BytesIO(uploader.value))
+
+        expected = [row_to_csv(COLUMNS)] + [row_to_csv(row) for row in ROWS]
+        self.assertEqual("".join(reader.iter_csv()), "".join(expected))
+
+    def test_read_csv_with_projection(self):
+        uploader = write_columnar_result(ROWS)
+        reader = ColumnarResultReader(BytesIO(uploader.value))
+
+        self.assertEqual(
+            reader.read_csv(number_of_lines=3, columns=["name", "id"]),
+            [["name", "id"], ["Hello", "1"], ["null", "2"]],
+        )
+
+    def test_read_csv_page(self):
+        uploader = write_columnar_result(ROWS, batch_size=1)
+        reader = ColumnarResultReader(BytesIO(uploader.value))
+
+        self.assertEqual(
+            reader.read_csv_page(offset=1, limit=1),
+            [COLUMNS, ["2", "null", "1.5", "2020-01-03T03:04:05", "[]"]],
+        )
+
+    def test_invalid_projection(self):
+        uploader = write_columnar_result(ROWS)
+        reader = ColumnarResultReader(BytesIO(uploader.value))
+
+        with self.assertRaises(UnknownResultColumns) as context:
+            reader.read_rows(columns=["id", "unknown"])
+        self.assertEqual(context.exception.unknown_columns, ["unknown"])
+
+        with self.assertRaises(UnknownResultColumns):
+            project_csv_columns([COLUMNS, ["1"] * 5], ["name", "unknown"])
+
+    def test_empty_result(self):
+        uploader = write_columnar_result([])
+        reader = ColumnarResultReader(BytesIO(uploader.value))
+
+        self.assertEqual(reader.columns, COLUMNS)
+        self.assertEqual(reader.read_csv(), [COLUMNS])
+
+    def test_stop_when_uploader_is_full(self):
+        two_rows_uploader = write_columnar_result(ROWS[:2], batch_size=1)
+        uploader = write_columnar_result(
+            ROWS, batch_size=1, uploader=FakeUploader(len(two_rows_uploader.value))
+        )
+        reader = ColumnarResultReader(BytesIO(uploader.value))
+
+        self.assertEqual(len(reader.read_rows()), 2)
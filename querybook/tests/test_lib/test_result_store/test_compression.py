@@ -0,0 +1,87 @@
+from unittest import TestCase
+from io import BytesIO
+
+from clients.common import StreamChunkReader
+from lib.result_store.columnar import is_columnar_path
+from lib.result_store.compression import (
+    GzipCompression,
+    ZstdCompression,
+    get_compression,
+    get_compression_by_path,
+)
+
+CSV_TEXT = "".join('{},"中文,{}",hello\n'.format(i, i) for i in range(1000))
+
+
+def compress(compression, text: str, chunk_size=100) -> bytes:
+    compressor = compression.compressor()
+    data = text.encode("utf-8")
+    chunks = [
+        compressor.compress(data[i : i + chunk_size])
+        for i in range(0, len(data), chunk_size)
+    ]
+    return b"".join(chunks) + compressor.flush()
+
+
+class GetCompressionTestCase(TestCase):
+    def test_get_compression(self):
+        self.assertIsNone(get_compression(None))
+        self.assertIsNone(get_compression("none"))
+        self.assertIsInstance(get_compression("gzip"), GzipCompression)
+        self.assertIsInstance(get_compression("zstd"), ZstdCompression)
+
+    def test_get_compression_by_path(self):
+        self.assertIsNone(get_compression_by_path("querybook_temp/1/result.csv"))
+        self.assertIsInstance(
+            get_compression_by_path("querybook_temp/1/result.csv.gz"), GzipCompression
+        )
+        self.assertIsInstance(
+            get_compression_by_path("querybook_temp/1/log.txt.zst"), ZstdCompression
+        )
+
+    def test_compressed_columnar_path(self):
+        self.assertTrue(is_columnar_path("querybook_temp/1/result.arrow.gz"))
+        self.assertFalse(is_columnar_path("querybook_temp/1/result.csv.gz"))
+
+
+class StreamChunkReaderTestCase(TestCase):
+    def _assert_reads_text(self, compression):
+        compressed = compress(compression, CSV_TEXT)
+
+        reader = StreamChunkReader(
+            BytesIO(compressed),
+            compression.decompressor(),
+            read_size=64,
+            max_read_size=None,
+        )
+        self.assertEqual(
+            "\n".join(reader.read_lines()), CSV_TEXT[:-1],
+        )
+
+        with compression.open_stream(BytesIO(compressed)) as stream:
+            self.assertEqual(stream.read().decode("utf-8"), CSV_TEXT)
+
+    def test_gzip(self):
+        self._assert_reads_text(GzipCompression())
+
+    def test_zstd(self):
+        self._assert_reads_text(ZstdCompression())
+
+    def test_only_reads_needed_chunks(self):
+        compression = GzipCompression()
+        stream = BytesIO(compress(compression, CSV_TEXT))
+        reader = StreamChunkReader(
+            stream, compression.decompressor(), read_size=64, max_read_size=None
+        )
+
+        self.assertEqual(
+            reader.read_csv(number_of_lines=3),
+            [["0", "中文,0", "hello"], ["1", "中文,1", "hello"], ["2", "中文,2", "hello"],],
+        )
+        self.assertLess(stream.tell(), len(stream.getvalue()))
+
+    def test_uncompressed(self):
+        reader = StreamChunkReader(
+            BytesIO(CSV_TEXT.encode("utf-8")), read_size=7, max_read_size=None
+        )
+        self.assertEqual("\n".join(reader.read_lines()), CSV_TEXT[:-1])
@@ -0,0 +1,52 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from lib.query_executor.utils import row_to_csv
+from lib.result_store import GenericReader
+from lib.result_store.compression import GzipCompression
+
+ROWS = [["id", "text"]] + [[str(i), "中文\n{}".format(i)] for i in range(500)]
+CSV_BYTES = "".join(map(row_to_csv, ROWS)).encode("utf-8")
+
+
+class IterRawTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        store_path_patch = mock.patch(
+            "lib.result_store.stores.file_store.FILE_STORE_PATH",
+            self.temp_dir.name + "/",
+        )
+        store_path_patch.start()
+        self.addCleanup(store_path_patch.stop)
+        self.addCleanup(self.temp_dir.cleanup)
+
+        with open(os.path.join(self.temp_dir.name, "result.csv"), "wb") as f:
+            f.write(CSV_BYTES)
+
+        compressor = GzipCompression().compressor()
+        with open(os.path.join(self.temp_dir.name, "result.csv.gz"), "wb") as f:
+            f.write(compressor.compress(CSV_BYTES) + compressor.flush())
+
+    def _iter_raw(self, path, **kwargs):
+        chunks = list(GenericReader(path).iter_raw(chunk_size=100, **kwargs))
+        self.assertTrue(all(len(chunk) <= 100 for chunk in chunks))
+        return b"".join(chunks)
+
+    def test_iter_raw(self):
+        for path in ["file://result.csv", "file://result.csv.gz"]:
+            self.assertEqual(self._iter_raw(path), CSV_BYTES)
+
+    def test_iter_raw_range(self):
+        for path in ["file://result.csv", "file://result.csv.gz"]:
+            for offset, end in [(0, 1), (50, 250), (99, 101), (1000, None)]:
+                self.assertEqual(
+                    self._iter_raw(path, offset=offset, end=end), CSV_BYTES[offset:end],
+                )
+
+    def test_raw_size(self):
+        self.assertEqual(
+            GenericReader("file://result.csv").get_raw_size(), len(CSV_BYTES)
+        )
+        # Only known after decompressing the whole result
+        self.assertIsNone(GenericReader("file://result.csv.gz").get_raw_size())
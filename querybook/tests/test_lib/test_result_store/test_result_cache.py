@@ -0,0 +1,80 @@
+from unittest import TestCase, mock
+
+import fakeredis
+
+from lib.result_store.result_cache import (
+    cache_result,
+    get_cached_result,
+    get_result_cache_stats,
+    invalidate_cached_result,
+)
+
+RESULT = [["id", "name"], ["1", "hello"], ["2", "world"]]
+
+
+class ResultCacheTestCase(TestCase):
+    def setUp(self):
+        self.redis_conn = fakeredis.FakeStrictRedis()
+
+        settings_patch = mock.patch("lib.result_store.result_cache.QuerybookSettings")
+        self.settings = settings_patch.start()
+        self.settings.RESULT_CACHE_MAX_ENTRIES = 2
+        self.settings.RESULT_CACHE_MAX_ENTRY_SIZE = 1000
+        self.addCleanup(settings_patch.stop)
+
+        time_patch = mock.patch("lib.result_store.result_cache.time.time")
+        self.time = time_patch.start()
+        self.time.return_value = 0
+        self.addCleanup(time_patch.stop)
+
+    def _get(self, statement_execution_id):
+        return get_cached_result(statement_execution_id, redis_conn=self.redis_conn)
+
+    def _set(self, statement_execution_id, result=RESULT):
+        self.time.return_value += 1
+        cache_result(statement_execution_id, result, redis_conn=self.redis_conn)
+
+    def test_hit_and_miss(self):
+        self.assertIsNone(self._get(1))
+        self._set(1)
+        self.assertEqual(self._get(1), RESULT)
+
+        stats = get_result_cache_stats(redis_conn=self.redis_conn)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertEqual(stats["entries"], 1)
+
+    def test_evict_least_recently_used(self):
+        self._set(1)
+        self._set(2)
+
+        # Reading 1 makes 2 the least recently used
+        self.time.return_value += 1
+        self._get(1)
+        self._set(3)
+
+        self.assertEqual(self._get(1), RESULT)
+        self.assertIsNone(self._get(2))
+        self.assertEqual(self._get(3), RESULT)
+        self.assertEqual(
+            get_result_cache_stats(redis_conn=self.redis_conn)["entries"], 2
+        )
+
+    def test_skip_large_result(self):
+        self._set(1, [["a" * 1000]])
+        self.assertIsNone(self._get(1))
+
+    def test_invalidate(self):
+        self._set(1)
+        invalidate_cached_result(1, redis_conn=self.redis_conn)
+        self.assertIsNone(self._get(1))
+        self.assertEqual(
+            get_result_cache_stats(redis_conn=self.redis_conn)["entries"], 0
+        )
+
+    def test_disabled(self):
+        self.settings.RESULT_CACHE_MAX_ENTRIES = 0
+        self._set(1)
+        self.assertIsNone(self._get(1))
+        self.assertEqual(self.redis_conn.keys(), [])
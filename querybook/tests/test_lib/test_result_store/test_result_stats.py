@@ -0,0 +1,98 @@
+import datetime
+import json
+from unittest import TestCase
+
+from lib.result_store.result_stats import HyperLogLog, ResultStatsCollector
+
+
+class HyperLogLogTestCase(TestCase):
+    def test_count(self):
+        for num_values in [0, 10, 1000, 100000]:
+            hll = HyperLogLog()
+            for i in range(num_values):
+                hll.add(i)
+                # Duplicates are not counted
+                hll.add(i)
+            self.assertAlmostEqual(
+                hll.count(), num_values, delta=max(num_values * 0.05, 1)
+            )
+
+    def test_count_strings(self):
+        hll = HyperLogLog()
+        for i in range(20000):
+            hll.add("value_{}".format(i % 5000))
+        self.assertAlmostEqual(hll.count(), 5000, delta=250)
+
+
+class ResultStatsCollectorTestCase(TestCase):
+    def test_column_stats(self):
+        stats = ResultStatsCollector(["id", "name", "mixed", "tags"], sample_size=10)
+        for i in range(1000):
+            stats.add_row(
+                [
+                    i,
+                    None if i % 4 == 0 else "name_{}".format(i % 10),
+                    i if i % 2 else str(i),
+                    [i],
+                ]
+            )
+
+        stats_dict = stats.to_dict()
+        self.assertEqual(stats_dict["row_count"], 1000)
+        id_stats, name_stats, mixed_stats, tags_stats = stats_dict["columns"]
+
+        self.assertEqual(id_stats["name"], "id")
+        self.assertEqual((id_stats["min"], id_stats["max"]), (0, 999))
+        self.assertEqual(id_stats["null_count"], 0)
+        self.assertAlmostEqual(id_stats["distinct_count"], 1000, delta=30)
+
+        self.assertEqual(name_stats["null_count"], 250)
+        self.assertEqual((name_stats["min"], name_stats["max"]), ("name_0", "name_9"))
+        self.assertEqual(name_stats["distinct_count"], 10)
+
+        # Values that cannot be compared have no min and max
+        self.assertEqual((mixed_stats["min"], mixed_stats["max"]), (None, None))
+        self.assertEqual((tags_stats["min"], tags_stats["max"]), ("[0]", "[999]"))
+
+    def test_rows_and_batches(self):
+        rows = [[i % 7, None if i % 3 else "name_{}".format(i)] for i in range(2500)]
+        row_stats = ResultStatsCollector(["id", "name"], sample_size=10)
+        for row in rows:
+            row_stats.add_row(row)
+        batch_stats = ResultStatsCollector(["id", "name"], sample_size=10)
+        for i in range(0, len(rows), 300):
+            batch_stats.add_rows(rows[i : i + 300])
+
+        self.assertEqual(row_stats.num_rows, 2500)
+        row_stats_dict = row_stats.to_dict()
+        batch_stats_dict = batch_stats.to_dict()
+        self.assertEqual(row_stats_dict["columns"], batch_stats_dict["columns"])
+        self.assertEqual(
+            row_stats_dict["columns"][0],
+            {"name": "id", "null_count": 0, "min": 0, "max": 6, "distinct_count": 7},
+        )
+        self.assertEqual(row_stats_dict["columns"][1]["null_count"], 1666)
+
+    def test_sample(self):
+        stats = ResultStatsCollector(["id"], sample_size=100, seed=0)
+        stats.add_rows([[i] for i in range(10)])
+        self.assertEqual(stats.to_dict()["sample"], [[i] for i in range(10)])
+
+        stats.add_rows([[i] for i in range(10, 10000)])
+        sample = [row[0] for row in stats.to_dict()["sample"]]
+        self.assertEqual(len(sample), 100)
+        self.assertEqual(len(set(sample)), 100)
+        # Sampled from the whole result, not only its start
+        self.assertGreater(max(sample), 5000)
+        self.assertGreater(sum(row_id >= 5000 for row_id in sample), 25)
+
+    def test_serializable(self):
+        stats = ResultStatsCollector(["time", "value", "text"], sample_size=10)
+        stats.add_row([datetime.datetime(2020, 1, 1), float("nan"), "a" * 1000])
+
+        stats_dict = json.loads(json.dumps(stats.to_dict()))
+        time_stats, value_stats, text_stats = stats_dict["columns"]
+        self.assertEqual(time_stats["min"], "2020-01-01 00:00:00")
+        self.assertEqual(value_stats["min"], "nan")
+        self.assertEqual(len(text_stats["max"]), 200)
+        self.assertEqual(len(stats_dict["sample"]), 1)
@@ -0,0 +1,95 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from lib.query_executor.utils import row_to_csv
+from lib.result_store import GenericReader
+from lib.result_store.row_index import RowOffsetIndex
+
+COLUMNS = ["id", "name"]
+ROWS = [[i, "中文" if i % 3 == 0 else "hello,world"] for i in range(5000)]
+
+
+def build_index(rows, batch_size=100):
+    index = RowOffsetIndex()
+    chunks = [row_to_csv(COLUMNS)]
+    index.add(chunks[0], 1)
+    for i in range(0, len(rows), batch_size):
+        data = "".join(row_to_csv(row) for row in rows[i : i + batch_size])
+        index.add(data, len(rows[i : i + batch_size]))
+        chunks.append(data)
+    return index, "".join(chunks)
+
+
+class RowOffsetIndexTestCase(TestCase):
+    def test_offsets(self):
+        index, text = build_index(ROWS)
+        encoded = text.encode("utf-8")
+        lines = text.split("\n")
+
+        self.assertEqual(index.entries[0], (0, 0))
+        self.assertGreater(len(index.entries), 1)
+        for row, offset in index.entries:
+            # Every entry points to the start of its row
+            self.assertEqual(
+                encoded[offset:].decode("utf-8").split("\n")[0], lines[row]
+            )
+
+    def test_lookup(self):
+        index = RowOffsetIndex([(0, 0), (1001, 50), (2001, 100)])
+        self.assertEqual(index.lookup(0), (0, 0))
+        self.assertEqual(index.lookup(1000), (0, 0))
+        self.assertEqual(index.lookup(1001), (1001, 50))
+        self.assertEqual(index.lookup(5000), (2001, 100))
+
+
+class ReadCSVPageTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        store_path_patch = mock.patch(
+            "lib.result_store.stores.file_store.FILE_STORE_PATH",
+            self.temp_dir.name + "/",
+        )
+        store_path_patch.start()
+        self.addCleanup(store_path_patch.stop)
+        self.addCleanup(self.temp_dir.cleanup)
+
+        self.index, text = build_index(ROWS)
+        with open(os.path.join(self.temp_dir.name, "result.csv"), "w") as f:
+            f.write(text)
+
+    def _read_page(self, offset, limit, index=None):
+        with mock.patch(
+            "lib.result_store.RowOffsetIndex.load", return_value=index
+        ), GenericReader("file://result.csv") as reader:
+            return reader.read_csv_page(offset, limit)
+
+    def _expected_page(self, offset, limit):
+        return [COLUMNS] + [
+            [str(cell) for cell in row] for row in ROWS[offset : offset + limit]
+        ]
+
+    def test_read_page_with_index(self):
+        for offset in [0, 1, 999, 1000, 2500, 4990]:
+            self.assertEqual(
+                self._read_page(offset, 20, self.index),
+                self._expected_page(offset, 20),
+            )
+
+    def test_save_and_load(self):
+        with mock.patch(
+            "lib.result_store.QuerybookSettings.RESULT_STORE_TYPE", "file"
+        ), mock.patch(
+            "lib.result_store.QuerybookSettings.RESULT_STORE_COMPRESSION", None
+        ):
+            self.index.save("querybook_temp/1/result.csv")
+
+        index = RowOffsetIndex.load("file://querybook_temp/1/result.csv")
+        self.assertEqual(index.entries, self.index.entries)
+        self.assertIsNone(RowOffsetIndex.load("file://querybook_temp/2/result.csv"))
+
+    def test_read_page_without_index(self):
+        self.assertEqual(self._read_page(2500, 20), self._expected_page(2500, 20))
+
+    def test_read_page_past_end(self):
+        self.assertEqual(self._read_page(6000, 20, self.index), [COLUMNS])
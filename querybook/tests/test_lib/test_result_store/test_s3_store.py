@@ -0,0 +1,84 @@
+import os
+from unittest import TestCase, mock
+
+import boto3
+from moto import mock_s3
+
+from clients.common import FileDoesNotExist
+from lib.query_executor.utils import row_to_csv
+from lib.result_store import GenericReader
+
+BUCKET_NAME = "querybook-test"
+ROWS = [["id", "text"]] + [[str(i), "Hello\nWorld {}".format(i)] for i in range(100)]
+
+
+class CooperativeS3ReaderTestCase(TestCase):
+    def setUp(self):
+        env_patch = mock.patch.dict(
+            os.environ,
+            {
+                "AWS_ACCESS_KEY_ID": "testing",
+                "AWS_SECRET_ACCESS_KEY": "testing",
+                "AWS_DEFAULT_REGION": "us-east-1",
+            },
+        )
+        env_patch.start()
+        self.addCleanup(env_patch.stop)
+
+        s3_mock = mock_s3()
+        s3_mock.start()
+        self.addCleanup(s3_mock.stop)
+
+        for patch in [
+            mock.patch("clients.s3_client._s3_client", None),
+            mock.patch(
+                "lib.result_store.stores.s3_store.QuerybookSettings.STORE_BUCKET_NAME",
+                BUCKET_NAME,
+            ),
+            mock.patch(
+                "lib.result_store.stores.s3_store.QuerybookSettings.STORE_PATH_PREFIX",
+                "",
+            ),
+        ]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=BUCKET_NAME)
+        s3.put_object(
+            Bucket=BUCKET_NAME,
+            Key="querybook_temp/1/result.csv",
+            Body="".join(map(row_to_csv, ROWS)).encode("utf-8"),
+        )
+
+    def test_read_csv(self):
+        with GenericReader(
+            "s3://querybook_temp/1/result.csv", cooperative=True
+        ) as reader:
+            self.assertEqual(reader.read_csv(number_of_lines=11), ROWS[:11])
+
+    def test_read_csv_page(self):
+        with mock.patch(
+            "lib.result_store.RowOffsetIndex.load", return_value=None
+        ), GenericReader(
+            "s3://querybook_temp/1/result.csv", cooperative=True
+        ) as reader:
+            self.assertEqual(reader.read_csv_page(50, 5), ROWS[:1] + ROWS[51:56])
+
+    def test_missing_result(self):
+        with self.assertRaises(FileDoesNotExist):
+            with GenericReader("s3://querybook_temp/2/result.csv", cooperative=True):
+                pass
+
+    def test_read_raw(self):
+        with GenericReader("s3://querybook_temp/1/result.csv") as reader:
+            self.assertEqual(reader.read_raw(), "".join(map(row_to_csv, ROWS)))
+
+    def test_iter_raw_range(self):
+        csv_bytes = "".join(map(row_to_csv, ROWS)).encode("utf-8")
+        reader = GenericReader("s3://querybook_temp/1/result.csv")
+        self.assertEqual(reader.get_raw_size(), len(csv_bytes))
+        self.assertEqual(
+            b"".join(reader.iter_raw(offset=100, end=300, chunk_size=64)),
+            csv_bytes[100:300],
+        )
@@ -0,0 +1,222 @@
+from unittest import mock, TestCase
+
+from app.db import DBSession
+from const.impression import ImpressionItemType
+from logic import elasticsearch
+from logic.impression import create_impression
+from logic.metastore import create_table_query_execution_log
+from models.metastore import DataSchema, DataTable
+
+
+def create_tables(schema_name, num_tables, session):
+    schema = DataSchema(name=schema_name, metastore_id=9007)
+    session.add(schema)
+    session.flush()
+    tables = [
+        DataTable(name="table_{}".format(i), schema_id=schema.id)
+        for i in range(num_tables)
+    ]
+    session.add_all(tables)
+    session.commit()
+    return tables
+
+
+def test_get_tables_weight(db_engine):
+    with DBSession() as session:
+        tables = create_tables("weight_schema", 3, session)
+        tables[1].boost_score = 2
+        for uid in [1, 2, 2]:
+            create_impression(
+                tables[0].id, ImpressionItemType.DATA_TABLE, uid, session=session
+            )
+        for _ in range(3):
+            create_table_query_execution_log(tables[1].id, 1, 1, session=session)
+
+        weights = elasticsearch.get_tables_weight(tables, session=session)
+        assert weights == {
+            table.id: elasticsearch.get_table_weight(table.id, session=session)
+            for table in tables
+        }
+        assert [weights[table.id] for table in tables] == [1, 5, 0]
+
+
+def test_get_tables_iter(db_engine):
+    with DBSession() as session:
+        tables = create_tables("iter_schema", 5, session)
+        table_ids = [table.id for table in tables]
+
+        es_tables = [
+            es_table
+            for es_table in elasticsearch.get_tables_iter(batch_size=2, session=session)
+            if es_table["schema"] == "iter_schema"
+        ]
+        assert [es_table["id"] for es_table in es_tables] == table_ids
+        assert es_tables[0]["full_name"] == "iter_schema.table_0"
+
+
+class BulkIndexTestCase(TestCase):
+    def setUp(self):
+        self.requests = []
+
+        def streaming_bulk(client, actions, **kwargs):
+            self.requests.append(list(actions))
+            for action in actions:
+                if action["_id"] == 3:
+                    yield False, {"index": {"_id": 3, "error": "mapper_parsing"}}
+                else:
+                    yield True, {"index": {"_id": action["_id"]}}
+
+        for patcher in [
+            mock.patch.object(elasticsearch, "get_hosted_es"),
+            mock.patch.object(
+                elasticsearch.helpers, "streaming_bulk", side_effect=streaming_bulk
+            ),
+            mock.patch.object(
+                elasticsearch.QuerybookSettings, "ELASTICSEARCH_BULK_CHUNK_SIZE", 4
+            ),
+            mock.patch.object(
+                elasticsearch.QuerybookSettings, "ELASTICSEARCH_BULK_CONCURRENCY", 2
+            ),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_bulk_index(self):
+        docs = ({"id": i, "name": "doc_{}".format(i)} for i in range(10))
+        num_indexed = elasticsearch._bulk_index("index", "type", docs)
+
+        # The failed doc is logged and skipped
+        self.assertEqual(num_indexed, 9)
+        self.assertEqual(sorted(len(actions) for actions in self.requests), [2, 4, 4])
+        actions = sorted(
+            (action for actions in self.requests for action in actions),
+            key=lambda action: action["_id"],
+        )
+        self.assertEqual(
+            actions[1],
+            {
+                "_index": "index",
+                "_type": "type",
+                "_id": 1,
+                "_source": {"id": 1, "name": "doc_1"},
+            },
+        )
+
+    def test_bulk_upsert(self):
+        elasticsearch._bulk_index("index", "type", [{"id": 1}], upsert=True)
+        self.assertEqual(
+            self.requests,
+            [
+                [
+                    {
+                        "_op_type": "update",
+                        "_index": "index",
+                        "_type": "type",
+                        "_id": 1,
+                        "doc": {"id": 1},
+                        "doc_as_upsert": True,
+                    }
+                ]
+            ],
+        )
+
+    def test_bulk_sync(self):
+        items = [mock.Mock(id=1), mock.Mock(id=2)]
+        elasticsearch._bulk_sync(
+            "users",
+            [1, 2, 4],
+            get_items=lambda ids: items,
+            items_to_es=lambda items: [{"id": item.id} for item in items],
+        )
+
+        actions = [action for actions in self.requests for action in actions]
+        self.assertEqual(
+            [(action.get("_op_type"), action["_id"]) for action in actions],
+            [("update", 1), ("update", 2), ("delete", 4)],
+        )
+
+    def test_empty(self):
+        self.assertEqual(elasticsearch._bulk_index("index", "type", []), 0)
+        self.assertEqual(self.requests, [])
+
+
+class RecreateIndicesTestCase(TestCase):
+    def setUp(self):
+        self.es = mock.Mock()
+        self.bulk_insert_tables = mock.Mock()
+        for patcher in [
+            mock.patch.object(elasticsearch, "get_hosted_es", return_value=self.es),
+            mock.patch.object(
+                elasticsearch, "_bulk_insert_tables", self.bulk_insert_tables
+            ),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.alias_name = elasticsearch.ES_CONFIG["tables"]["index_name"]
+
+    def get_built_index_name(self):
+        return self.es.indices.create.call_args[0][0]
+
+    def test_swap_alias(self):
+        old_index_name = self.alias_name + "_20200101000000"
+        self.es.indices.exists_alias.return_value = True
+        self.es.indices.get_alias.return_value = {old_index_name: {}}
+
+        elasticsearch.recreate_indices("tables")
+
+        index_name = self.get_built_index_name()
+        self.assertTrue(index_name.startswith(self.alias_name + "_"))
+        self.assertNotEqual(index_name, old_index_name)
+        # Loaded without replicas and refresh, then restored
+        build_settings = self.es.indices.create.call_args[0][1]["settings"]
+        self.assertEqual(build_settings["number_of_replicas"], 0)
+        self.assertEqual(build_settings["refresh_interval"], "-1")
+        self.assertIn("analysis", build_settings)
+        self.bulk_insert_tables.assert_called_once_with(index_name)
+        self.es.indices.put_settings.assert_called_once_with(
+            index=index_name,
+            body={"index": {"number_of_replicas": None, "refresh_interval": None}},
+        )
+
+        self.es.indices.update_aliases.assert_called_once_with(
+            body={
+                "actions": [
+                    {"add": {"index": index_name, "alias": self.alias_name}},
+                    {"remove": {"index": old_index_name, "alias": self.alias_name}},
+                ]
+            }
+        )
+        self.es.indices.delete.assert_called_once_with(old_index_name)
+
+    def test_replace_index_without_alias(self):
+        self.es.indices.exists_alias.return_value = False
+        self.es.indices.exists.return_value = True
+
+        elasticsearch.recreate_indices("tables")
+
+        self.es.indices.update_aliases.assert_called_once_with(
+            body={
+                "actions": [
+                    {
+                        "add": {
+                            "index": self.get_built_index_name(),
+                            "alias": self.alias_name,
+                        }
+                    },
+                    {"remove_index": {"index": self.alias_name}},
+                ]
+            }
+        )
+        self.es.indices.delete.assert_not_called()
+
+    def test_failed_build(self):
+        self.es.indices.exists_alias.return_value = False
+        self.bulk_insert_tables.side_effect = Exception("bulk failed")
+
+        with self.assertRaises(Exception):
+            elasticsearch.recreate_indices("tables")
+
+        # The alias is untouched and the partial index is deleted
+        self.es.indices.update_aliases.assert_not_called()
+        self.es.indices.delete.assert_called_once_with(self.get_built_index_name())
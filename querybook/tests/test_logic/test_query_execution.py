@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from app.db import DBSession
+from const.query_execution import (
+    QueryExecutionCacheStatus,
+    QueryExecutionStatus,
+    StatementExecutionStatus,
+)
+from lib.query_executor.exc import InvalidQueryExecution
+from logic import query_execution as logic
+from models.admin import QueryEngine
+
+
+def create_done_query_execution(query, engine_id, uid, session):
+    query_execution = logic.create_query_execution(
+        query=query, engine_id=engine_id, uid=uid, cache_ttl=60, session=session
+    )
+    statement_execution = logic.create_statement_execution(
+        query_execution.id,
+        0,
+        len(query),
+        StatementExecutionStatus.DONE,
+        session=session,
+    )
+    statement_execution.result_path = "s3://bucket/result.csv"
+    statement_execution.result_row_count = 10
+    query_execution.status = QueryExecutionStatus.DONE
+    query_execution.completed_at = datetime.utcnow()
+    session.commit()
+    return query_execution
+
+
+def test_get_query_execution_cache_key():
+    assert logic.get_query_execution_cache_key(
+        "select 1;\n-- comment\nselect 2"
+    ) == logic.get_query_execution_cache_key("select 1;  select 2;")
+    assert logic.get_query_execution_cache_key(
+        "select 1"
+    ) != logic.get_query_execution_cache_key("select 2")
+
+
+def test_reuse_cached_result(db_engine):
+    with DBSession() as session:
+        cached_query_execution = create_done_query_execution(
+            "select 1", 9001, 1, session
+        )
+        assert cached_query_execution.cache_status == QueryExecutionCacheStatus.MISS
+
+        query_execution = logic.create_query_execution(
+            query="-- again\nselect 1;",
+            engine_id=9001,
+            uid=1,
+            cache_ttl=60,
+            session=session,
+        )
+        assert query_execution.status == QueryExecutionStatus.DONE
+        assert query_execution.cache_status == QueryExecutionCacheStatus.HIT
+        assert query_execution.cached_from_id == cached_query_execution.id
+
+        statement_executions = query_execution.statement_executions
+        assert len(statement_executions) == 1
+        assert statement_executions[0].result_path == "s3://bucket/result.csv"
+        assert statement_executions[0].result_row_count == 10
+        assert statement_executions[0].statement_range_start == 9
+
+
+def test_cache_miss(db_engine):
+    with DBSession() as session:
+        create_done_query_execution("select 2", 9002, 1, session)
+
+        # Another user, engine or query does not reuse the result
+        for engine_id, uid, query in [
+            (9002, 2, "select 2"),
+            (9003, 1, "select 2"),
+            (9002, 1, "select 3"),
+        ]:
+            query_execution = logic.create_query_execution(
+                query=query, engine_id=engine_id, uid=uid, cache_ttl=60, session=session
+            )
+            assert query_execution.status == QueryExecutionStatus.INITIALIZED
+            assert query_execution.cache_status == QueryExecutionCacheStatus.MISS
+
+        # Fresh by the time the execution completed, not when it was created
+        stale_query_execution = create_done_query_execution(
+            "select 6", 9002, 1, session
+        )
+        stale_query_execution.completed_at = datetime.utcnow() - timedelta(minutes=2)
+        session.commit()
+        query_execution = logic.create_query_execution(
+            query="select 6", engine_id=9002, uid=1, cache_ttl=60, session=session
+        )
+        assert query_execution.cache_status == QueryExecutionCacheStatus.MISS
+
+        # The cache is opt-in
+        query_execution = logic.create_query_execution(
+            query="select 2", engine_id=9002, uid=1, session=session
+        )
+        assert query_execution.cache_status is None
+
+
+@mock.patch(
+    "logic.query_execution.invalidate_cached_result",
+    side_effect=Exception("redis is down"),
+)
+def test_update_result_without_result_cache(invalidate_cached_result, db_engine):
+    with DBSession() as session:
+        query_execution = logic.create_query_execution(
+            query="select 8", engine_id=9002, uid=1, session=session
+        )
+        statement_execution = logic.create_statement_execution(
+            query_execution.id, 0, 8, StatementExecutionStatus.DONE, session=session
+        )
+
+        logic.update_statement_execution(
+            statement_execution.id,
+            result_path="s3://bucket/result.csv",
+            session=session,
+        )
+        invalidate_cached_result.assert_called_once_with(statement_execution.id)
+        assert statement_execution.result_path == "s3://bucket/result.csv"
+
+
+def test_cache_not_allowed_query(db_engine):
+    with DBSession() as session:
+        create_done_query_execution("select 7", 9002, 1, session)
+
+        # The table ACL may have changed after the result was cached
+        with mock.patch(
+            "lib.query_executor.executor_factory.assert_safe_query",
+            side_effect=InvalidQueryExecution("Table is not allowed by metastore"),
+        ):
+            query_execution = logic.create_query_execution(
+                query="select 7", engine_id=9002, uid=1, cache_ttl=60, session=session
+            )
+        assert query_execution.status == QueryExecutionStatus.INITIALIZED
+        assert query_execution.cache_status == QueryExecutionCacheStatus.MISS
+
+
+@mock.patch("logic.query_execution.QuerybookSettings.QUERY_EXECUTION_COALESCE", True)
+def test_follow_in_flight_query_execution(db_engine):
+    with DBSession() as session:
+        session.add(
+            QueryEngine(
+                id=9004,
+                name="engine_9004",
+                language="presto",
+                executor="presto",
+                executor_params={},
+            )
+        )
+        session.commit()
+
+        leader = logic.create_query_execution(
+            query="select 4", engine_id=9004, uid=1, session=session
+        )
+        assert leader.leader_id is None
+
+        follower = logic.create_query_execution(
+            query="select 4;", engine_id=9004, uid=1, session=session
+        )
+        assert follower.leader_id == leader.id
+        assert logic.get_follower_query_execution_ids(leader.id, session=session) == [
+            follower.id
+        ]
+
+        # Engines can run the queries as the user, so other users do not follow
+        query_execution = logic.create_query_execution(
+            query="select 4", engine_id=9004, uid=2, session=session
+        )
+        assert query_execution.leader_id is None
+
+        # Only read only queries are followed
+        for query in ["select 5", "insert into a select * from b"]:
+            query_execution = logic.create_query_execution(
+                query=query, engine_id=9004, uid=1, session=session
+            )
+            assert query_execution.leader_id is None
+
+        leader.status = QueryExecutionStatus.DONE
+        session.commit()
+        query_execution = logic.create_query_execution(
+            query="select 4", engine_id=9004, uid=1, session=session
+        )
+        assert query_execution.leader_id is None
@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+import pytest
+from celery.exceptions import Retry, SoftTimeLimitExceeded
+
+from app.db import DBSession
+from const.query_execution import QueryExecutionStatus, StatementExecutionStatus
+from logic import query_execution as qe_logic
+from tasks.run_query import (
+    complete_followers,
+    follow_query_execution,
+    get_soft_time_limit,
+    run_executor_until_finish,
+)
+
+
+def get_celery_task(timelimit=None, soft_time_limit=None, is_aborted=False, retries=0):
+    return mock.Mock(
+        request=SimpleNamespace(id="task_id", timelimit=timelimit, retries=retries),
+        soft_time_limit=soft_time_limit,
+        app=SimpleNamespace(conf=SimpleNamespace(task_soft_time_limit=100)),
+        is_aborted=mock.Mock(return_value=is_aborted),
+        retry=mock.Mock(side_effect=lambda **kwargs: Retry()),
+    )
+
+
+class RunExecutorUntilFinishTestCase(TestCase):
+    def test_get_soft_time_limit(self):
+        self.assertEqual(get_soft_time_limit(get_celery_task()), 100)
+        self.assertEqual(get_soft_time_limit(get_celery_task(soft_time_limit=50)), 50)
+        self.assertEqual(get_soft_time_limit(get_celery_task(timelimit=(None, 10))), 10)
+
+    def test_run_until_done(self):
+        executor = mock.Mock(status=QueryExecutionStatus.RUNNING)
+
+        def poll():
+            if executor.poll.call_count == 3:
+                executor.status = QueryExecutionStatus.DONE
+
+        executor.poll.side_effect = poll
+        run_executor_until_finish(get_celery_task(), executor)
+        self.assertEqual(executor.poll.call_count, 3)
+        self.assertEqual(executor.sleep.call_count, 2)
+
+    def test_cancel_when_aborted(self):
+        executor = mock.Mock(status=QueryExecutionStatus.RUNNING)
+        run_executor_until_finish(get_celery_task(is_aborted=True), executor)
+        executor.cancel.assert_called_once()
+        executor.poll.assert_not_called()
+
+    def test_soft_time_limit(self):
+        executor = mock.Mock(status=QueryExecutionStatus.RUNNING)
+        with mock.patch("tasks.run_query.time.time", side_effect=[0, 50, 101]):
+            with self.assertRaises(SoftTimeLimitExceeded):
+                run_executor_until_finish(get_celery_task(), executor)
+        self.assertEqual(executor.poll.call_count, 1)
+
+
+@mock.patch("tasks.run_query.socketio")
+@mock.patch("logic.query_execution.QuerybookSettings.QUERY_EXECUTION_COALESCE", True)
+def test_follow_query_execution(socketio, db_engine):
+    with DBSession() as session:
+        leader = qe_logic.create_query_execution(
+            query="select 6", engine_id=9006, uid=1, session=session
+        )
+        follower = qe_logic.create_query_execution(
+            query="select 6", engine_id=9006, uid=1, session=session
+        )
+        leader_id, follower_id = leader.id, follower.id
+
+        statement_execution = qe_logic.create_statement_execution(
+            leader_id, 0, 8, StatementExecutionStatus.DONE, session=session
+        )
+        statement_execution.result_path = "s3://bucket/result.csv"
+        session.commit()
+
+    # The task is retried later while the leader runs
+    celery_task = get_celery_task(retries=6)
+    with pytest.raises(Retry):
+        follow_query_execution(celery_task, follower_id)
+    celery_task.retry.assert_called_once_with(countdown=30, max_retries=None)
+
+    with DBSession() as session:
+        qe_logic.get_query_execution_by_id(
+            leader_id, session=session
+        ).status = QueryExecutionStatus.DONE
+        session.commit()
+    complete_followers(leader_id, QueryExecutionStatus.DONE)
+
+    with DBSession() as session:
+        follower = qe_logic.get_query_execution_by_id(follower_id, session=session)
+        assert follower.status == QueryExecutionStatus.DONE
+        assert [s.result_path for s in follower.statement_executions] == [
+            "s3://bucket/result.csv"
+        ]
+    assert socketio.emit.call_args[0][0] == "query_end"
+
+    # Completed once, when the retried task of the follower runs
+    assert (
+        follow_query_execution(get_celery_task(), follower_id)
+        == QueryExecutionStatus.DONE
+    )
+    with DBSession() as session:
+        follower = qe_logic.get_query_execution_by_id(follower_id, session=session)
+        assert len(follower.statement_executions) == 1
+
+    # Executions that do not follow are run
+    assert follow_query_execution(get_celery_task(), leader_id) is None
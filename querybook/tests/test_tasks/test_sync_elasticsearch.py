@@ -0,0 +1,91 @@
+from unittest import TestCase, mock
+
+import fakeredis
+
+from tasks import sync_elasticsearch as sync_tasks
+
+
+class SyncElasticsearchChangesTestCase(TestCase):
+    def setUp(self):
+        self.redis_conn = fakeredis.FakeStrictRedis()
+        self.synced = []
+
+        def sync_by_ids(item_type):
+            return lambda ids: self.synced.append((item_type, sorted(ids)))
+
+        settings_patch = mock.patch("tasks.sync_elasticsearch.QuerybookSettings")
+        self.settings = settings_patch.start()
+        self.settings.ELASTICSEARCH_SYNC_INTERVAL = 30
+        self.settings.ELASTICSEARCH_SYNC_BATCH_SIZE = 100
+        self.addCleanup(settings_patch.stop)
+
+        for patcher in [
+            mock.patch("clients.redis_client.get_redis", return_value=self.redis_conn),
+            mock.patch(
+                "logic.elasticsearch.update_data_docs_by_ids",
+                side_effect=sync_by_ids("datadocs"),
+            ),
+            mock.patch(
+                "logic.elasticsearch.update_tables_by_ids",
+                side_effect=sync_by_ids("tables"),
+            ),
+            mock.patch(
+                "logic.elasticsearch.update_users_by_ids",
+                side_effect=sync_by_ids("users"),
+            ),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        apply_async_patch = mock.patch.object(
+            sync_tasks.sync_elasticsearch_changes, "apply_async"
+        )
+        self.apply_async = apply_async_patch.start()
+        self.addCleanup(apply_async_patch.stop)
+
+    def test_sync_changes(self):
+        for item_type, item_id in [
+            ("tables", 1),
+            ("datadocs", 5),
+            ("tables", 2),
+            ("tables", 1),
+        ]:
+            sync_tasks.queue_sync_elasticsearch(item_type, item_id)
+        # Deduplicated and scheduled once
+        self.assertEqual(self.redis_conn.zcard(sync_tasks.SYNC_QUEUE_KEY), 3)
+        self.apply_async.assert_called_once_with(countdown=30)
+
+        sync_tasks.sync_elasticsearch_changes()
+        self.assertEqual(sorted(self.synced), [("datadocs", [5]), ("tables", [1, 2])])
+        self.assertEqual(self.redis_conn.zcard(sync_tasks.SYNC_QUEUE_KEY), 0)
+
+        # The next change schedules another task
+        sync_tasks.queue_sync_elasticsearch("users", 3)
+        self.assertEqual(self.apply_async.call_count, 2)
+
+    def test_sync_in_batches(self):
+        self.settings.ELASTICSEARCH_SYNC_BATCH_SIZE = 2
+        for item_id in range(5):
+            sync_tasks.queue_sync_elasticsearch("users", item_id)
+
+        sync_tasks.sync_elasticsearch_changes()
+        self.assertEqual(
+            self.synced, [("users", [0, 1]), ("users", [2, 3]), ("users", [4])]
+        )
+
+    def test_requeue_failed_changes(self):
+        sync_tasks.queue_sync_elasticsearch("tables", 1)
+        sync_tasks.queue_sync_elasticsearch("tables", 2)
+
+        with mock.patch(
+            "logic.elasticsearch.update_tables_by_ids",
+            side_effect=Exception("es is down"),
+        ):
+            with self.assertRaises(Exception):
+                sync_tasks.sync_elasticsearch_changes()
+
+        self.assertEqual(self.redis_conn.zcard(sync_tasks.SYNC_QUEUE_KEY), 2)
+        self.assertEqual(self.apply_async.call_count, 2)
+
+        sync_tasks.sync_elasticsearch_changes()
+        self.assertEqual(self.synced, [("tables", [1, 2])])
@@ -58,6 +58,15 @@ export const StatementResult: React.FC<IProps> = ({
             </span>
         );
 
+        const resultTruncatedTooltip =
+            'The result reached its size limit, the rest of the rows were not stored.';
+        const truncatedInfo = statementExecution.result_truncated ? (
+            <span aria-label={resultTruncatedTooltip} data-balloon-pos={'up'}>
+                <span className="warning-word"> Truncated </span>
+                <i className="fas fa-info-circle" />
+            </span>
+        ) : null;
+
         return (
             <span
                 className={clsx({
@@ -66,6 +75,7 @@ export const StatementResult: React.FC<IProps> = ({
                 })}
             >
                 {fetchRowInfo}
+                {truncatedInfo}
             </span>
         );
     };
@@ -17,6 +17,11 @@ export enum StatementExecutionStatus {
     CANCEL,
 }
 
+export enum QueryExecutionCacheStatus {
+    MISS = 0,
+    HIT,
+}
+
 export enum QueryExecutionErrorType {
     INTERNAL = 0,
     ENGINE,
@@ -3,7 +3,10 @@ import { ThunkAction, ThunkDispatch as ReduxThunkDispatch } from 'redux-thunk';
 
 import { DataDocAction } from '../dataDoc/types';
 import { IStoreState } from '../store/types';
-import { IQueryExecutionViewer } from 'const/queryExecution';
+import {
+    IQueryExecutionViewer,
+    QueryExecutionCacheStatus,
+} from 'const/queryExecution';
 import { IAccessRequest } from 'const/accessRequest';
 
 export interface IQueryExecution {
@@ -16,6 +19,12 @@ export interface IQueryExecution {
     engine_id: number;
     uid: number;
 
+    // Only set if the result cache was requested
+    cache_status?: QueryExecutionCacheStatus;
+    cached_from_id?: number;
+    // The execution of the same query this one follows instead of running
+    leader_id?: number;
+
     statement_executions?: number[];
 
     // If the query is still running
@@ -32,6 +41,7 @@ export interface IStatementExecution {
     error_msg?: string;
     has_log: boolean;
     result_row_count: number;
+    result_truncated: boolean;
     statement_range_end: number;
     statement_range_start: number;
     status: number;